@@ -61,6 +61,55 @@ let sampleCourses: [Course] = [
     )
 ]
 
+/// Local copy of the catalog, kept in step with GET /api/sync so a launch
+/// only downloads what changed since the previous one.
+struct CatalogCache: Codable {
+    var version = 0
+    var courses: [Int: APICourseSummary] = [:]
+    var reviewCourseIds: [Int: Int] = [:] // review id -> course id, for review counts
+    
+    private static var fileURL: URL {
+        FileManager.default.urls(for: .cachesDirectory, in: .userDomainMask)[0]
+            .appendingPathComponent("catalog-cache.json")
+    }
+    
+    /// The saved copy, or an empty one (version 0, i.e. a full sync) if there is none.
+    static func load() -> CatalogCache {
+        guard let data = try? Data(contentsOf: fileURL),
+              let cache = try? JSONDecoder().decode(CatalogCache.self, from: data) else {
+            return CatalogCache()
+        }
+        return cache
+    }
+    
+    func save() {
+        if let data = try? JSONEncoder().encode(self) {
+            try? data.write(to: Self.fileURL, options: .atomic)
+        }
+    }
+    
+    mutating func apply(_ delta: APISyncResponse) {
+        // The server didn't recognize our version and sent everything
+        if delta.reset {
+            courses = [:]
+            reviewCourseIds = [:]
+        }
+        for id in delta.deleted.courses {
+            courses[id] = nil
+        }
+        for id in delta.deleted.reviews {
+            reviewCourseIds[id] = nil
+        }
+        for course in delta.courses {
+            courses[course.id] = course
+        }
+        for review in delta.reviews {
+            reviewCourseIds[review.id] = review.courseId
+        }
+        version = delta.version
+    }
+}
+
 @MainActor
 final class CourseStore: ObservableObject {
     @Published var courses: [Course]
@@ -94,17 +143,19 @@ final class CourseStore: ObservableObject {
     
     func reloadFromServer() async {
         do {
-            async let coursesTask = NetworkManager.shared.fetchCourses()
-            async let reviewsTask = NetworkManager.shared.fetchAllReviews()
+            // Everything on the first launch, only the changes after that
+            var cache = CatalogCache.load()
+            let delta = try await NetworkManager.shared.fetchSync(since: cache.version)
+            cache.apply(delta)
+            cache.save()
             
-            let apiCourses = try await coursesTask
-            let allReviews = try await reviewsTask
+            let apiCourses = cache.courses.values.sorted { $0.id < $1.id }
             
             let storedCodes = UserDefaults.standard.stringArray(forKey: bookmarkDefaultsKey) ?? []
             
             let reviewCounts: [Int: Int] = Dictionary(
-                grouping: allReviews,
-                by: { $0.courseId }
+                grouping: cache.reviewCourseIds.values,
+                by: { $0 }
             ).mapValues { $0.count }
             
             func department(from code: String) -> String {
@@ -119,10 +170,10 @@ final class CourseStore: ObservableObject {
                     backendId: api.id,
                     code: api.code,
                     title: api.title,
-                    instructor: sample?.instructor ?? "",
-                    term: sample?.term ?? "",
+                    instructor: api.professor ?? sample?.instructor ?? "",
+                    term: api.term ?? sample?.term ?? "",
                     department: sample?.department ?? department(from: api.code),
-                    credit: sample?.credit ?? 0,
+                    credit: api.credit ?? sample?.credit ?? 0,
                     reviewCount: reviewCounts[api.id] ?? 0,
                     aiReview: api.aiReview,
                     isBookmarked: storedCodes.contains(api.code)
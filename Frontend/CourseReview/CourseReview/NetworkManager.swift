@@ -7,22 +7,34 @@
 
 import Foundation
 
-struct APICourseSummary: Decodable {
+struct APICourseSummary: Codable {
     let id: Int
     let title: String
     let code: String
+    let professor: String?
+    let term: String?
+    let credit: Int?
     let aiReview: String?
     
     enum CodingKeys: String, CodingKey {
         case id
         case title
         case code
+        case professor
+        case term
+        case credit
         case aiReview = "ai_review"
     }
 }
 
-struct APICoursesResponse: Decodable {
-    let courses: [APICourseSummary]
+struct APISearchCourse: Decodable {
+    let id: Int
+    let title: String
+    let code: String
+}
+
+struct APISearchResponse: Decodable {
+    let courses: [APISearchCourse]
 }
 
 struct APIReview: Decodable {
@@ -43,23 +55,42 @@ struct APIReviewsResponse: Decodable {
     let reviews: [APIReview]
 }
 
+struct APISyncDeleted: Decodable {
+    let courses: [Int]
+    let reviews: [Int]
+    let saved: [Int]
+}
+
+struct APISyncResponse: Decodable {
+    let version: Int
+    let reset: Bool
+    let courses: [APICourseSummary]
+    let reviews: [APIReview]
+    let saved: [Int]
+    let deleted: APISyncDeleted
+}
+
 final class NetworkManager {
     static let shared = NetworkManager()
     private init() {}
     private let baseURL = URL(string: "http://127.0.0.1:8000/api/")!
     
-    func fetchCourses() async throws -> [APICourseSummary] {
-        let url = baseURL.appendingPathComponent("courses")
+    /// Ids of the courses matching `query`, best match first (GET /api/search).
+    func searchCourses(query: String, limit: Int = 100) async throws -> [Int] {
+        var components = URLComponents(url: baseURL.appendingPathComponent("search"), resolvingAgainstBaseURL: false)!
+        components.queryItems = [
+            URLQueryItem(name: "q", value: query),
+            URLQueryItem(name: "limit", value: String(limit))
+        ]
         
-        let (data, response) = try await URLSession.shared.data(from: url)
+        let (data, response) = try await URLSession.shared.data(from: components.url!)
         
         guard let http = response as? HTTPURLResponse, http.statusCode == 200 else {
             throw URLError(.badServerResponse)
         }
         
         let decoder = JSONDecoder()
-        let decoded = try decoder.decode(APICoursesResponse.self, from: data)
-        return decoded.courses
+        return try decoder.decode(APISearchResponse.self, from: data).courses.map { $0.id }
     }
     
     func fetchReviews(forCourseId courseId: Int) async throws -> [APIReview] {
@@ -78,17 +109,22 @@ final class NetworkManager {
         return decoded.reviews
     }
     
-    func fetchAllReviews() async throws -> [APIReview] {
-        let url = baseURL.appendingPathComponent("reviews")
+    /// Changes since the `version` of the last sync (0 for everything).
+    /// Store the returned `version` and pass it next time.
+    func fetchSync(since version: Int, userId: Int? = nil) async throws -> APISyncResponse {
+        var components = URLComponents(url: baseURL.appendingPathComponent("sync"), resolvingAgainstBaseURL: false)!
+        components.queryItems = [URLQueryItem(name: "since", value: String(version))]
+        if let userId = userId {
+            components.queryItems?.append(URLQueryItem(name: "user_id", value: String(userId)))
+        }
         
-        let (data, response) = try await URLSession.shared.data(from: url)
+        let (data, response) = try await URLSession.shared.data(from: components.url!)
         
         guard let http = response as? HTTPURLResponse, http.statusCode == 200 else {
             throw URLError(.badServerResponse)
         }
         
         let decoder = JSONDecoder()
-        let decoded = try decoder.decode(APIReviewsResponse.self, from: data)
-        return decoded.reviews
+        return try decoder.decode(APISyncResponse.self, from: data)
     }
 }
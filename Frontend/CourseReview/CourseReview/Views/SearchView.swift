@@ -14,6 +14,7 @@ struct SearchView: View {
     @State private var isEditing: Bool = false
     @State private var recentSearches: [String] = []
     @State private var hasLoadedFromServer = false
+    @State private var searchResultIds: [Int]? = nil
     
     private let recentSearchesKey = "recentSearches"
     
@@ -22,6 +23,10 @@ struct SearchView: View {
         
         if trimmed.isEmpty {
             return courseStore.courses
+        } else if let ids = searchResultIds {
+            // Server results (GET /api/search), in rank order
+            let byId = Dictionary(courseStore.courses.map { ($0.backendId, $0) }, uniquingKeysWith: { first, _ in first })
+            return ids.compactMap { byId[$0] }
         } else {
             let text = trimmed.lowercased()
             return courseStore.courses.filter { course in
@@ -56,6 +61,9 @@ struct SearchView: View {
                 }
             }
         }
+        .task(id: searchText) {
+            await runSearch()
+        }
         .onAppear {
             loadRecentSearches()
             
@@ -120,6 +128,26 @@ struct SearchView: View {
         }
     }
     
+    /// Asks the server once typing pauses; until it answers (or if search
+    /// is unavailable) the list is filtered on the device.
+    private func runSearch() async {
+        searchResultIds = nil
+        let trimmed = searchText.trimmingCharacters(in: .whitespaces)
+        guard !trimmed.isEmpty else { return }
+        
+        do {
+            try await Task.sleep(nanoseconds: 250_000_000)
+            let ids = try await NetworkManager.shared.searchCourses(query: trimmed)
+            if !Task.isCancelled {
+                searchResultIds = ids
+            }
+        } catch {
+            if !(error is CancellationError) {
+                print("Search failed, filtering locally: \(error)")
+            }
+        }
+    }
+    
     private func addToRecentSearches(from term: String) {
         let trimmed = term.trimmingCharacters(in: .whitespacesAndNewlines)
         guard !trimmed.isEmpty else { return }
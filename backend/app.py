@@ -1,76 +1,368 @@
-from flask import Flask, request
+import time
+_import_started = time.perf_counter()
+
+from flask import Blueprint, Flask, current_app, request
 import json
-from db import db, Course, Review, User
+from sqlalchemy import delete, event, select, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from db import db, Course, CourseStats, Review, User, association_table, COURSE_COLUMNS, COURSE_MINIMAL_COLUMNS, REVIEW_COLUMNS, REVIEW_SOURCES, SORT_KEYS, fetch_rows
+from db import engine_options, set_sqlite_pragmas
 import os
-from scripts.pipeline_load_all import run_pipeline
-
-app = Flask(__name__)
+import cache
+import instrumentation
+import jobs
+import json_provider
+import migrations
+import search
+import streaming
+import sync
+
+# Kept out of startup and imported by the views that use them: catalog and
+# similarity (numpy), the review source registry and the ingestion
+# pipeline (requests, every scraper). See create_app's startup budget.
+
+IMPORT_SECONDS = time.perf_counter() - _import_started
+
+api = Blueprint("api", __name__)
 db_filename = "coursereview.db"
 db_folder = "instance"
 
 basedir = os.path.abspath(os.path.dirname(__file__))
 
-app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///" + os.path.join(basedir, db_folder, db_filename)
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+MAX_SAVED_BATCH = 500 # Course ids per bulk saved-course list
 
 def success_response(data, code=200):
-    return json.dumps(data), code
-
-def failure_response(message, code=400):
-    return json.dumps({"error": message}), code
+    with instrumentation.timed("encode"):
+        body = json_provider.dumps_bytes(data)
+    return encoded_response(body, code)
 
-db.init_app(app)
-with app.app_context():
-    db.create_all()
+def encoded_response(body, code=200):
+    """Response for an already encoded JSON body (e.g. from the catalog snapshot)."""
+    return current_app.response_class(body, status=code, mimetype="application/json")
 
-@app.route("/api/courses", methods=["GET"])
+def failure_response(message, code=400):
+    return success_response({"error": message}, code)
+
+def user_versions(user_id, **kwargs):
+    """Cache dependencies of responses that embed a user's saved courses."""
+    return ["catalog", f"saved:{user_id}"]
+
+def recommendation_versions(user_id, **kwargs):
+    """Cache dependencies of a user's recommendations."""
+    return ["catalog", "similarity", f"saved:{user_id}"]
+
+def similar_count():
+    """The k query param, clamped to 1..similarity.MAX_K."""
+    import similarity
+    k = request.args.get("k", similarity.DEFAULT_K, type=int)
+    return max(1, min(k, similarity.MAX_K))
+
+def create_app(config=None):
+    """
+    Builds the app. config overrides the defaults below; the environment
+    variables cover deployment (see wsgi.py and gunicorn.conf.py).
+    """
+    app = Flask(__name__)
+    app.json = json_provider.FastJSONProvider(app)
+
+    # COURSEREVIEW_DATABASE_URI points the app at another database (e.g. the benchmark one)
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get(
+        "COURSEREVIEW_DATABASE_URI", f"sqlite:///" + os.path.join(basedir, db_folder, db_filename)
+    )
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    # Connections per process: one per server thread, plus the pipeline and some headroom
+    app.config["DB_POOL_SIZE"] = int(os.environ.get("COURSEREVIEW_DB_POOL_SIZE", 8))
+    app.config["DB_MAX_OVERFLOW"] = int(os.environ.get("COURSEREVIEW_DB_MAX_OVERFLOW", 4))
+    app.config.update(config or {})
+    app.config.setdefault("CATALOG_SNAPSHOT", os.environ.get("COURSEREVIEW_CATALOG_SNAPSHOT", "1") != "0")
+    app.config.setdefault("SUMMARIZER", os.environ.get("COURSEREVIEW_SUMMARIZER", "extractive"))
+    app.config.setdefault("SIMILARITY_DIR", os.environ.get(
+        "COURSEREVIEW_SIMILARITY_DIR", os.path.join(basedir, db_folder, "similarity")
+    ))
+    app.config.setdefault("JOBS_DIR", os.environ.get(
+        "COURSEREVIEW_JOBS_DIR", os.path.join(basedir, db_folder, "jobs")
+    ))
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options(
+        app.config["SQLALCHEMY_DATABASE_URI"], app.config["DB_POOL_SIZE"], app.config["DB_MAX_OVERFLOW"]
+    ))
+
+    app.config.setdefault("AUTO_MIGRATE", os.environ.get("COURSEREVIEW_AUTO_MIGRATE", "1") != "0")
+    app.config.setdefault("STARTUP_BUDGET_MS", float(os.environ.get("COURSEREVIEW_STARTUP_BUDGET_MS", 750)))
+
+    timings = {"imports": IMPORT_SECONDS}
+    start = time.perf_counter()
+    # SQLite creates the database file but not its directory (e.g. in a fresh container)
+    os.makedirs(os.path.join(basedir, db_folder), exist_ok=True)
+    db.init_app(app)
+    instrumentation.init_app(app)
+    app.register_blueprint(api)
+    timings["app"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with app.app_context():
+        if db.engine.dialect.name == "sqlite":
+            event.listen(db.engine, "connect", set_sqlite_pragmas)
+        migrations.ensure_schema(db.engine, app.config["AUTO_MIGRATE"])
+    timings["schema"] = time.perf_counter() - start
+
+    report_startup(app, timings)
+    return app
+
+def report_startup(app, timings):
+    """
+    Logs the startup time against STARTUP_BUDGET_MS (module imports count
+    once per process) and keeps it in app.config["STARTUP_TIMINGS"] (ms).
+    """
+    ms = {name: round(secs * 1000, 1) for name, secs in timings.items()}
+    ms["total"] = round(sum(ms.values()), 1)
+    app.config["STARTUP_TIMINGS"] = ms
+
+    parts = ", ".join(f"{name} {value:.0f}ms" for name, value in ms.items() if name != "total")
+    budget = app.config["STARTUP_BUDGET_MS"]
+    if ms["total"] > budget:
+        print(f"[WARN] Startup took {ms['total']:.0f}ms ({parts}), over the {budget:.0f}ms budget")
+    else:
+        print(f"[INFO] Startup took {ms['total']:.0f}ms ({parts}), budget {budget:.0f}ms")
+
+def course_list_statement(columns, sort, after):
+    """
+    Builds the keyset-paginated SELECT behind /api/courses.
+    Returns (statement, function mapping a result row to its cursor).
+
+    Unsorted lists page by course id. Sorted lists page by (metric, course id)
+    over the course_stats "all" rows, which is an index scan; courses with
+    no value for the metric are left out.
+    """
+    if not sort:
+        after_id = int(after or 0)
+        stmt = select(*columns).where(Course.id > after_id).order_by(Course.id)
+        return stmt, lambda row: row["id"]
+
+    descending = sort.startswith("-")
+    name = sort.lstrip("-")
+    if name not in SORT_KEYS:
+        raise ValueError(f"Unknown sort key '{name}'")
+    key, label = SORT_KEYS[name]
+
+    stmt = select(*columns, key.label(label)) \
+        .join(CourseStats, (CourseStats.course_id == Course.id) & (CourseStats.source == "all")) \
+        .where(key.isnot(None))
+
+    if after:
+        value, _, after_id = after.rpartition(":")
+        position = tuple_(key, CourseStats.course_id)
+        bound = tuple_(float(value), int(after_id))
+        stmt = stmt.where(position < bound if descending else position > bound)
+
+    if descending:
+        stmt = stmt.order_by(key.desc(), CourseStats.course_id.desc())
+    else:
+        stmt = stmt.order_by(key, CourseStats.course_id)
+    return stmt, lambda row: f"{row[label]}:{row['id']}"
+
+@api.route("/api/courses", methods=["GET"])
+@cache.cached(["catalog"])
 def get_all_courses():
-    courses = Course.query.all()
+    """
+    Cursor-paginated course list.
+
+    Query params:
+        after   -- next_cursor from the previous page
+        limit   -- page size, capped at MAX_PAGE_SIZE, or "all" to stream
+                   every course after the cursor (JSON, or NDJSON via Accept)
+        fields  -- "minimal" (default) or "full"
+        include -- "reviews" to embed every course's reviews
+        sort    -- one of SORT_KEYS, "-" prefix for descending
+    """
+    fields = request.args.get("fields", "minimal")
+    include = request.args.get("include", "").split(",")
+    with_reviews = "reviews" in include
+
+    if fields not in ("minimal", "full"):
+        return failure_response(f"Unknown fields value '{fields}'")
+
+    columns = COURSE_COLUMNS if fields == "full" or with_reviews else COURSE_MINIMAL_COLUMNS
+    try:
+        stmt, cursor_of = course_list_statement(columns, request.args.get("sort"), request.args.get("after"))
+    except ValueError as e:
+        return failure_response(f"Invalid sort or cursor: {e}")
+
+    if request.args.get("limit") == "all":
+        if with_reviews:
+            return failure_response("include=reviews can't be combined with limit=all")
+        return streaming.stream_query("courses", stmt)
+
+    limit = request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    import catalog
+    snapshot = catalog.get()
+    if snapshot is not None:
+        return encoded_response(snapshot.course_page(
+            fields, with_reviews, request.args.get("sort"), request.args.get("after"), limit
+        ))
+
+    # Rows are built straight from SQL tuples; one extra row tells whether another page exists
+    courses = fetch_rows(stmt.limit(limit + 1))
+    has_more = len(courses) > limit
+    courses = courses[:limit]
+
+    if with_reviews and courses:
+        # One IN (...) query for the whole page instead of one per course
+        by_course = {c["id"]: c for c in courses}
+        for c in courses:
+            c["reviews"] = []
+        reviews = fetch_rows(
+            select(*REVIEW_COLUMNS).where(Review.course_id.in_(by_course)).order_by(Review.id)
+        )
+        for r in reviews:
+            by_course[r["course"]]["reviews"].append(r)
+
     return {
-        "courses": [c.serialize() for c in courses]
+        "courses": courses,
+        "next_cursor": cursor_of(courses[-1]) if has_more else None
     }, 200
 
-@app.route("/api/course/<int:course_id>")
+@api.route("/api/course/<int:course_id>")
+@cache.cached(["catalog"])
 def get_course_id(course_id):
+    import catalog
+    snapshot = catalog.get()
+    if snapshot is not None:
+        body = snapshot.course_detail(course_id)
+        return encoded_response(body) if body is not None else failure_response("Course not found", 404)
+
     c = Course.query.get(course_id)
     if c is None:
         return failure_response("Course not found", 404)
     return success_response(c.serialize())
 
+@api.route("/api/search")
+@cache.cached(["catalog"])
+def search_catalog():
+    """
+    Full-text search over course title/code/professor and review text.
+
+    Query params:
+        q     -- search text (the last word is prefix-matched)
+        limit -- max results per section, capped at MAX_SEARCH_LIMIT
+    """
+    if not search.is_available():
+        return failure_response("Search is not available on this server", 503)
+
+    q = request.args.get("q", "")
+    limit = request.args.get("limit", DEFAULT_SEARCH_LIMIT, type=int)
+    limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+
+    results = search.search(db.session, q, limit)
+    if results is None:
+        return failure_response("Missing search query 'q'")
+
+    return success_response(results)
+
+@api.route("/api/course/<int:course_id>/stats")
+@cache.cached(["catalog"])
+def get_course_stats(course_id):
+    if db.session.get(Course, course_id) is None:
+        return failure_response("Course not found", 404)
+
+    stats = CourseStats.query.filter_by(course_id=course_id).all()
+    return success_response({
+        "course": course_id,
+        "sources": {s.source: s.serialize() for s in stats}
+    })
+
+@api.route("/api/course/<int:course_id>/similar")
+@cache.cached(["catalog", "similarity"])
+def get_similar_courses(course_id):
+    """
+    Courses most like this one by title, subject, description, instructors
+    and review text (see similarity.py), best first with a 0-1 score.
+
+    Query params:
+        k -- number of courses, capped at similarity.MAX_K
+    """
+    import similarity
+    index = similarity.get_index()
+    if index is None:
+        return failure_response("Recommendations are not available yet", 503)
+
+    results = index.similar(course_id, similar_count())
+    if results is None:
+        return failure_response("Course not found", 404)
+
+    return success_response({
+        "course": course_id,
+        "similar": similarity.course_rows(results)
+    })
+
 # Getting reviews
-@app.route("/api/reviews")
+@api.route("/api/reviews")
+@cache.cached(["catalog"])
 def get_all_reviews():
-    reviews = Review.query.all()
-    return {
-        "reviews" : [r.serialize() for r in reviews]
-    }
+    """Streams every review (JSON, or NDJSON via Accept) in constant memory."""
+    stmt = select(*REVIEW_COLUMNS).order_by(Review.id)
+    return streaming.stream_query("reviews", stmt)
 
-@app.route("/api/reviews/<int:course_id>")
+@api.route("/api/reviews/<int:course_id>")
+@cache.cached(["catalog"])
 def get_course_reviews(course_id):
-    reviews = Review.query.filter_by(course_id=course_id).all()
+    import catalog
+    snapshot = catalog.get()
+    if snapshot is not None:
+        return encoded_response(snapshot.course_reviews(course_id))
+
+    reviews = fetch_rows(select(*REVIEW_COLUMNS).where(Review.course_id == course_id).order_by(Review.id))
     return {
-        "reviews": [r.serialize() for r in reviews]
+        "reviews": reviews
     }
 
-@app.route("/api/reviews/<int:course_id>/<int:review_src>")
+@api.route("/api/reviews/<int:course_id>/<int:review_src>")
+@cache.cached(["catalog"])
 def get_course_reviews_src(course_id, review_src):
-    src = None
-    if review_src == 1:
-        src = "CUReviews"
-    if review_src == 0:
-        src = "RMP"
-    reviews = Review.query.filter_by(course_id=course_id, source=src).all()
+    source = REVIEW_SOURCES.get(review_src)
+    if source is None:
+        return failure_response(f"Unknown review source {review_src}", 404)
+
+    reviews = fetch_rows(
+        select(*REVIEW_COLUMNS).where(Review.course_id == course_id, Review.source == source[0])
+    )
 
     return {
-        "reviews": [r.serialize() for r in reviews]
+        "reviews": reviews
     }
 
-@app.route("/api/user", methods=["POST"])
+@api.route("/api/sync")
+def sync_changes():
+    """
+    Courses, reviews and saved courses changed after a sync version, plus
+    the ids deleted since (see sync.py). Not cached: the counter moves on
+    every write.
+
+    Query params:
+        since   -- the "version" returned by the client's last sync (0 for a full sync)
+        user_id -- include this user's saved-course changes
+    """
+    since = request.args.get("since", 0, type=int)
+    user_id = request.args.get("user_id", type=int)
+    if since < 0:
+        return failure_response("'since' must be a sync version (0 or more)")
+
+    return success_response(sync.changes_since(since, user_id))
+
+@api.route("/api/user", methods=["POST"])
 def create_user():
     body = json.loads(request.data)
     name = body.get("name")
     netid = body.get("netid")
 
+    if User.query.filter_by(netid=netid).first() is not None:
+        return failure_response(f"A user with netid {netid} already exists", 409)
+
     new_user = User(
         name = name,
         netid = netid
@@ -83,7 +375,7 @@ def create_user():
         new_user.serialize(), 201
     )
 
-@app.route("/api/users")
+@api.route("/api/users")
 def get_all_users():
     users = User.query.all()
 
@@ -91,7 +383,8 @@ def get_all_users():
         {"users": [u.serialize_no_courses() for u in users]}
     )
 
-@app.route("/api/users/<int:user_id>")
+@api.route("/api/users/<int:user_id>")
+@cache.cached(user_versions)
 def get_user_id(user_id):
     user = User.query.get(user_id)
 
@@ -102,70 +395,231 @@ def get_user_id(user_id):
         {"user": user.serialize()}
     )
 
-@app.route("/api/saved/<int:user_id>")
+def saved_course_rows(user_id, columns=COURSE_MINIMAL_COLUMNS):
+    """A user's saved courses in one joined projection query."""
+    return fetch_rows(
+        select(*columns)
+        .join(association_table, association_table.c.course_id == Course.id)
+        .where(association_table.c.user_id == user_id)
+        .order_by(Course.id)
+    )
+
+def apply_saved_changes(user_id, add=(), remove=(), replace=False):
+    """
+    Adds and removes saved courses with set-based statements on
+    association_table, without loading user.courses. Adding a course that is
+    already saved, or removing one that isn't, is a no-op. With replace,
+    every saved course not in add is removed. Returns the number of links
+    inserted or deleted; bumps the user's saved version if that's not 0.
+    """
+    changed = 0
+    add = sorted(set(add))
+    remove = sorted(set(remove) - set(add))
+
+    if add:
+        stmt = sqlite_insert(association_table).on_conflict_do_nothing()
+        changed += db.session.execute(stmt, [{"user_id": user_id, "course_id": c} for c in add]).rowcount
+
+    if replace:
+        stmt = delete(association_table).where(
+            association_table.c.user_id == user_id, association_table.c.course_id.not_in(add)
+        )
+        changed += db.session.execute(stmt).rowcount
+    elif remove:
+        stmt = delete(association_table).where(
+            association_table.c.user_id == user_id, association_table.c.course_id.in_(remove)
+        )
+        changed += db.session.execute(stmt).rowcount
+
+    if changed:
+        cache.bump_version(f"saved:{user_id}")
+    db.session.commit()
+    return changed
+
+def check_saved_request(user_id, course_ids):
+    """Returns an error response if the user or any course doesn't exist, else None."""
+    if db.session.execute(select(User.id).where(User.id == user_id)).first() is None:
+        return failure_response(f"Could not find user with id {user_id}", 404)
+
+    course_ids = set(course_ids)
+    found = set(db.session.execute(select(Course.id).where(Course.id.in_(course_ids))).scalars()) if course_ids else set()
+    missing = sorted(course_ids - found)
+    if missing:
+        return failure_response(f"Could not find courses with ids {missing}", 404)
+    return None
+
+def json_object_body():
+    """The request body as a dict, or None if it isn't a JSON object."""
+    body = request.get_json(force=True, silent=True)
+    return body if isinstance(body, dict) else None
+
+def is_course_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def course_id_list(body, key):
+    """body[key] as a list of ints, or None if it isn't one."""
+    ids = body.get(key, [])
+    if not isinstance(ids, list) or len(ids) > MAX_SAVED_BATCH:
+        return None
+    if not all(is_course_id(i) for i in ids):
+        return None
+    return ids
+
+@api.route("/api/saved/<int:user_id>")
+@cache.cached(user_versions)
 def get_user_saved(user_id):
-    user = User.query.get(user_id)
-    saved_courses = user.courses  
+    if db.session.execute(select(User.id).where(User.id == user_id)).first() is None:
+        return failure_response(f"Could not find user with id {user_id}", 404)
 
-    return success_response(
-        {"saved_courses": [c.serialize() for c in saved_courses]}, 200
+    saved_courses = saved_course_rows(user_id, COURSE_COLUMNS)
+    reviews = fetch_rows(
+        select(*REVIEW_COLUMNS)
+        .join(association_table, association_table.c.course_id == Review.course_id)
+        .where(association_table.c.user_id == user_id)
+        .order_by(Review.id)
     )
 
-@app.route("/api/<int:user_id>/saved", methods=["POST"])
-def create_user_saved(user_id):
-    body = json.loads(request.data)
-    course_id = body.get("course_id")
+    by_course = {c["id"]: c for c in saved_courses}
+    for c in saved_courses:
+        c["reviews"] = []
+    for r in reviews:
+        by_course[r["course"]]["reviews"].append(r)
 
-    course = Course.query.get(course_id)
-    user = User.query.get(user_id)
+    return success_response(
+        {"saved_courses": saved_courses}, 200
+    )
 
-    if not course:
+@api.route("/api/users/<int:user_id>/recommendations")
+@cache.cached(recommendation_versions)
+def get_user_recommendations(user_id):
+    """
+    Courses similar to the user's saved courses as a whole, excluding those.
+    Empty until the user saves something.
+
+    Query params:
+        k -- number of courses, capped at similarity.MAX_K
+    """
+    if db.session.execute(select(User.id).where(User.id == user_id)).first() is None:
         return failure_response(f"Could not find user with id {user_id}", 404)
 
-    if not user:
-        return failure_response(f"Could not find course with id {course_id}", 404)
+    import similarity
+    index = similarity.get_index()
+    if index is None:
+        return failure_response("Recommendations are not available yet", 503)
+
+    saved = db.session.execute(
+        select(association_table.c.course_id).where(association_table.c.user_id == user_id)
+    ).scalars()
+    results = index.recommend(saved, similar_count())
+
+    return success_response({
+        "user": user_id,
+        "recommendations": similarity.course_rows(results)
+    })
+
+@api.route("/api/<int:user_id>/saved", methods=["PUT", "PATCH"])
+def update_user_saved(user_id):
+    """
+    Bulk saved-course changes.
+
+    PATCH body: {"add": [course ids], "remove": [course ids]}
+    PUT body:   {"course_ids": [course ids]} -- the complete saved list (required;
+                {"course_ids": []} clears it)
+
+    Up to MAX_SAVED_BATCH ids per list. Returns the saved list afterwards.
+    """
+    body = json_object_body() if request.data else {}
+    if body is None:
+        return failure_response("Request body must be a JSON object")
+    if request.method == "PUT":
+        # Replacing the list with [] is destructive, so it has to be asked for
+        if "course_ids" not in body:
+            return failure_response('PUT body must be a JSON object with a "course_ids" list')
+        add, remove = course_id_list(body, "course_ids"), []
+    else:
+        add, remove = course_id_list(body, "add"), course_id_list(body, "remove")
+    if add is None or remove is None:
+        return failure_response(f"Course ids must be lists of at most {MAX_SAVED_BATCH} integers")
+
+    error = check_saved_request(user_id, add)
+    if error is not None:
+        return error
+
+    changed = apply_saved_changes(user_id, add, remove, replace=request.method == "PUT")
 
-    user.courses.append(course)
+    return success_response(
+        {"saved_courses": saved_course_rows(user_id), "changed": changed}, 200
+    )
 
-    db.session.commit()
+@api.route("/api/<int:user_id>/saved", methods=["POST"])
+def create_user_saved(user_id):
+    body = json_object_body()
+    if body is None or not is_course_id(body.get("course_id")):
+        return failure_response("Request body must be a JSON object with an integer course_id")
+    course_id = body["course_id"]
 
-    saved_courses = user.courses
+    error = check_saved_request(user_id, [course_id])
+    if error is not None:
+        return error
+
+    apply_saved_changes(user_id, add=[course_id])
 
     return success_response(
-        {"saved_courses": [c.serialize_minimal() for c in saved_courses]}, 200
+        {"saved_courses": saved_course_rows(user_id)}, 200
     )
     
-@app.route("/api/<int:user_id>/saved", methods=["DELETE"])
+@api.route("/api/<int:user_id>/saved", methods=["DELETE"])
 def remove_user_saved(user_id):
-    body = json.loads(request.data)
-    course_id = body.get("course_id")
+    body = json_object_body()
+    if body is None or not is_course_id(body.get("course_id")):
+        return failure_response("Request body must be a JSON object with an integer course_id")
+    course_id = body["course_id"]
 
-    course = Course.query.get(course_id)
-    user = User.query.get(user_id)
+    error = check_saved_request(user_id, [course_id])
+    if error is not None:
+        return error
 
-    if not course:
-        return failure_response(f"Could not find user with id {user_id}", 404)
-
-    if not user:
-        return failure_response(f"Could not find course with id {course_id}", 404)
-
-    user.courses.remove(course)
-    db.session.commit()
-
-    saved_courses = user.courses
+    apply_saved_changes(user_id, remove=[course_id])
 
     return success_response(
-        {"saved_courses": [c.serialize_minimal() for c in saved_courses]}, 200
+        {"saved_courses": saved_course_rows(user_id)}, 200
     )
 
-@app.route("/api/admin/retrieve-data", methods=["POST"])
+@api.route("/api/admin/retrieve-data", methods=["POST"])
 def retrieve_data():
-    try:
-        run_pipeline()
-        return {"ok": True, "message": "Data successfully retrieved."}, 200
-    
-    except Exception as e:
-        return {"ok": False, "message": f"Pipeline failed: {e}"}, 500
+    """
+    Starts the ingestion pipeline in the background and returns its job id.
+    Poll GET /api/admin/jobs/<job_id> for progress.
+
+    ?mode=snapshot loads the CSV snapshots in data/ instead of the live APIs.
+    """
+    mode = request.args.get("mode", "live")
+    if mode not in ("live", "snapshot"):
+        return failure_response(f"Unknown mode '{mode}'")
+
+    from scripts.pipeline_load_all import run_pipeline
+    job, started = jobs.start_job(current_app._get_current_object(), lambda job: run_pipeline(job, snapshot=mode == "snapshot"))
+
+    if not started:
+        return {
+            "ok": False,
+            "message": "A pipeline run is already in progress.",
+            "job_id": job["id"]
+        }, 409
+
+    return {
+        "ok": True,
+        "message": "Pipeline started.",
+        "job_id": job["id"]
+    }, 202
+
+@api.route("/api/admin/jobs/<job_id>")
+def get_job_status(job_id):
+    job = jobs.get_job(job_id)
+    if job is None:
+        return failure_response("Job not found", 404)
+    return success_response(job)
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=8000, debug=True)
+    # Development server; production runs wsgi.py under gunicorn
+    create_app().run(host="0.0.0.0", port=8000, debug=True)
@@ -0,0 +1,125 @@
+"""
+bench_serialization.py
+Compares the two ways of building list responses:
+
+    orm        -- Model.query + serialize() dicts + stdlib json.dumps
+    projection -- column-projection SELECT (db.fetch_rows) + json_provider.dumps_bytes
+
+Runs against a throwaway in-memory database, so it never touches
+instance/coursereview.db. From backend/:
+
+    python -m benchmarks.bench_serialization --courses 2000 --reviews-per-course 50
+"""
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+from flask import Flask
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+import json_provider
+from db import db, Course, Review, COURSE_COLUMNS, REVIEW_COLUMNS, fetch_rows
+
+WORDS = "lecture prelim project workload professor curve office hours fun hard easy recommend".split()
+
+
+def make_app() -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    return app
+
+
+def seed(n_courses: int, reviews_per_course: int):
+    rng = random.Random(0)
+    db.session.execute(Course.__table__.insert(), [
+        {"id": i, "title": f"Course {i}", "code": f"CS {1000 + i}", "professor": "Jane Doe (jd1)",
+         "term": "SP26", "credit": 4, "ai_review": ""}
+        for i in range(1, n_courses + 1)
+    ])
+    db.session.execute(Review.__table__.insert(), [
+        {"source": "CUReviews", "course_id": c, "external_id": f"{c}-{j}",
+         "content": " ".join(rng.choices(WORDS, k=40))}
+        for c in range(1, n_courses + 1) for j in range(reviews_per_course)
+    ])
+    db.session.commit()
+
+
+def measure(fn, repeat: int) -> tuple[float, float]:
+    """Returns (best wall time in ms, peak traced allocation in MB)."""
+    best = float("inf")
+    for _ in range(repeat):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    db.session.expunge_all()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best * 1000, peak / 1e6
+
+
+# ---------------------------------------------------------
+# Cases
+# ---------------------------------------------------------
+def reviews_orm():
+    return json.dumps({"reviews": [r.serialize() for r in Review.query.all()]})
+
+
+def reviews_projection():
+    return json_provider.dumps_bytes({"reviews": fetch_rows(select(*REVIEW_COLUMNS))})
+
+
+def courses_with_reviews_orm():
+    courses = Course.query.options(selectinload(Course.reviews)).all()
+    return json.dumps({"courses": [c.serialize() for c in courses]})
+
+
+def courses_with_reviews_projection():
+    courses = fetch_rows(select(*COURSE_COLUMNS))
+    by_course = {c["id"]: c for c in courses}
+    for c in courses:
+        c["reviews"] = []
+    for r in fetch_rows(select(*REVIEW_COLUMNS)):
+        by_course[r["course"]]["reviews"].append(r)
+    return json_provider.dumps_bytes({"courses": courses})
+
+
+CASES = [
+    ("all reviews", reviews_orm, reviews_projection),
+    ("courses + reviews", courses_with_reviews_orm, courses_with_reviews_projection),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--courses", type=int, default=2000)
+    parser.add_argument("--reviews-per-course", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        seed(args.courses, args.reviews_per_course)
+
+        encoder = "orjson" if json_provider.orjson is not None else "stdlib json"
+        print(f"{args.courses} courses, {args.courses * args.reviews_per_course} reviews, encoder: {encoder}\n")
+        print(f"{'case':<20}{'orm ms':>10}{'proj ms':>10}{'speedup':>9}{'orm MB':>10}{'proj MB':>10}")
+
+        for name, orm, projection in CASES:
+            orm_ms, orm_mb = measure(orm, args.repeat)
+            proj_ms, proj_mb = measure(projection, args.repeat)
+            print(f"{name:<20}{orm_ms:>10.1f}{proj_ms:>10.1f}{orm_ms / proj_ms:>8.1f}x{orm_mb:>10.1f}{proj_mb:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+cold_start.py
+Measures how long a fresh worker process takes to come up: Python start,
+module imports, create_app() and its first request, over --runs separate
+processes against an existing, migrated database.
+
+Reports the median and worst of each phase, plus the app's own breakdown
+(app.config["STARTUP_TIMINGS"]: imports, app, schema). Exits 1 if the
+median create_app() total is over the budget (--budget-ms, default the
+app's STARTUP_BUDGET_MS). From backend/:
+
+    python -m benchmarks.cold_start --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.synthetic import BACKEND_DIR
+
+# Runs in the child process; prints one JSON line
+CHILD = """
+import json, time
+start = time.perf_counter()
+from app import create_app
+app = create_app()
+ready = time.perf_counter()
+status = app.test_client().get("/api/courses?limit=1").status_code
+done = time.perf_counter()
+print(json.dumps({"timings": app.config["STARTUP_TIMINGS"], "budget": app.config["STARTUP_BUDGET_MS"],
+                  "create_app": (ready - start) * 1000, "first_request": (done - ready) * 1000, "status": status}))
+"""
+
+
+def run_once(env: dict) -> dict:
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", CHILD], cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    wall = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "child failed")
+
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["process"] = wall
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="database file (default: the app's)")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, help="override STARTUP_BUDGET_MS")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.db:
+        env["COURSEREVIEW_DATABASE_URI"] = "sqlite:///" + os.path.abspath(args.db)
+    env["COURSEREVIEW_AUTO_MIGRATE"] = "1"
+
+    run_once(env)  # migrates if needed, and warms the OS file cache
+    results = [run_once(env) for _ in range(args.runs)]
+
+    phases = {name: [r["timings"][name] for r in results] for name in results[0]["timings"]}
+    phases["first request"] = [r["first_request"] for r in results]
+    phases["process (wall)"] = [r["process"] for r in results]
+
+    print(f"{args.runs} cold starts\n")
+    print(f"{'phase':<18}{'median ms':>12}{'max ms':>10}")
+    for name, values in phases.items():
+        print(f"{name:<18}{statistics.median(values):>12.1f}{max(values):>10.1f}")
+
+    budget = args.budget_ms or results[0]["budget"]
+    median = statistics.median(phases["total"])
+    if median > budget:
+        print(f"\n[WARN] Median startup {median:.0f}ms is over the {budget:.0f}ms budget")
+        sys.exit(1)
+    print(f"\n[OK] Median startup {median:.0f}ms is within the {budget:.0f}ms budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+load_test.py
+Endpoint latency / throughput benchmark against a database seeded by
+synthetic.py (instance/bench.db by default).
+
+Each endpoint is hit --requests times after --warmup untimed requests,
+through one of two drivers:
+
+    test -- the Flask test client, in-process and sequential
+    wsgi -- a real threaded WSGI server on localhost, driven over HTTP by
+            --concurrency client threads
+
+and reports p50/p95/p99 latency, throughput and the process's peak RSS
+after each endpoint (the server runs in-process, so it's included). The
+response cache is off unless --cache is passed, so the numbers are for the
+endpoints themselves. The catalog snapshot (catalog.py) is built before
+timing starts; --no-snapshot serves everything from SQL instead.
+
+--save writes the results to a JSON baseline; --compare reads one back,
+prints the change per endpoint and exits 1 if any p95 regressed by more
+than --threshold. From backend/:
+
+    python -m benchmarks.synthetic --courses 10000 --reviews 1000000
+    python -m benchmarks.load_test --driver wsgi --save benchmarks/baselines/main.json
+    python -m benchmarks.load_test --driver wsgi --compare benchmarks/baselines/main.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.synthetic import DEFAULT_DB, load_app
+
+SEARCH_TERMS = ["lecture", "prelim project", "curve", "office hours", "textbook"]
+
+
+class NullCache:
+    """Cache backend that never hits (see cache.set_backend)."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def clear(self):
+        pass
+
+
+# ---------------------------------------------------------
+# Endpoints
+# ---------------------------------------------------------
+def endpoints(n_courses: int, n_users: int) -> list[tuple]:
+    """
+    (name, function of (request index, rng) -> list of (method, path, json body)).
+    An endpoint may issue several requests per iteration; they're timed together.
+    """
+    def course(rng):
+        return rng.randint(1, n_courses)
+
+    def user(rng):
+        return rng.randint(1, n_users)
+
+    def toggle_saved(i, rng):
+        # Upper half of the ids: never saved by synthetic.py, so no conflicts
+        course_id = n_courses // 2 + 1 + i % max(n_courses - n_courses // 2, 1)
+        user_id = 1 + i % n_users
+        body = {"course_id": course_id}
+        return [("POST", f"/api/{user_id}/saved", body), ("DELETE", f"/api/{user_id}/saved", body)]
+
+    def bulk_saved(i, rng):
+        upper = range(n_courses // 2 + 1, n_courses + 1)
+        ids = rng.sample(upper, k=min(20, len(upper)))
+        user_id = 1 + i % n_users
+        return [("PATCH", f"/api/{user_id}/saved", {"add": ids}),
+                ("PATCH", f"/api/{user_id}/saved", {"remove": ids})]
+
+    return [
+        ("courses page", lambda i, rng: [("GET", f"/api/courses?limit=100&after={course(rng)}", None)]),
+        ("courses by rating", lambda i, rng: [("GET", "/api/courses?limit=100&sort=rating", None)]),
+        ("course detail", lambda i, rng: [("GET", f"/api/course/{course(rng)}", None)]),
+        ("course stats", lambda i, rng: [("GET", f"/api/course/{course(rng)}/stats", None)]),
+        ("course reviews", lambda i, rng: [("GET", f"/api/reviews/{course(rng)}", None)]),
+        ("search", lambda i, rng: [("GET", f"/api/search?q={rng.choice(SEARCH_TERMS)}", None)]),
+        ("similar courses", lambda i, rng: [("GET", f"/api/course/{course(rng)}/similar", None)]),
+        ("recommendations", lambda i, rng: [("GET", f"/api/users/{user(rng)}/recommendations", None)]),
+        ("user", lambda i, rng: [("GET", f"/api/users/{user(rng)}", None)]),
+        ("saved courses", lambda i, rng: [("GET", f"/api/saved/{user(rng)}", None)]),
+        ("save + unsave", toggle_saved),
+        ("bulk save 20", bulk_saved),
+    ]
+
+
+# ---------------------------------------------------------
+# Drivers
+# ---------------------------------------------------------
+class TestClientDriver:
+    concurrency = 1
+
+    def __init__(self, app, concurrency):
+        self.client = app.test_client()
+
+    def send(self, method, path, body) -> int:
+        return self.client.open(path, method=method, json=body).status_code
+
+    def close(self):
+        pass
+
+
+class WSGIDriver:
+    def __init__(self, app, concurrency):
+        import requests
+        from werkzeug.serving import WSGIRequestHandler, make_server
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_request(self, *args, **kwargs):
+                pass
+
+        self.concurrency = concurrency
+        self.server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+        self.base = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self._requests = requests
+        self._local = threading.local()
+
+    def send(self, method, path, body) -> int:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = self._requests.Session()
+        return session.request(method, self.base + path, json=body).status_code
+
+    def close(self):
+        self.server.shutdown()
+
+
+DRIVERS = {"test": TestClientDriver, "wsgi": WSGIDriver}
+
+
+# ---------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def percentiles(latencies: list[float]) -> dict:
+    if len(latencies) < 2:
+        value = latencies[0] if latencies else 0.0
+        return {"p50": value, "p95": value, "p99": value}
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+
+def run_endpoint(driver, make_requests, n: int, warmup: int, seed: int) -> dict:
+    def iteration(i):
+        rng = random.Random(seed * 1_000_003 + i)
+        start = time.perf_counter()
+        errors = sum(1 for req in make_requests(i, rng) if driver.send(*req) >= 400)
+        return (time.perf_counter() - start) * 1000, errors
+
+    with ThreadPoolExecutor(max_workers=driver.concurrency) as pool:
+        list(pool.map(iteration, range(n, n + warmup)))
+
+        start = time.perf_counter()
+        results = list(pool.map(iteration, range(n)))
+        elapsed = time.perf_counter() - start
+
+    latencies = [ms for ms, _ in results]
+    return {
+        **{k: round(v, 3) for k, v in percentiles(latencies).items()},
+        "rps": round(n / elapsed, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "errors": sum(e for _, e in results),
+    }
+
+
+def compare(results: dict, meta: dict, baseline: dict, threshold: float) -> bool:
+    """Prints the change against baseline; returns True if any p95 regressed past threshold."""
+    regressed = False
+    for key in ("driver", "concurrency", "cache", "snapshot", "courses"):
+        if baseline["meta"].get(key) != meta.get(key):
+            print(f"[WARN] Baseline has {key}={baseline['meta'].get(key)}, this run {meta.get(key)}")
+    print(f"\nvs baseline ({baseline['meta'].get('driver')} driver, {baseline['meta'].get('saved_at')}):")
+    print(f"{'endpoint':<20}{'p50':>10}{'p95':>10}{'rps':>10}")
+
+    for name, now in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<20}{'(new)':>10}")
+            continue
+
+        def change(key):
+            return (now[key] - before[key]) / before[key] if before[key] else 0.0
+
+        flag = ""
+        if change("p95") > threshold:
+            flag = "  REGRESSION"
+            regressed = True
+        print(f"{name:<20}{change('p50'):>+10.1%}{change('p95'):>+10.1%}{change('rps'):>+10.1%}{flag}")
+
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DEFAULT_DB)
+    parser.add_argument("--driver", choices=sorted(DRIVERS), default="test")
+    parser.add_argument("--concurrency", type=int, default=8, help="client threads (wsgi driver only)")
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--only", action="append", help="endpoint name to run (repeatable)")
+    parser.add_argument("--cache", action="store_true", help="keep the response cache on")
+    parser.add_argument("--no-snapshot", action="store_true", help="turn the catalog snapshot off")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", metavar="PATH", help="write results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed p95 slowdown (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"[ERROR] {args.db} not found; seed it first with python -m benchmarks.synthetic")
+        sys.exit(2)
+
+    app = load_app(args.db)
+    import cache
+    import catalog
+    from db import db, Course, User
+
+    if not args.cache:
+        cache.set_backend(NullCache())
+    app.config["CATALOG_SNAPSHOT"] = not args.no_snapshot
+    with app.app_context():
+        if app.config["CATALOG_SNAPSHOT"]:
+            catalog.refresh()
+        n_courses = db.session.query(db.func.max(Course.id)).scalar() or 1
+        n_users = db.session.query(db.func.max(User.id)).scalar() or 1
+
+    driver = DRIVERS[args.driver](app, args.concurrency)
+    results = {}
+    print(f"{n_courses} courses, {n_users} users, {args.driver} driver, concurrency {driver.concurrency}\n")
+    print(f"{'endpoint':<20}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'RSS MB':>10}{'errors':>8}")
+
+    try:
+        for name, make_requests in endpoints(n_courses, n_users):
+            if args.only and name not in args.only:
+                continue
+            r = run_endpoint(driver, make_requests, args.requests, args.warmup, args.seed)
+            results[name] = r
+            print(f"{name:<20}{r['p50']:>10.2f}{r['p95']:>10.2f}{r['p99']:>10.2f}"
+                  f"{r['rps']:>10.1f}{r['peak_rss_mb']:>10.1f}{r['errors']:>8}")
+    finally:
+        driver.close()
+
+    meta = {
+        "driver": args.driver,
+        "concurrency": driver.concurrency,
+        "requests": args.requests,
+        "cache": args.cache,
+        "snapshot": not args.no_snapshot,
+        "courses": n_courses,
+        "users": n_users,
+        "python": platform.python_version(),
+        "saved_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+        print(f"\n[OK] Baseline saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, meta, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
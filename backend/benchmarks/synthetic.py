@@ -0,0 +1,182 @@
+"""
+synthetic.py
+Seeds a SQLite database with a synthetic catalog for the load tests
+(load_test.py): courses with professors, reviews with metrics,
+course_stats, users and saved courses. The search index is filled by its
+triggers as rows go in; the similarity index is built at the end, next to
+the database (<db>.similarity/).
+
+Writes to instance/bench.db by default, never to instance/coursereview.db
+unless asked to with --db. The database is recreated from scratch on
+every run. From backend/:
+
+    python -m benchmarks.synthetic --courses 10000 --reviews 1000000 --users 1000
+"""
+
+import argparse
+import os
+import random
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DB = os.path.join(BACKEND_DIR, "instance", "bench.db")
+
+SUBJECTS = "AEM ASTRO BIOEE CHEM CS ECE ECON ENGL GOVT HIST INFO MATH ORIE PHIL PHYS PSYCH".split()
+TERMS = ["FA24", "SP25", "FA25", "SP26"]
+GRADES = ["A+", "A", "A-", "B+", "B", "B-", "C+", "C", None]
+WORDS = ("lecture prelim project workload professor curve office hours fun hard easy recommend "
+         "problem sets final exam grading clear slides textbook discussion lab partner").split()
+FIRST_NAMES = "Alex Jamie Sam Taylor Jordan Morgan Casey Riley Avery Quinn".split()
+LAST_NAMES = "Smith Chen Patel Garcia Kim Nguyen Cohen Rossi Mueller Okafor".split()
+
+CHUNK_ROWS = 10000
+
+
+def load_app(db_path: str = DEFAULT_DB):
+    """Builds the app pointed at db_path (creating and migrating its schema)."""
+    from app import create_app
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + os.path.abspath(db_path),
+        "SIMILARITY_DIR": os.path.abspath(db_path) + ".similarity",
+    })
+
+
+def _insert(table, rows):
+    """Inserts a row generator CHUNK_ROWS at a time. Returns the row count."""
+    from db import db
+
+    count = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_ROWS:
+            db.session.execute(table.insert(), chunk)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        db.session.execute(table.insert(), chunk)
+        count += len(chunk)
+    return count
+
+
+# ---------------------------------------------------------
+# Row generators
+# ---------------------------------------------------------
+def professor_rows(n: int):
+    for i in range(1, n + 1):
+        first, last = FIRST_NAMES[i % len(FIRST_NAMES)], LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]
+        yield {"id": i, "netid": f"{first[0].lower()}{last[0].lower()}{i}", "name": f"{first} {last}"}
+
+
+def course_rows(n: int, professors: list[dict], rng: random.Random):
+    for i in range(1, n + 1):
+        subject = SUBJECTS[i % len(SUBJECTS)]
+        instrs = rng.sample(professors, k=rng.choice((1, 1, 1, 2)))
+        yield {
+            "id": i,
+            "title": " ".join(rng.choices(WORDS, k=3)).title(),
+            "code": f"{subject} {1000 + i // len(SUBJECTS)}",
+            "professor": ", ".join(f"{p['name']} ({p['netid']})" for p in instrs),
+            "term": TERMS[i % len(TERMS)],
+            "credit": rng.choice((1, 2, 3, 4)),
+            "ai_review": "",
+            "description": " ".join(rng.choices(WORDS, k=25)).capitalize() + ".",
+            "_professor_ids": [p["id"] for p in instrs],
+        }
+
+
+def review_rows(n: int, n_courses: int, rng: random.Random):
+    for i in range(1, n + 1):
+        source = "CUReviews" if i % 4 else "RMP"
+        yield {
+            "id": i,
+            "source": source,
+            "course_id": rng.randint(1, n_courses),
+            "external_id": f"syn-{i}",
+            "content": " ".join(rng.choices(WORDS, k=rng.randint(10, 80))),
+            "rating": rng.randint(1, 5),
+            "difficulty": rng.randint(1, 5),
+            "workload": rng.randint(1, 5) if source == "CUReviews" else None,
+            "grade": rng.choice(GRADES) if source == "CUReviews" else None,
+            "likes": rng.randint(0, 20),
+            "date": f"20{rng.randint(18, 26)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T12:00:00",
+        }
+
+
+# ---------------------------------------------------------
+# Generator
+# ---------------------------------------------------------
+def generate(courses: int, reviews: int, users: int, saved_per_user: int, seed: int = 0) -> dict:
+    """
+    Fills the (empty) database of the current app context. Users save
+    courses from the lower half of the id range only, so load tests can
+    save and unsave courses from the upper half without conflicts.
+    """
+    from db import db, Course, Professor, Review, User, association_table, course_professor
+    from scripts.course_stats import refresh_course_stats
+
+    rng = random.Random(seed)
+    counts = {}
+
+    professors = list(professor_rows(max(courses // 3, 1)))
+    counts["professors"] = _insert(Professor.__table__, iter(professors))
+
+    links = []
+
+    def courses_with_links():
+        for row in course_rows(courses, professors, rng):
+            links.extend({"course_id": row["id"], "professor_id": p} for p in row.pop("_professor_ids"))
+            yield row
+
+    counts["courses"] = _insert(Course.__table__, courses_with_links())
+    _insert(course_professor, iter(links))
+
+    counts["reviews"] = _insert(Review.__table__, review_rows(reviews, courses, rng))
+    refresh_course_stats(range(1, courses + 1))
+
+    counts["users"] = _insert(User.__table__, (
+        {"id": i, "name": f"Bench User {i}", "netid": f"bench{i}"} for i in range(1, users + 1)
+    ))
+    half = max(courses // 2, 1)
+    counts["saved"] = _insert(association_table, (
+        {"user_id": u, "course_id": c}
+        for u in range(1, users + 1)
+        for c in rng.sample(range(1, half + 1), k=min(saved_per_user, half))
+    ))
+
+    db.session.commit()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DEFAULT_DB)
+    parser.add_argument("--courses", type=int, default=10000)
+    parser.add_argument("--reviews", type=int, default=200000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--saved-per-user", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+
+    app = load_app(args.db)
+    start = time.perf_counter()
+    with app.app_context():
+        from db import db
+        from scripts.load_snapshot import _set_bulk_pragmas
+
+        _set_bulk_pragmas(db.session.connection())
+        counts = generate(args.courses, args.reviews, args.users, args.saved_per_user, args.seed)
+
+        import similarity
+        similarity.build_index(full=True)
+
+    summary = ", ".join(f"{n} {name}" for name, n in counts.items())
+    print(f"[SUCCESS] Seeded {args.db} in {time.perf_counter() - start:.1f}s: {summary}")
+
+
+if __name__ == "__main__":
+    main()
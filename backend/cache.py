@@ -0,0 +1,177 @@
+"""
+cache.py
+Response cache for the read endpoints.
+
+Cached responses are keyed by route, query params, Accept header and the
+current version of every data slice the route depends on (see db.DataVersion). Writers call
+bump_version(), which changes the key, so a stale entry can never be served
+again; old entries simply age out of the backend.
+
+Every cached response carries a strong ETag (hash of the body) and a
+Last-Modified taken from its data versions, so clients that send
+If-None-Match / If-Modified-Since get a 304 with no body.
+
+The backend is pluggable: anything with get(key), set(key, value) and
+clear() works. The default is an in-process LRU with a TTL.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import Response, make_response, request
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from db import db, DataVersion
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_TTL = 3600  # seconds
+
+
+# ---------------------------------------------------------
+# Backends
+# ---------------------------------------------------------
+class LRUCache:
+    """Thread-safe in-process LRU cache whose entries expire after ttl seconds."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if item[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return item[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_backend = LRUCache()
+
+
+def set_backend(backend):
+    global _backend
+    _backend = backend
+
+
+# ---------------------------------------------------------
+# Data versions
+# ---------------------------------------------------------
+def bump_version(*names: str):
+    """
+    Marks the named data slices as changed. Runs in the caller's session;
+    the bump takes effect when the caller commits.
+    """
+    now = datetime.utcnow()
+    stmt = sqlite_insert(DataVersion.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["name"],
+        set_={"version": DataVersion.__table__.c.version + 1, "updated_at": now},
+    )
+    db.session.execute(stmt, [{"name": n, "version": 1, "updated_at": now} for n in names])
+
+
+def current_versions(names: list[str]) -> tuple[str, datetime | None]:
+    """Returns a version tag for names and when any of them last changed."""
+    rows = db.session.query(DataVersion.name, DataVersion.version, DataVersion.updated_at) \
+        .filter(DataVersion.name.in_(names)).all()
+    found = {name: (version, updated_at) for name, version, updated_at in rows}
+
+    tag = ",".join(f"{n}={found.get(n, (0, None))[0]}" for n in names)
+    updated = [u for _, u in found.values() if u is not None]
+    return tag, max(updated) if updated else None
+
+
+# ---------------------------------------------------------
+# View decorator
+# ---------------------------------------------------------
+def _conditional_stream(response, key, last_modified):
+    """
+    Streamed bodies are never buffered into the cache. Their ETag is
+    derived from the cache key instead (same key -> same data version ->
+    same bytes), so revalidation still gets a 304 without running the query.
+    """
+    response.set_etag(hashlib.sha1(key.encode("utf-8")).hexdigest())
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+class CachedResponse:
+    __slots__ = ("body", "status", "mimetype", "etag", "last_modified")
+
+    def __init__(self, body, status, mimetype, etag, last_modified):
+        self.body = body
+        self.status = status
+        self.mimetype = mimetype
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+def cached(versions):
+    """
+    Caches a view's 200 responses. Streamed responses are passed through
+    with conditional headers but not stored.
+
+    versions: list of DataVersion names the response depends on, or a
+    function taking the view's kwargs and returning that list.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            names = versions(**kwargs) if callable(versions) else versions
+            tag, last_modified = current_versions(names)
+            args = urlencode(sorted(request.args.items(multi=True)))
+            accept = request.headers.get("Accept", "")
+            key = f"{request.path}?{args}#{tag}#{accept}"
+
+            entry = _backend.get(key)
+            if entry is None:
+                response = make_response(view(**kwargs))
+                if response.status_code != 200:
+                    return response
+                if response.is_streamed:
+                    return _conditional_stream(response, key, last_modified)
+
+                body = response.get_data()
+                entry = CachedResponse(
+                    body,
+                    response.status_code,
+                    response.mimetype,
+                    hashlib.sha1(body).hexdigest(),
+                    last_modified,
+                )
+                _backend.set(key, entry)
+
+            response = Response(entry.body, status=entry.status, mimetype=entry.mimetype)
+            response.set_etag(entry.etag)
+            if entry.last_modified is not None:
+                response.last_modified = entry.last_modified
+            # Clients may keep the body but must revalidate before using it
+            response.cache_control.no_cache = True
+            return response.make_conditional(request)
+
+        return wrapper
+    return decorator
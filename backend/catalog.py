@@ -0,0 +1,267 @@
+"""
+catalog.py
+Immutable in-memory snapshot of the catalog for the read-mostly list
+endpoints (/api/courses, /api/course/<id>, /api/reviews/<id>).
+
+A CatalogSnapshot holds, for every course in id order:
+- the course id (one NumPy array; lookups are binary searches)
+- its minimal and full rows as pre-encoded JSON fragments, each an object
+  without its closing brace so fields can be appended
+- the range of its reviews in one contiguous buffer of pre-encoded,
+  comma-separated review objects
+plus, per sort key, the course positions ordered by (metric, id). A page
+is then a few array lookups and one bytes join: no session, no ORM
+objects, no dicts and no encoding per request.
+
+Snapshots are never modified. A rebuild reads the catalog into a new one
+and replaces the module reference in one assignment, so a request sees
+either the old snapshot or the new one, never a half-built one. Each
+snapshot records the "catalog" data version it was built from. get()
+only returns a snapshot whose version is still current. Otherwise it
+starts a rebuild in the background and returns None, and the caller falls
+back to SQL. The pipeline rebuilds right after ingestion. Other worker
+processes notice the version change on their next request.
+
+Off with CATALOG_SNAPSHOT = False (COURSEREVIEW_CATALOG_SNAPSHOT=0). The
+review buffer is about the size of all review text, per worker process.
+"""
+
+import threading
+import time
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import select
+
+from db import db, Course, CourseStats, DataVersion, Review, COURSE_COLUMNS, COURSE_MINIMAL_COLUMNS, REVIEW_COLUMNS, SORT_KEYS
+from json_provider import dumps_bytes
+
+YIELD_PER = 5000
+
+_snapshots = {}  # database URI -> CatalogSnapshot
+_swap_lock = threading.Lock()
+_rebuilding = set()  # database URIs with a background rebuild running
+
+
+class Fragments:
+    """Byte strings packed into one buffer; fragment i is buffer[offsets[i]:offsets[i + 1]]."""
+
+    __slots__ = ("buffer", "offsets")
+
+    def __init__(self, parts: list[bytes]):
+        self.buffer = b"".join(parts)
+        self.offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+        np.cumsum([len(p) for p in parts], out=self.offsets[1:])
+
+    def __getitem__(self, i: int) -> memoryview:
+        return memoryview(self.buffer)[self.offsets[i]:self.offsets[i + 1]]
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.buffer) + self.offsets.nbytes
+
+
+class CatalogSnapshot:
+    __slots__ = ("version", "ids", "minimal", "full", "reviews", "sorts", "built_at")
+
+    def __init__(self, version, ids, minimal, full, reviews, sorts):
+        self.version = version
+        self.ids = ids  # int64, ascending
+        self.minimal = minimal  # Fragments, one per course
+        self.full = full  # Fragments, one per course
+        self.reviews = reviews  # Fragments, one comma-joined run of reviews per course
+        self.sorts = sorts  # sort name -> (positions ordered by (value, id), values in that order)
+        self.built_at = time.time()
+
+    def position(self, course_id: int) -> int | None:
+        i = int(np.searchsorted(self.ids, course_id))
+        return i if i < len(self.ids) and self.ids[i] == course_id else None
+
+    @property
+    def nbytes(self) -> int:
+        sorts = sum(p.nbytes + v.nbytes for p, v in self.sorts.values())
+        return self.ids.nbytes + self.minimal.nbytes + self.full.nbytes + self.reviews.nbytes + sorts
+
+    # -----------------------------------------------------
+    # Responses
+    # -----------------------------------------------------
+    def course_reviews(self, course_id: int) -> bytes:
+        """Body of /api/reviews/<course_id>."""
+        i = self.position(course_id)
+        run = self.reviews[i] if i is not None else b""
+        return b"".join((b'{"reviews":[', run, b"]}"))
+
+    def course_detail(self, course_id: int) -> bytes | None:
+        """Body of /api/course/<course_id> (Course.serialize()), or None if there's no such course."""
+        i = self.position(course_id)
+        if i is None:
+            return None
+        return b"".join((self.full[i], b',"reviews":[', self.reviews[i], b"]}"))
+
+    def _page_positions(self, sort: str | None, after: str | None, limit: int):
+        """Positions of up to limit + 1 courses after the cursor, plus their sort values."""
+        if not sort:
+            start = int(np.searchsorted(self.ids, int(after or 0), side="right"))
+            return np.arange(start, min(start + limit + 1, len(self.ids))), None
+
+        descending = sort.startswith("-")
+        positions, values = self.sorts[sort.lstrip("-")]
+        if after:
+            value, _, after_id = after.rpartition(":")
+            value, after_id = float(value), int(after_id)
+            # Number of entries before / up to the cursor in (value, id) order
+            lo = int(np.searchsorted(values, value, side="left"))
+            hi = int(np.searchsorted(values, value, side="right"))
+            tied = self.ids[positions[lo:hi]]
+            below = lo + int(np.searchsorted(tied, after_id, side="left"))
+            through = lo + int(np.searchsorted(tied, after_id, side="right"))
+        else:
+            below = through = len(positions) if descending else 0
+
+        if descending:
+            start = max(below - limit - 1, 0)
+            return positions[start:below][::-1], values[start:below][::-1]
+        return positions[through:through + limit + 1], values[through:through + limit + 1]
+
+    def course_page(self, fields: str, with_reviews: bool, sort: str | None, after: str | None, limit: int) -> bytes:
+        """
+        Body of /api/courses for one page, identical to the SQL path.
+        Raises ValueError for a cursor that doesn't parse.
+        """
+        positions, values = self._page_positions(sort, after, limit)
+        has_more = len(positions) > limit
+        positions = positions[:limit]
+
+        rows = self.full if fields == "full" or with_reviews else self.minimal
+        label = SORT_KEYS[sort.lstrip("-")][1] if sort else None
+        parts = []
+        for n, i in enumerate(positions.tolist()):
+            if n:
+                parts.append(b",")
+            parts.append(rows[i])
+            if label:
+                parts.append(b',"%s":' % label.encode() + dumps_bytes(values[n].item()))
+            if with_reviews:
+                parts += (b',"reviews":[', self.reviews[i], b"]")
+            parts.append(b"}")
+
+        cursor = None
+        if has_more:
+            last = positions[-1]
+            cursor = f"{values[len(positions) - 1].item()}:{self.ids[last]}" if label else int(self.ids[last])
+        return b"".join((b'{"courses":[', *parts, b'],"next_cursor":', dumps_bytes(cursor), b"}"))
+
+
+# ---------------------------------------------------------
+# Building
+# ---------------------------------------------------------
+def catalog_version() -> int:
+    return db.session.execute(
+        select(DataVersion.version).where(DataVersion.name == "catalog")
+    ).scalar() or 0
+
+
+def _open_fragment(row) -> bytes:
+    return dumps_bytes(dict(row._mapping))[:-1]
+
+
+def build() -> CatalogSnapshot:
+    """Reads the whole catalog into a new snapshot."""
+    version = catalog_version()
+
+    courses = db.session.execute(select(*COURSE_COLUMNS).order_by(Course.id)).all()
+    ids = np.array([c.id for c in courses], dtype=np.int64)
+    minimal_keys = [c.key for c in COURSE_MINIMAL_COLUMNS]
+    minimal = Fragments([dumps_bytes({k: c._mapping[k] for k in minimal_keys})[:-1] for c in courses])
+    full = Fragments([_open_fragment(c) for c in courses])
+    del courses
+
+    # Reviews arrive grouped by course, in course id order, like ids
+    runs = [b""] * len(ids)
+    stmt = select(*REVIEW_COLUMNS).order_by(Review.course_id, Review.id).execution_options(yield_per=YIELD_PER)
+    current, run, i = None, [], 0
+    for row in db.session.execute(stmt):
+        if row.course != current:
+            if run:
+                runs[i] = b",".join(run)
+            current, run = row.course, []
+            i = int(np.searchsorted(ids, current))
+            if i >= len(ids) or ids[i] != current:
+                current = None  # review of a course that's gone; skipped
+                continue
+        if current is not None:
+            run.append(dumps_bytes(dict(row._mapping)))
+    if run:
+        runs[i] = b",".join(run)
+    reviews = Fragments(runs)
+    del runs
+
+    sorts = {}
+    for name, (column, _) in SORT_KEYS.items():
+        rows = db.session.execute(
+            select(CourseStats.course_id, column)
+            .where(CourseStats.source == "all", column.isnot(None))
+            .order_by(column, CourseStats.course_id)
+        ).all()
+        course_ids = np.array([r[0] for r in rows], dtype=np.int64)
+        values = np.array([r[1] for r in rows], dtype=np.int64 if name == "reviews" else np.float64)
+        positions = np.searchsorted(ids, course_ids)
+        known = positions < len(ids)
+        known[known] = ids[positions[known]] == course_ids[known]
+        sorts[name] = (positions[known], values[known])
+
+    # Data committed mid-build may be partly in this snapshot; tag it with
+    # the starting version so it's rebuilt instead of served
+    if catalog_version() != version:
+        version = -1
+    return CatalogSnapshot(version, ids, minimal, full, reviews, sorts)
+
+
+def refresh() -> dict:
+    """Builds a snapshot of the current catalog and swaps it in. Returns counts."""
+    start = time.perf_counter()
+    snapshot = build()
+    key = current_app.config["SQLALCHEMY_DATABASE_URI"]
+    with _swap_lock:
+        old = _snapshots.get(key)
+        if old is None or snapshot.version == -1 or old.version <= snapshot.version:
+            _snapshots[key] = snapshot
+    print(f"[OK] Catalog snapshot v{snapshot.version}: {len(snapshot.ids)} courses, "
+          f"{snapshot.nbytes / 1e6:.1f} MB, {time.perf_counter() - start:.2f}s")
+    return {"courses": len(snapshot.ids), "bytes": snapshot.nbytes}
+
+
+def _rebuild_in_background(app, key: str):
+    with _swap_lock:
+        if key in _rebuilding:
+            return
+        _rebuilding.add(key)
+
+    def run():
+        try:
+            with app.app_context():
+                refresh()
+        except Exception as err:
+            print(f"[ERROR] Catalog snapshot rebuild failed: {err}")
+        finally:
+            with _swap_lock:
+                _rebuilding.discard(key)
+
+    threading.Thread(target=run, name="catalog-snapshot", daemon=True).start()
+
+
+def get() -> CatalogSnapshot | None:
+    """
+    The snapshot if it matches the current catalog version. Otherwise None,
+    and a rebuild starts in the background; the caller uses SQL meanwhile.
+    """
+    if not current_app.config["CATALOG_SNAPSHOT"]:
+        return None
+
+    key = current_app.config["SQLALCHEMY_DATABASE_URI"]
+    snapshot = _snapshots.get(key)
+    if snapshot is not None and snapshot.version == catalog_version():
+        return snapshot
+
+    _rebuild_in_background(current_app._get_current_object(), key)
+    return None
@@ -1,12 +1,57 @@
+import json
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.pool import QueuePool
 
 db = SQLAlchemy()
 
+# Applied to every new SQLite connection (see set_sqlite_pragmas)
+SQLITE_PRAGMAS = (
+    ("journal_mode", "WAL"), # Readers don't wait for the writer (e.g. the pipeline) and vice versa
+    ("synchronous", "NORMAL"), # Durable with WAL, with far fewer fsyncs than FULL
+    ("busy_timeout", 5000), # ms to wait for a write lock instead of failing with "database is locked"
+    ("mmap_size", 256 * 1024 * 1024), # Read pages through the OS page cache
+    ("cache_size", -64000), # Page cache per connection, in KiB
+    ("temp_store", "MEMORY"),
+)
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """SQLAlchemy "connect" listener applying SQLITE_PRAGMAS."""
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS:
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+def engine_options(uri: str, pool_size: int, max_overflow: int) -> dict:
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for uri. File databases get a sized QueuePool
+    (SQLAlchemy 1.4 would otherwise open a new connection per checkout)
+    shared across threads; in-memory databases keep the defaults.
+    """
+    if not uri.startswith("sqlite:///") or uri.endswith(":memory:"):
+        return {}
+    return {
+        "poolclass": QueuePool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "connect_args": {"check_same_thread": False, "timeout": 30},
+    }
+
 association_table = db.Table(
     "association_table",
     db.Model.metadata,
     db.Column("course_id", db.Integer, db.ForeignKey("course.id"), primary_key=True),
-    db.Column("user_id", db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    db.Column("user_id", db.Integer, db.ForeignKey("user.id"), primary_key=True),
+    db.Column("updated_version", db.Integer, nullable=True), # Sync version of the save (see sync.py)
+    db.Index("ix_association_table_user_id", "user_id"), # Saved-course lookups by user
+    db.Index("ix_association_table_user_version", "user_id", "updated_version") # A user's saves since a sync version
+)
+
+course_professor = db.Table(
+    "course_professor",
+    db.Model.metadata,
+    db.Column("course_id", db.Integer, db.ForeignKey("course.id"), primary_key=True),
+    db.Column("professor_id", db.Integer, db.ForeignKey("professor.id"), primary_key=True),
+    db.Index("ix_course_professor_professor_id", "professor_id") # Courses taught by a professor
 )
 
 class Course(db.Model):
@@ -14,19 +59,32 @@ class Course(db.Model):
     SQL table for Cornell courses
     """
     __tablename__ = "course"
+    __table_args__ = (
+        db.Index("uq_course_code_term", "code", "term", unique=True), # Natural key for upserts, lookups by code
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     title = db.Column(db.String, nullable=False) # Course title (e.g. "Introduction to Backend Development")
     code = db.Column(db.String, nullable=False) # Course code (e.g. "CS 1998")
-    professor = db.Column(db.String, nullable=False)
-    term = db.Column(db.String, nullable=False) # Semester offered
-    credit = db.Column(db.Integer, nullable=False)
-    ai_review = db.Column(db.String, nullable=True)
+    professor = db.Column(db.String, nullable=True) # Roster instructor list (e.g. "Jane Doe (jd123), ..."), see professors; None if not on the roster
+    term = db.Column(db.String, nullable=False) # Semester offered; "" if not on the roster (see scripts/load_snapshot.py)
+    credit = db.Column(db.Integer, nullable=True) # None if not on the roster
+    ai_review = db.Column(db.String, nullable=True) # Generated review summary, see scripts/summaries.py
+    ai_review_hash = db.Column(db.String, nullable=True) # Hash of the review set ai_review was generated from
+    description = db.Column(db.String, nullable=True) # Roster course description
+    content_hash = db.Column(db.String, nullable=True) # Hash of the scraped fields, used to skip unchanged rows
+    updated_version = db.Column(db.Integer, nullable=True, index=True) # Sync version of the last change (see sync.py)
 
-    reviews = db.relationship("Review", cascade="delete")
+    reviews = db.relationship("Review", cascade="delete", order_by="Review.id", back_populates="course")
     users = db.relationship("User", secondary=association_table, back_populates="courses")
+    professors = db.relationship("Professor", secondary=course_professor, back_populates="courses")
 
     def serialize(self):
+        data = self.serialize_no_reviews()
+        data["reviews"] = [r.serialize() for r in self.reviews]
+        return data
+
+    def serialize_no_reviews(self):
         return {
             "id": self.id,
             "title": self.title,
@@ -34,8 +92,7 @@ class Course(db.Model):
             "professor": self.professor,
             "term": self.term,
             "credit": self.credit,
-            "ai_review": self.ai_review,
-            "reviews": [r.serialize() for r in self.reviews]
+            "ai_review": self.ai_review
         }
 
     def serialize_minimal(self):
@@ -50,20 +107,39 @@ class Review(db.Model):
     SQL table for reviews of courses
     """
     __tablename__ = "review"
+    __table_args__ = (
+        db.Index("uq_review_source_external_id", "source", "external_id", unique=True), # Natural key for upserts
+        db.Index("ix_review_course_source", "course_id", "source"), # Reviews of a course, optionally by source
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     source = db.Column(db.String, nullable=False) # CU Review, Rate My Prof, etc
     content = db.Column(db.String, nullable=False) # The review itself (e.g. "Backend dev was so fun and productive!")
     course_id = db.Column(db.Integer, db.ForeignKey("course.id"), nullable=False)
+    external_id = db.Column(db.String, nullable=True) # The review's id in its source (CUReviews _id, RMP rating id)
+    content_hash = db.Column(db.String, nullable=True)
+    rating = db.Column(db.Float, nullable=True) # Overall rating, 1-5
+    difficulty = db.Column(db.Float, nullable=True) # 1-5
+    workload = db.Column(db.Float, nullable=True) # 1-5
+    grade = db.Column(db.String, nullable=True) # Grade the reviewer received (e.g. "A-")
+    likes = db.Column(db.Integer, nullable=True)
+    date = db.Column(db.String, nullable=True) # When the review was posted, ISO 8601 (e.g. "2024-05-10T18:22:10")
+    updated_version = db.Column(db.Integer, nullable=True, index=True) # Sync version of the last change (see sync.py)
 
-    course = db.relationship("Course")
+    course = db.relationship("Course", back_populates="reviews")
 
     def serialize(self):
         return {
             "id": self.id,
             "source": self.source,
             "content": self.content,
-            "course": self.course_id
+            "course": self.course_id,
+            "rating": self.rating,
+            "difficulty": self.difficulty,
+            "workload": self.workload,
+            "grade": self.grade,
+            "likes": self.likes,
+            "date": self.date
         }
 
 class User(db.Model):
@@ -74,7 +150,7 @@ class User(db.Model):
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     name = db.Column(db.String, nullable=False)
-    netid = db.Column(db.String, nullable=False)
+    netid = db.Column(db.String, nullable=False, unique=True, index=True)
 
     courses = db.relationship("Course", secondary=association_table, back_populates="users") # List of courses that the user "saved"
 
@@ -92,3 +168,123 @@ class User(db.Model):
             "name": self.name,
             "netid": self.netid
         }
+
+class Professor(db.Model):
+    """
+    SQL table of instructors, parsed out of the roster instructor lists and
+    keyed by netid. Also caches the professor's Rate My Professor id.
+    """
+    __tablename__ = "professor"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    netid = db.Column(db.String, nullable=False, unique=True, index=True)
+    name = db.Column(db.String, nullable=False)
+    rmp_id = db.Column(db.String, nullable=True) # RMP teacher id, None if unknown or not on RMP
+    rmp_checked_at = db.Column(db.DateTime, nullable=True) # Last RMP lookup; with rmp_id None, a cached miss
+    rmp_synced_through = db.Column(db.String, nullable=True) # Date of the newest RMP rating already stored
+
+    courses = db.relationship("Course", secondary=course_professor, back_populates="professors")
+
+class CourseStats(db.Model):
+    """
+    SQL table of precomputed review aggregates per course, one row per review
+    source plus an "all" row. Refreshed at ingest time for the courses whose
+    reviews changed; the indexes make sorting the catalog by a metric an index scan.
+    """
+    __tablename__ = "course_stats"
+    __table_args__ = (
+        db.Index("ix_course_stats_rating", "source", "rating_mean", "course_id"),
+        db.Index("ix_course_stats_difficulty", "source", "difficulty_mean", "course_id"),
+        db.Index("ix_course_stats_workload", "source", "workload_mean", "course_id"),
+        db.Index("ix_course_stats_review_count", "source", "review_count", "course_id"),
+    )
+
+    METRICS = ("rating", "difficulty", "workload")
+
+    course_id = db.Column(db.Integer, db.ForeignKey("course.id"), primary_key=True)
+    source = db.Column(db.String, primary_key=True) # Review source, or "all"
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_mean = db.Column(db.Float, nullable=True)
+    rating_median = db.Column(db.Float, nullable=True)
+    rating_histogram = db.Column(db.String, nullable=True) # JSON {"1": n, ..., "5": n}
+    difficulty_mean = db.Column(db.Float, nullable=True)
+    difficulty_median = db.Column(db.Float, nullable=True)
+    difficulty_histogram = db.Column(db.String, nullable=True)
+    workload_mean = db.Column(db.Float, nullable=True)
+    workload_median = db.Column(db.Float, nullable=True)
+    workload_histogram = db.Column(db.String, nullable=True)
+
+    def serialize(self):
+        data = {"review_count": self.review_count}
+        for metric in self.METRICS:
+            histogram = getattr(self, f"{metric}_histogram")
+            data[metric] = {
+                "mean": getattr(self, f"{metric}_mean"),
+                "median": getattr(self, f"{metric}_median"),
+                "histogram": json.loads(histogram) if histogram else None
+            }
+        return data
+
+# Column projections matching the serialize() shapes above, for queries that
+# build response rows straight from SQL tuples instead of ORM objects
+COURSE_MINIMAL_COLUMNS = (Course.id, Course.title, Course.code)
+COURSE_COLUMNS = (
+    Course.id, Course.title, Course.code, Course.professor,
+    Course.term, Course.credit, Course.ai_review
+)
+REVIEW_COLUMNS = (
+    Review.id, Review.source, Review.content, Review.course_id.label("course"),
+    Review.rating, Review.difficulty, Review.workload, Review.grade, Review.likes, Review.date
+)
+
+# /api/courses sort name -> (course_stats column, response field)
+SORT_KEYS = {
+    "rating": (CourseStats.rating_mean, "rating"),
+    "difficulty": (CourseStats.difficulty_mean, "difficulty"),
+    "workload": (CourseStats.workload_mean, "workload"),
+    "reviews": (CourseStats.review_count, "review_count"),
+}
+
+# Review source id -> (Review.source name, module that registers it; see
+# scripts/review_sources.py). Ids are public (/api/reviews/<course_id>/<source_id>)
+# and kept here so reading reviews doesn't import the scrapers.
+REVIEW_SOURCES = {
+    0: ("RMP", "scripts.load_rmp"),
+    1: ("CUReviews", "scripts.load_cureviews"),
+}
+
+# Ids or keys per IN (...) query when a lookup is chunked, well under
+# SQLite's bound-parameter limit
+CHUNK_SIZE = 500
+
+def fetch_rows(stmt) -> list[dict]:
+    """Runs a column-projection SELECT and returns its rows as dicts keyed by column label."""
+    result = db.session.execute(stmt)
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+class DataVersion(db.Model):
+    """
+    SQL table of change counters, one per slice of data ("catalog", "saved:<user id>").
+    Bumped on every write to that slice; cached responses are keyed on it.
+    """
+    __tablename__ = "data_version"
+
+    name = db.Column(db.String, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+class Tombstone(db.Model):
+    """
+    SQL table of deleted courses, reviews and saved courses, so delta syncs
+    (GET /api/sync) can tell clients what to drop. Written by triggers, see sync.py.
+    """
+    __tablename__ = "tombstone"
+    __table_args__ = (
+        db.Index("ix_tombstone_row", "kind", "row_id", "user_id"), # Cleared when the row comes back
+    )
+
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False) # Sync version of the deletion
+    kind = db.Column(db.String, nullable=False) # "course", "review" or "saved"
+    row_id = db.Column(db.Integer, nullable=False) # Course or review id (the course id for "saved")
+    user_id = db.Column(db.Integer, nullable=True) # Whose save it was, for "saved"
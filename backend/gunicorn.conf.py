@@ -0,0 +1,33 @@
+"""
+gunicorn.conf.py
+Production server settings, all overridable through the environment.
+
+Workers are separate processes (one per core by default, so throughput
+scales with cores), each serving requests on a few threads. SQLite in WAL
+mode lets all of them read while the pipeline writes.
+
+The app is preloaded: schema migrations run once in the master before
+forking instead of racing in every worker. Each worker then drops the
+connections it inherited and opens its own.
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+preload_app = True
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+accesslog = "-"
+
+
+def post_fork(server, worker):
+    from db import db
+    from wsgi import application
+
+    with application.app_context():
+        db.engine.dispose()
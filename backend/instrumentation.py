@@ -0,0 +1,363 @@
+"""
+instrumentation.py
+Opt-in request instrumentation. Off unless INSTRUMENTATION is set in the
+app config (or COURSEREVIEW_INSTRUMENTATION=1 in the environment).
+
+When on, every request gets:
+- its SQL query count and time, from SQLAlchemy cursor events
+- timed() sections (success_response times its JSON encoding)
+- a Server-Timing header: sql, encode, app (the rest of the view, i.e.
+  mostly ORM loading and serialize()) and total
+- a [WARN] log line when it issues more than QUERY_COUNT_WARNING queries,
+  which is what an N+1 (e.g. Course.serialize() -> self.reviews) looks like
+- latency and query count histograms per route, served in the Prometheus
+  text format at GET /metrics
+
+Each process keeps its histograms in memory and a background thread
+writes them to METRICS_DIR/<pid>.json about once a second (atomically,
+like the job files in jobs.py). /metrics merges the files of every live
+process, so under gunicorn any worker answers for all of them. Files of
+processes that have exited are deleted, so their counts reset like a
+restarted single process would.
+
+PROFILING adds a sampling profiler: "header" profiles requests sent with
+X-Profile: 1, "always" profiles every request. Each profile is written
+to PROFILE_DIR as collapsed stacks (flamegraph.pl / speedscope format),
+and the response names the file in an X-Profile header.
+
+Streamed responses are encoded after the view returns, so their queries
+and encoding only partly show up in the numbers.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+QUERY_COUNT_WARNING = 25
+PROFILE_INTERVAL = 0.005  # seconds between stack samples
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250)
+METRICS_FLUSH_INTERVAL = 1.0  # seconds between writes of this process's histograms
+
+_listening = False
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "") in ("1", "true")
+
+
+# ---------------------------------------------------------
+# Per-request metrics
+# ---------------------------------------------------------
+class RequestMetrics:
+    __slots__ = ("start", "queries", "sql_time", "timings", "profiler")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.timings = {}  # section name -> seconds
+        self.profiler = None
+
+
+def current() -> RequestMetrics | None:
+    """This request's metrics, or None when instrumentation is off or outside a request."""
+    if not has_request_context():
+        return None
+    return g.get("_metrics")
+
+
+@contextmanager
+def timed(name: str):
+    """Adds the time spent in the block to this request's name section."""
+    metrics = current()
+    if metrics is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.timings[name] = metrics.timings.get(name, 0.0) + time.perf_counter() - start
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    metrics = current()
+    if metrics is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    metrics = current()
+    starts = conn.info.get("query_start")
+    if metrics is not None and starts:
+        metrics.queries += 1
+        metrics.sql_time += time.perf_counter() - starts.pop()
+
+
+# ---------------------------------------------------------
+# Prometheus metrics
+# ---------------------------------------------------------
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values, Prometheus style."""
+
+    def __init__(self, name: str, help_text: str, buckets: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        with self._lock:
+            series = self._series.setdefault(labels, [0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {labels: list(values) for labels, values in self._series.items()}
+
+    def render(self, label_names: tuple, series: dict) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, values in sorted(series.items()):
+            base = ",".join(f'{k}="{v}"' for k, v in zip(label_names, labels))
+            for bound, count in zip(self.buckets, values):
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {values[-2]}')
+            lines.append(f"{self.name}_count{{{base}}} {values[-2]}")
+            lines.append(f"{self.name}_sum{{{base}}} {values[-1]:.6f}")
+        return lines
+
+
+LABELS = ("method", "route", "status")
+request_latency = Histogram(
+    "coursereview_request_duration_seconds", "Request latency by route.", LATENCY_BUCKETS
+)
+request_queries = Histogram(
+    "coursereview_request_queries", "SQL queries issued per request by route.", QUERY_BUCKETS
+)
+
+
+HISTOGRAMS = (request_latency, request_queries)
+
+
+# ---------------------------------------------------------
+# Sharing metrics across processes
+# ---------------------------------------------------------
+_flusher = {"pid": None, "dirty": False}
+_flusher_lock = threading.Lock()
+
+
+def _metrics_path(directory: str, pid: int) -> str:
+    return os.path.join(directory, f"{pid}.json")
+
+
+def write_process_metrics(directory: str):
+    """Writes this process's histograms to directory/<pid>.json."""
+    with _flusher_lock:
+        _flusher["dirty"] = False
+    data = {h.name: [[list(labels), values] for labels, values in h.snapshot().items()] for h in HISTOGRAMS}
+    os.makedirs(directory, exist_ok=True)
+    path = _metrics_path(directory, os.getpid())
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _flush_loop(directory: str):
+    while True:
+        time.sleep(METRICS_FLUSH_INTERVAL)
+        if _flusher["dirty"]:
+            try:
+                write_process_metrics(directory)
+            except OSError as err:
+                print(f"[WARN] Could not write metrics to {directory}: {err}")
+
+
+def _mark_dirty(directory: str):
+    """Schedules a write; starts this process's flusher thread on first use (after a fork too)."""
+    with _flusher_lock:
+        _flusher["dirty"] = True
+        if _flusher["pid"] == os.getpid():
+            return
+        _flusher["pid"] = os.getpid()
+    threading.Thread(target=_flush_loop, args=(directory,), name="metrics-flush", daemon=True).start()
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def merged_series(directory: str) -> dict:
+    """Histogram name -> series summed over every live process's file."""
+    merged = {h.name: {} for h in HISTOGRAMS}
+    for filename in os.listdir(directory):
+        name, ext = os.path.splitext(filename)
+        if ext != ".json" or not name.isdigit():
+            continue
+        path = os.path.join(directory, filename)
+        if not _process_alive(int(name)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            continue
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue  # exited or unreadable since listdir; its counts are gone either way
+
+        for hist_name, series in data.items():
+            target = merged.get(hist_name)
+            if target is None:
+                continue
+            for labels, values in series:
+                total = target.setdefault(tuple(labels), [0] * len(values))
+                for i, value in enumerate(values):
+                    total[i] += value
+    return merged
+
+
+def render_metrics(directory: str) -> str:
+    write_process_metrics(directory)
+    merged = merged_series(directory)
+    lines = []
+    for h in HISTOGRAMS:
+        lines += h.render(LABELS, merged[h.name])
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------------
+# Sampling profiler
+# ---------------------------------------------------------
+class SamplingProfiler:
+    """
+    Samples one thread's stack every interval seconds from a helper thread
+    and counts identical stacks. Cheap enough to leave on for a request.
+    """
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self, path: str):
+        """Writes collapsed stacks ("frame;frame;frame count" per line)."""
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _wants_profile(app) -> bool:
+    mode = app.config.get("PROFILING")
+    return mode == "always" or (mode == "header" and request.headers.get("X-Profile") == "1")
+
+
+# ---------------------------------------------------------
+# Flask wiring
+# ---------------------------------------------------------
+def init_app(app):
+    """Hooks the instrumentation into app if INSTRUMENTATION is on."""
+    global _listening
+
+    app.config.setdefault("INSTRUMENTATION", _env_flag("COURSEREVIEW_INSTRUMENTATION"))
+    app.config.setdefault("QUERY_COUNT_WARNING", QUERY_COUNT_WARNING)
+    app.config.setdefault("PROFILING", os.environ.get("COURSEREVIEW_PROFILING", "off"))
+    app.config.setdefault("PROFILE_DIR", os.path.join(app.instance_path, "profiles"))
+    app.config.setdefault("METRICS_DIR", os.environ.get(
+        "COURSEREVIEW_METRICS_DIR", os.path.join(app.instance_path, "metrics")
+    ))
+    if not app.config["INSTRUMENTATION"]:
+        return
+
+    if not _listening:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        _listening = True
+
+    @app.before_request
+    def start_metrics():
+        g._metrics = metrics = RequestMetrics()
+        if _wants_profile(app):
+            metrics.profiler = SamplingProfiler(threading.get_ident())
+            metrics.profiler.start()
+
+    @app.after_request
+    def finish_metrics(response):
+        metrics = current()
+        if metrics is None:
+            return response
+
+        total = time.perf_counter() - metrics.start
+        other = sum(metrics.timings.values())
+        app_time = max(total - metrics.sql_time - other, 0.0)
+
+        timing = [f'sql;dur={metrics.sql_time * 1000:.2f};desc="{metrics.queries} queries"']
+        timing += [f"{name};dur={secs * 1000:.2f}" for name, secs in metrics.timings.items()]
+        timing += [f"app;dur={app_time * 1000:.2f}", f"total;dur={total * 1000:.2f}"]
+        response.headers["Server-Timing"] = ", ".join(timing)
+
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        labels = (request.method, route, str(response.status_code))
+        request_latency.observe(labels, total)
+        request_queries.observe(labels, metrics.queries)
+        _mark_dirty(app.config["METRICS_DIR"])
+
+        if metrics.queries > app.config["QUERY_COUNT_WARNING"]:
+            print(f"[WARN] {request.method} {request.full_path.rstrip('?')} issued {metrics.queries} "
+                  f"queries ({metrics.sql_time * 1000:.1f}ms SQL) -- possible N+1")
+
+        if metrics.profiler is not None:
+            metrics.profiler.stop()
+            os.makedirs(app.config["PROFILE_DIR"], exist_ok=True)
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{request.endpoint or 'unmatched'}-{uuid.uuid4().hex[:8]}.folded"
+            metrics.profiler.write(os.path.join(app.config["PROFILE_DIR"], name))
+            response.headers["X-Profile"] = name
+
+        return response
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        return Response(render_metrics(app.config["METRICS_DIR"]), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,199 @@
+"""
+jobs.py
+Runs the ingestion pipeline in the background so the admin endpoint can
+return immediately.
+
+Jobs run one at a time on a single worker thread, inside their own app
+context. Under gunicorn every worker process has its own thread, so the
+"one at a time" guard and the job state live on disk, under JOBS_DIR
+(instance/jobs by default), where every process sees them:
+
+- pipeline.lock is held (flock) by the process running a job, for as long
+  as the job runs, and names that job. The kernel releases the lock if the
+  process dies, so a crashed run never blocks the next one.
+- <job id>.json is the job's state, rewritten atomically on every status
+  or stage change. The last MAX_JOBS_KEPT are kept and reported through
+  GET /api/admin/jobs/<job_id> by any worker.
+"""
+
+import fcntl
+import json
+import os
+import re
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from flask import current_app
+
+MAX_JOBS_KEPT = 20
+LOCK_FILE = "pipeline.lock"
+JOB_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pipeline")
+
+
+class PipelineJob:
+    """
+    Progress of one pipeline run: overall status plus per-stage status,
+    counts, error and timings. Every change is saved to its JSON file.
+    """
+
+    def __init__(self, directory: str):
+        self.id = uuid.uuid4().hex
+        self.path = os.path.join(directory, f"{self.id}.json")
+        self.status = "queued"  # queued -> running -> succeeded | failed
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.stages = {}
+        self._save_lock = threading.Lock()  # review sources run stages on several threads
+
+    @contextmanager
+    def stage(self, name: str):
+        stage = {"status": "running", "counts": None, "error": None,
+                 "started_at": time.time(), "finished_at": None, "duration": None}
+        with self._save_lock:
+            self.stages[name] = stage
+        self.save()
+        try:
+            yield stage
+            stage["status"] = "succeeded"
+        except Exception as err:
+            stage["status"] = "failed"
+            stage["error"] = str(err)
+            raise
+        finally:
+            stage["finished_at"] = time.time()
+            stage["duration"] = round(stage["finished_at"] - stage["started_at"], 3)
+            self.save()
+
+    def serialize(self):
+        end = self.finished_at or time.time()
+        return {
+            "id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "duration": round(end - self.started_at, 3) if self.started_at else None,
+            "stages": self.stages,
+        }
+
+    def save(self):
+        with self._save_lock:
+            _write_json(self.path, self.serialize())
+
+
+def _write_json(path: str, data: dict):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}"
+    with open(tmp, "w") as f:
+        json.dump(data, f, default=str)
+    os.replace(tmp, path)
+
+
+def _read_json(path: str) -> dict | None:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _prune(directory: str):
+    """Deletes all but the newest MAX_JOBS_KEPT job files."""
+    paths = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".json")]
+    paths.sort(key=os.path.getmtime)
+    for path in paths[:-MAX_JOBS_KEPT]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _mark_interrupted(directory: str, job_id: str):
+    """A job left queued/running by a process that died is recorded as failed."""
+    path = os.path.join(directory, f"{job_id}.json")
+    state = _read_json(path) if JOB_ID_RE.match(job_id) else None
+    if state and state["status"] in ("queued", "running"):
+        state.update(status="failed", error="Interrupted: the process running it exited", finished_at=time.time())
+        _write_json(path, state)
+
+
+def _run(app, job: PipelineJob, target, lock_file):
+    job.status = "running"
+    job.started_at = time.time()
+    job.save()
+    try:
+        with app.app_context():
+            target(job)
+        job.status = "succeeded"
+    except Exception as err:
+        traceback.print_exc()
+        job.status = "failed"
+        job.error = str(err)
+    finally:
+        job.finished_at = time.time()
+        job.save()
+        lock_file.close()  # releases the lock
+
+
+# ---------------------------------------------------------
+# Public API
+# ---------------------------------------------------------
+def jobs_dir(app=None) -> str:
+    return (app or current_app).config["JOBS_DIR"]
+
+
+def start_job(app, target) -> tuple[dict, bool]:
+    """
+    Queues target(job) on this process's worker thread. If a job is already
+    queued or running in any process, returns (that job's state, False)
+    instead of starting a second one.
+    """
+    directory = jobs_dir(app)
+    os.makedirs(directory, exist_ok=True)
+
+    lock_file = open(os.path.join(directory, LOCK_FILE), "a+")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.seek(0)
+        active_id = lock_file.read().strip()
+        lock_file.close()
+        return get_job(active_id, app) or {"id": active_id, "status": "running"}, False
+
+    try:
+        lock_file.seek(0)
+        previous_id = lock_file.read().strip()
+        if previous_id:
+            _mark_interrupted(directory, previous_id)
+
+        job = PipelineJob(directory)
+        job.save()
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(job.id)
+        lock_file.flush()
+        _prune(directory)
+    except Exception:
+        lock_file.close()
+        raise
+
+    _executor.submit(_run, app, job, target, lock_file)
+    return job.serialize(), True
+
+
+def get_job(job_id: str, app=None) -> dict | None:
+    """The saved state of job_id, from whichever process ran it."""
+    if not JOB_ID_RE.match(job_id):
+        return None
+    state = _read_json(os.path.join(jobs_dir(app), f"{job_id}.json"))
+    if state and state["started_at"] and not state["finished_at"]:
+        state["duration"] = round(time.time() - state["started_at"], 3)
+    return state
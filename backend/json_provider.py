@@ -0,0 +1,67 @@
+"""
+json_provider.py
+Fast JSON encoding for responses.
+
+Uses orjson when it is installed (several times faster than the stdlib
+encoder and produces bytes directly) and falls back to the stdlib json
+module otherwise, so the app runs either way.
+"""
+
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+from instrumentation import timed
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def _default(obj):
+    # Types neither encoder handles natively (Decimal, UUID, ...) -- same rules as Flask
+    return DefaultJSONProvider.default(obj)
+
+
+def dumps_bytes(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(obj, default=_default).encode("utf-8")
+
+
+def dumps(obj) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default).decode("utf-8")
+    return json.dumps(obj, default=_default)
+
+
+def loads(s):
+    if orjson is not None:
+        return orjson.loads(s)
+    return json.loads(s)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by dumps_bytes(). Used for dicts returned
+    from views, jsonify() and request.get_json(). Calls that pass
+    stdlib-only options (indent, sort_keys, ...) fall back to the default
+    provider.
+    """
+
+    def dumps(self, obj, **kwargs) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        with timed("encode"):
+            body = dumps_bytes(obj)
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,282 @@
+"""
+migrations.py
+Minimal schema migrations for the SQLite database.
+
+db.create_all() only creates tables that don't exist yet -- it never adds
+columns or indexes to an existing instance/coursereview.db. Every schema
+change to an existing table goes here as a numbered migration. Applied
+migrations are tracked in SQLite's PRAGMA user_version.
+
+Migrations run after db.create_all(), so on a fresh database the tables
+already have the latest shape. Each migration therefore has to be safe to
+run against both a fresh and an old schema (check before ALTER, use
+IF NOT EXISTS).
+
+All schema work (create_all, migrations, the search index and the sync
+triggers) happens in ensure_schema(), and only while the database is
+behind LATEST_VERSION. On an up-to-date database, app startup costs one
+PRAGMA read. Deployments that set COURSEREVIEW_AUTO_MIGRATE=0 run it once
+per release instead, from backend/:
+
+    python -m migrations
+"""
+
+import search
+import sync
+
+
+# ---------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------
+def _columns(conn, table: str) -> set[str]:
+    return {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info('{table}')")}
+
+
+def _add_column(conn, table: str, column: str, ddl: str):
+    if column not in _columns(conn, table):
+        conn.exec_driver_sql(f'ALTER TABLE "{table}" ADD COLUMN {column} {ddl}')
+
+
+# ---------------------------------------------------------
+# Migrations
+# ---------------------------------------------------------
+def _natural_keys(conn):
+    _add_column(conn, "course", "content_hash", "VARCHAR")
+    _add_column(conn, "review", "external_id", "VARCHAR")
+    _add_column(conn, "review", "content_hash", "VARCHAR")
+
+    # Older pipeline runs appended the same catalog repeatedly. Fold duplicate
+    # courses into the lowest id before the unique index can be created.
+    conn.exec_driver_sql("""
+        CREATE TEMP TABLE course_dupes AS
+        SELECT c.id AS dupe_id, k.keep_id
+        FROM course c
+        JOIN (SELECT term, code, MIN(id) AS keep_id FROM course GROUP BY term, code) k
+          ON c.term = k.term AND c.code = k.code
+        WHERE c.id != k.keep_id
+    """)
+    conn.exec_driver_sql("""
+        UPDATE review SET course_id = (SELECT keep_id FROM course_dupes WHERE dupe_id = review.course_id)
+        WHERE course_id IN (SELECT dupe_id FROM course_dupes)
+    """)
+    conn.exec_driver_sql("""
+        UPDATE OR IGNORE association_table
+        SET course_id = (SELECT keep_id FROM course_dupes WHERE dupe_id = association_table.course_id)
+        WHERE course_id IN (SELECT dupe_id FROM course_dupes)
+    """)
+    conn.exec_driver_sql("DELETE FROM association_table WHERE course_id IN (SELECT dupe_id FROM course_dupes)")
+    conn.exec_driver_sql("DELETE FROM course WHERE id IN (SELECT dupe_id FROM course_dupes)")
+    conn.exec_driver_sql("DROP TABLE course_dupes")
+
+    # The repointed reviews are now duplicated within a course
+    conn.exec_driver_sql("""
+        DELETE FROM review WHERE id NOT IN (
+            SELECT MIN(id) FROM review GROUP BY course_id, source, content
+        )
+    """)
+
+    conn.exec_driver_sql("CREATE UNIQUE INDEX IF NOT EXISTS uq_course_term_code ON course (term, code)")
+    conn.exec_driver_sql(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_review_source_external_id ON review (source, external_id)"
+    )
+
+
+def _lookup_indexes(conn):
+    # Same natural key, reordered so lookups by code alone can use it too
+    conn.exec_driver_sql("DROP INDEX IF EXISTS uq_course_term_code")
+    conn.exec_driver_sql("CREATE UNIQUE INDEX IF NOT EXISTS uq_course_code_term ON course (code, term)")
+
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_review_course_source ON review (course_id, source)")
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_association_table_user_id ON association_table (user_id)"
+    )
+
+    # netid becomes unique: merge duplicate users into the lowest id first
+    conn.exec_driver_sql("""
+        CREATE TEMP TABLE user_dupes AS
+        SELECT u.id AS dupe_id, k.keep_id
+        FROM user u
+        JOIN (SELECT netid, MIN(id) AS keep_id FROM user GROUP BY netid) k ON u.netid = k.netid
+        WHERE u.id != k.keep_id
+    """)
+    conn.exec_driver_sql("""
+        UPDATE OR IGNORE association_table
+        SET user_id = (SELECT keep_id FROM user_dupes WHERE dupe_id = association_table.user_id)
+        WHERE user_id IN (SELECT dupe_id FROM user_dupes)
+    """)
+    conn.exec_driver_sql("DELETE FROM association_table WHERE user_id IN (SELECT dupe_id FROM user_dupes)")
+    conn.exec_driver_sql("DELETE FROM user WHERE id IN (SELECT dupe_id FROM user_dupes)")
+    conn.exec_driver_sql("DROP TABLE user_dupes")
+
+    conn.exec_driver_sql("CREATE UNIQUE INDEX IF NOT EXISTS ix_user_netid ON user (netid)")
+
+
+def _review_metrics(conn):
+    _add_column(conn, "review", "rating", "FLOAT")
+    _add_column(conn, "review", "difficulty", "FLOAT")
+    _add_column(conn, "review", "workload", "FLOAT")
+    _add_column(conn, "review", "grade", "VARCHAR")
+    _add_column(conn, "review", "likes", "INTEGER")
+
+    # Existing rows were hashed without the new fields; clearing the hash
+    # makes the next ingestion rewrite them with their metrics
+    conn.exec_driver_sql("UPDATE review SET content_hash = NULL")
+
+
+def _professors(conn):
+    # The professor tables are new (db.create_all made them); link the
+    # courses already in the database to their instructors
+    from scripts.professors import parse_instructors
+
+    for course_id, blob in conn.exec_driver_sql("SELECT id, professor FROM course").fetchall():
+        for name, netid in parse_instructors(blob):
+            conn.exec_driver_sql(
+                "INSERT INTO professor (netid, name) VALUES (?, ?) ON CONFLICT (netid) DO NOTHING",
+                (netid, name),
+            )
+            conn.exec_driver_sql(
+                "INSERT OR IGNORE INTO course_professor (course_id, professor_id) "
+                "SELECT ?, id FROM professor WHERE netid = ?",
+                (course_id, netid),
+            )
+
+
+def _rmp_sync(conn):
+    _add_column(conn, "review", "date", "VARCHAR")
+    _add_column(conn, "professor", "rmp_synced_through", "VARCHAR")
+
+
+def _sync_versions(conn):
+    _add_column(conn, "course", "updated_version", "INTEGER")
+    _add_column(conn, "review", "updated_version", "INTEGER")
+    _add_column(conn, "association_table", "updated_version", "INTEGER")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_course_updated_version ON course (updated_version)")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_review_updated_version ON review (updated_version)")
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_association_table_user_version ON association_table (user_id, updated_version)"
+    )
+
+    # Everything already in the database is version 1; the sync triggers
+    # (sync.ensure_sync_triggers) number changes from 2 on
+    conn.exec_driver_sql("UPDATE course SET updated_version = 1")
+    conn.exec_driver_sql("UPDATE review SET updated_version = 1")
+    conn.exec_driver_sql("UPDATE association_table SET updated_version = 1")
+    conn.exec_driver_sql("""
+        INSERT INTO data_version (name, version, updated_at) VALUES ('sync', 1, CURRENT_TIMESTAMP)
+        ON CONFLICT (name) DO UPDATE SET version = MAX(version, 1)
+    """)
+
+
+def _course_descriptions(conn):
+    _add_column(conn, "course", "description", "VARCHAR")
+
+    # The course hash now covers the description; clearing it makes the next
+    # roster run fill in descriptions for existing courses
+    conn.exec_driver_sql("UPDATE course SET content_hash = NULL")
+
+
+def _summary_hashes(conn):
+    _add_column(conn, "course", "ai_review_hash", "VARCHAR")
+
+
+def _course_stats_backfill(conn):
+    # course_stats started empty (migration 3) and ingestion only refreshes
+    # courses whose reviews change, so compute it for every course once
+    from scripts.course_stats import refresh_course_stats
+
+    course_ids = [course_id for (course_id,) in conn.exec_driver_sql("SELECT id FROM course")]
+    refresh_course_stats(course_ids, conn)
+    conn.exec_driver_sql("""
+        INSERT INTO data_version (name, version, updated_at) VALUES ('catalog', 1, CURRENT_TIMESTAMP)
+        ON CONFLICT (name) DO UPDATE SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    """)
+
+
+def _nullable_roster_fields(conn):
+    # Courses known only from reviews have no roster instructors or credits.
+    # SQLite can't drop NOT NULL in place, so the table is rebuilt from the
+    # model, keeping its rows (and ids), indexes and triggers.
+    notnull = {row[1]: row[3] for row in conn.exec_driver_sql("PRAGMA table_info('course')")}
+    if not (notnull.get("professor") or notnull.get("credit")):
+        return
+
+    from sqlalchemy import MetaData
+    from sqlalchemy.schema import CreateTable
+    from db import Course
+
+    extras = [sql for (sql,) in conn.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE tbl_name = 'course' AND type IN ('index', 'trigger') AND sql IS NOT NULL"
+    )]
+    columns = ", ".join(f'"{name}"' for name in notnull if name in Course.__table__.c)
+    conn.execute(CreateTable(Course.__table__.to_metadata(MetaData(), name="course_rebuild")))
+    conn.exec_driver_sql(f"INSERT INTO course_rebuild ({columns}) SELECT {columns} FROM course")
+    conn.exec_driver_sql("DROP TABLE course")
+    conn.exec_driver_sql("ALTER TABLE course_rebuild RENAME TO course")
+    for sql in extras:
+        conn.exec_driver_sql(sql)
+
+
+# (version, description, function) -- append only, never renumber
+MIGRATIONS = [
+    (1, "natural keys and content hashes for upserts", _natural_keys),
+    (2, "indexes for review, course, user and saved-course lookups", _lookup_indexes),
+    (3, "rating, difficulty, workload, grade and likes on reviews", _review_metrics),
+    (4, "professor table linked to courses", _professors),
+    (5, "review dates and per-professor RMP sync marks", _rmp_sync),
+    (6, "change versions and tombstones for delta sync", _sync_versions),
+    (7, "roster descriptions on courses", _course_descriptions),
+    (8, "review-set hashes for generated summaries", _summary_hashes),
+    (9, "course_stats for the courses already in the database", _course_stats_backfill),
+    (10, "nullable instructors and credits for courses known only from reviews", _nullable_roster_fields),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# ---------------------------------------------------------
+# Runner
+# ---------------------------------------------------------
+def current_version(conn) -> int:
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def ensure_schema(engine, auto_migrate: bool = True) -> bool:
+    """
+    Brings the database to LATEST_VERSION if it is behind (creating it if
+    new), or raises if auto_migrate is off. Returns True if it did any work.
+    """
+    with engine.connect() as conn:
+        version = current_version(conn)
+
+    if version >= LATEST_VERSION:
+        search.check_search_index(engine)
+        return False
+    if not auto_migrate:
+        raise RuntimeError(
+            f"Database schema is at version {version}, expected {LATEST_VERSION}; run python -m migrations"
+        )
+
+    from db import db
+    db.metadata.create_all(engine)
+    upgrade(engine)
+    search.ensure_search_index(engine)
+    sync.ensure_sync_triggers(engine)
+    return True
+
+
+def upgrade(engine):
+    """Applies every pending migration, each in its own transaction."""
+    for version, description, migrate in MIGRATIONS:
+        with engine.begin() as conn:
+            if version <= current_version(conn):
+                continue
+
+            print(f"[MIGRATE] {version}: {description}")
+            migrate(conn)
+            conn.exec_driver_sql(f"PRAGMA user_version = {version}")
+
+
+if __name__ == "__main__":
+    from app import create_app
+
+    create_app({"AUTO_MIGRATE": True})
+    print(f"[SUCCESS] Database schema is at version {LATEST_VERSION}.")
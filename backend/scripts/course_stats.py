@@ -0,0 +1,73 @@
+"""
+course_stats.py
+Maintains the course_stats table (see db.CourseStats).
+
+refresh_course_stats() recomputes the aggregates for the given courses
+only. The review upserts call it with the courses whose reviews actually
+changed, so a refresh costs work proportional to what changed rather
+than to the whole review table.
+"""
+
+import json
+from statistics import median
+
+from sqlalchemy import select
+from db import db, CourseStats, Review, CHUNK_SIZE
+
+HISTOGRAM_BUCKETS = range(1, 6)
+
+
+def _metric_stats(values: list[float]) -> tuple:
+    """Returns (mean, median, histogram json) of the non-null values."""
+    values = [v for v in values if v is not None]
+    if not values:
+        return None, None, None
+
+    histogram = {str(b): 0 for b in HISTOGRAM_BUCKETS}
+    for v in values:
+        bucket = min(max(round(v), HISTOGRAM_BUCKETS.start), HISTOGRAM_BUCKETS.stop - 1)
+        histogram[str(bucket)] += 1
+
+    return round(sum(values) / len(values), 3), median(values), json.dumps(histogram)
+
+
+def _stats_row(course_id: int, source: str, reviews: list) -> dict:
+    row = {"course_id": course_id, "source": source, "review_count": len(reviews)}
+    for metric in CourseStats.METRICS:
+        values = [getattr(r, metric) for r in reviews]
+        mean, med, histogram = _metric_stats(values)
+        row[f"{metric}_mean"] = mean
+        row[f"{metric}_median"] = med
+        row[f"{metric}_histogram"] = histogram
+    return row
+
+
+def refresh_course_stats(course_ids, conn=None) -> int:
+    """
+    Recomputes course_stats for course_ids in the current session (or on
+    conn, e.g. inside a migration). Returns rows written.
+    """
+    execute = (conn or db.session).execute
+    course_ids = sorted(set(course_ids))
+    written = 0
+
+    for start in range(0, len(course_ids), CHUNK_SIZE):
+        chunk = course_ids[start:start + CHUNK_SIZE]
+        reviews = execute(
+            select(Review.course_id, Review.source, *(getattr(Review, m) for m in CourseStats.METRICS))
+            .where(Review.course_id.in_(chunk))
+        ).all()
+
+        groups = {}
+        for r in reviews:
+            groups.setdefault((r.course_id, r.source), []).append(r)
+            groups.setdefault((r.course_id, "all"), []).append(r)
+
+        rows = [_stats_row(course_id, source, rs) for (course_id, source), rs in groups.items()]
+
+        execute(CourseStats.__table__.delete().where(CourseStats.course_id.in_(chunk)))
+        if rows:
+            execute(CourseStats.__table__.insert(), rows)
+        written += len(rows)
+
+    return written
@@ -0,0 +1,224 @@
+"""
+http_cache.py
+Persistent response cache for the scrapers, used by http_client.request().
+
+Responses are stored in a separate SQLite file (instance/http_cache.db),
+keyed by a hash of the request contents (method, URL, params and body).
+Each upstream host has its own TTL. A fresh entry is served without any
+network call. An expired entry that has an ETag or Last-Modified is
+revalidated with If-None-Match / If-Modified-Since, and a 304 renews it.
+When the cache grows past MAX_BYTES, the least recently used entries are
+evicted. The size is tracked as a running total, recounted from the table
+every RECOUNT_EVERY stores (other processes may share the file).
+
+Only 200 responses are cached. Set HTTP_CACHE_DISABLED=1 to bypass it.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from urllib.parse import urlparse
+
+CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "instance", "http_cache.db"
+)
+MAX_BYTES = 256 * 1024 * 1024
+RECOUNT_EVERY = 1000
+
+DEFAULT_TTL = 6 * 3600
+HOST_TTLS = {
+    "classes.cornell.edu": 24 * 3600,       # roster changes rarely mid-semester
+    "www.cureviews.org": 12 * 3600,
+    "www.ratemyprofessors.com": 24 * 3600,
+}
+
+enabled = os.environ.get("HTTP_CACHE_DISABLED", "") not in ("1", "true")
+
+_local = threading.local()
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "revalidated": 0, "stored": 0, "evicted": 0}
+_size_lock = threading.Lock()
+_size = {"bytes": None, "puts": 0}  # running total of responses.size; None = not counted yet
+
+
+# ---------------------------------------------------------
+# Storage
+# ---------------------------------------------------------
+def _connect() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        conn = sqlite3.connect(CACHE_PATH, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_accessed_at ON responses (accessed_at)")
+        _local.conn = conn
+    return conn
+
+
+def close():
+    """Closes this thread's connection (e.g. when a worker thread is done)."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+
+def _count(stat: str, n: int = 1):
+    with _stats_lock:
+        _stats[stat] += n
+
+
+class CachedEntry:
+    __slots__ = ("key", "url", "status", "headers", "body", "etag", "last_modified", "fetched_at")
+
+    def __init__(self, key, url, status, headers, body, etag, last_modified, fetched_at):
+        self.key = key
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    def is_fresh(self) -> bool:
+        return time.time() - self.fetched_at < ttl_for(self.url)
+
+    def validators(self) -> dict:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def to_response(self) -> requests.Response:
+        r = requests.Response()
+        r.status_code = self.status
+        r.headers = CaseInsensitiveDict(json.loads(self.headers))
+        r._content = self.body
+        r.url = self.url
+        r.encoding = requests.utils.get_encoding_from_headers(r.headers) or "utf-8"
+        return r
+
+
+# ---------------------------------------------------------
+# Public API
+# ---------------------------------------------------------
+def ttl_for(url: str) -> int:
+    return HOST_TTLS.get(urlparse(url).netloc, DEFAULT_TTL)
+
+
+def cache_key(method: str, url: str, params=None, json_body=None, data=None) -> str:
+    """Content address of a request: identical requests share an entry."""
+    payload = json.dumps(
+        [method.upper(), url, sorted((params or {}).items()), json_body, data],
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get(key: str) -> CachedEntry | None:
+    row = _connect().execute(
+        "SELECT key, url, status, headers, body, etag, last_modified, fetched_at "
+        "FROM responses WHERE key = ?", (key,)
+    ).fetchone()
+    if row is None:
+        return None
+
+    _connect().execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+    return CachedEntry(*row)
+
+
+def hit(entry: CachedEntry) -> requests.Response:
+    _count("hits")
+    return entry.to_response()
+
+
+def renew(entry: CachedEntry) -> requests.Response:
+    """Upstream answered 304: the cached body is still good for another TTL."""
+    _connect().execute("UPDATE responses SET fetched_at = ? WHERE key = ?", (time.time(), entry.key))
+    _count("revalidated")
+    return entry.to_response()
+
+
+def put(key: str, response: requests.Response):
+    """Records a network fetch; stores the response if it is a 200."""
+    _count("misses")
+    if response.status_code != 200:
+        return
+
+    now = time.time()
+    body = response.content
+    conn = _connect()
+    # Writes are serialized by SQLite anyway; the lock keeps the running total exact
+    with _size_lock:
+        old = conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses "
+            "(key, url, status, headers, body, etag, last_modified, fetched_at, accessed_at, size) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, response.url, response.status_code, json.dumps(dict(response.headers)), body,
+             response.headers.get("ETag"), response.headers.get("Last-Modified"), now, now, len(body)),
+        )
+        evicted = _evict(conn, len(body) - (old[0] if old else 0))
+    _count("stored")
+    _count("evicted", evicted)
+
+
+def _evict(conn, added: int) -> int:
+    """
+    Adds added bytes to the running total and evicts if it's over MAX_BYTES.
+    Call with _size_lock held. Returns the number of entries evicted.
+    """
+    _size["puts"] += 1
+    if _size["bytes"] is None or _size["puts"] % RECOUNT_EVERY == 0:
+        _size["bytes"] = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+    else:
+        _size["bytes"] += added
+    if _size["bytes"] <= MAX_BYTES:
+        return 0
+
+    # Drop least recently used entries until we're back under 90% of the cap
+    excess = _size["bytes"] - int(MAX_BYTES * 0.9)
+    freed = evicted = 0
+    for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+        if freed >= excess:
+            break
+        conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+        freed += size
+        evicted += 1
+    _size["bytes"] -= freed
+    return evicted
+
+
+def clear():
+    _connect().execute("DELETE FROM responses")
+    with _size_lock:
+        _size["bytes"] = 0
+
+
+def stats() -> dict:
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,208 @@
+"""
+http_client.py
+Shared HTTP layer for the scrapers.
+
+- One pooled requests.Session, so connections (and TLS sessions) are reused
+- A default timeout on every call
+- Per-host concurrency limits so we don't hammer any one upstream
+- Optional per-caller rate limits (RateLimiter, passed to fetch_all)
+- Retries with exponential backoff + full jitter on connection errors,
+  timeouts and retryable status codes (429/5xx)
+- A persistent response cache with conditional revalidation (http_cache.py)
+- fetch_all() to fan a fetch function out over a bounded thread pool
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from scripts import http_cache
+
+DEFAULT_TIMEOUT = (5, 20)  # (connect, read) seconds
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 15.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+MAX_WORKERS = 16
+DEFAULT_HOST_LIMIT = 4
+HOST_LIMITS = {
+    "classes.cornell.edu": 8,
+    "www.cureviews.org": 4,
+    "www.ratemyprofessors.com": 4,
+}
+
+_session = None
+_session_lock = threading.Lock()
+_host_semaphores = {}
+_host_lock = threading.Lock()
+_thread_state = threading.local()  # .limiter: RateLimiter for requests made on this thread
+
+
+# ---------------------------------------------------------
+# Session / per-host limits
+# ---------------------------------------------------------
+def get_session() -> requests.Session:
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=len(HOST_LIMITS) + 1, pool_maxsize=MAX_WORKERS)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+
+    return _session
+
+
+def _host_semaphore(url: str) -> threading.Semaphore:
+    host = urlparse(url).netloc
+    with _host_lock:
+        if host not in _host_semaphores:
+            limit = HOST_LIMITS.get(host, DEFAULT_HOST_LIMIT)
+            _host_semaphores[host] = threading.BoundedSemaphore(limit)
+        return _host_semaphores[host]
+
+
+class RateLimiter:
+    """Token bucket: at most rate requests/second on average, in bursts of up to burst."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def _backoff(attempt: int, retry_after: str | None = None) -> float:
+    if retry_after and retry_after.isdigit():
+        return min(BACKOFF_CAP, float(retry_after))
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+
+# ---------------------------------------------------------
+# Requests
+# ---------------------------------------------------------
+def request(method: str, url: str, use_cache: bool = True, **kwargs) -> requests.Response:
+    """
+    session.request() with a default timeout, per-host concurrency limit,
+    retries and the on-disk response cache (see http_cache.py). The final
+    response is returned as-is (callers still decide whether to
+    raise_for_status); the final connection error is re-raised.
+    """
+    if not (use_cache and http_cache.enabled):
+        return _send(method, url, **kwargs)
+
+    key = http_cache.cache_key(method, url, kwargs.get("params"), kwargs.get("json"), kwargs.get("data"))
+    entry = http_cache.get(key)
+    if entry is not None and entry.is_fresh():
+        return http_cache.hit(entry)
+
+    if entry is not None:
+        # Expired: ask upstream whether our copy is still current
+        kwargs["headers"] = {**(kwargs.get("headers") or {}), **entry.validators()}
+
+    r = _send(method, url, **kwargs)
+    if r.status_code == 304 and entry is not None:
+        return http_cache.renew(entry)
+
+    http_cache.put(key, r)
+    return r
+
+
+def _send(method: str, url: str, **kwargs) -> requests.Response:
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    session = get_session()
+    semaphore = _host_semaphore(url)
+    limiter = getattr(_thread_state, "limiter", None)
+
+    for attempt in range(MAX_RETRIES + 1):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            with semaphore:
+                r = session.request(method, url, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt == MAX_RETRIES:
+                raise
+            time.sleep(_backoff(attempt))
+            continue
+
+        if r.status_code in RETRY_STATUSES and attempt < MAX_RETRIES:
+            time.sleep(_backoff(attempt, r.headers.get("Retry-After")))
+            continue
+
+        return r
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+# ---------------------------------------------------------
+# Concurrent fan-out
+# ---------------------------------------------------------
+def fetch_all(fn, items, max_workers: int = MAX_WORKERS, limiter: RateLimiter | None = None) -> list[tuple]:
+    """
+    Runs fn(item) for every item on a bounded thread pool. With a limiter,
+    every network request fn makes (retries included) waits for a token.
+
+    Returns (item, result, error) tuples in input order; one failing item
+    never aborts the others. fn must not touch the database session, since
+    SQLAlchemy sessions are not thread-safe -- do the writes afterwards on
+    the calling thread.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    results = [None] * len(items)
+    pending = iter(enumerate(items))
+    pending_lock = threading.Lock()
+
+    def work():
+        # Each worker takes items until none are left, then closes the
+        # cache connection it opened on this thread
+        _thread_state.limiter = limiter
+        try:
+            while True:
+                with pending_lock:
+                    i, item = next(pending, (None, None))
+                if i is None:
+                    return
+                try:
+                    results[i] = (item, fn(item), None)
+                except Exception as err:
+                    results[i] = (item, None, err)
+        finally:
+            _thread_state.limiter = None
+            http_cache.close()
+
+    workers = min(max_workers, len(items))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in [pool.submit(work) for _ in range(workers)]:
+            future.result()
+    return results
@@ -1,8 +1,10 @@
-import requests
 from flask import current_app
-from db import db, Course
+from db import db
+from scripts import http_client
+from scripts.upsert import upsert_courses
 
 BASE_URL_ROSTER = "https://classes.cornell.edu/api/2.0/search/classes.json"
+BASE_URL_SUBJECTS = "https://classes.cornell.edu/api/2.0/config/subjects.json"
 
 
 # ---------------------------------------------------------
@@ -15,7 +17,7 @@ def fetch_roster_course(roster: str, subject: str, number: str) -> dict | None:
         "q": number,
     }
 
-    r = requests.get(BASE_URL_ROSTER, params=params, timeout=10)
+    r = http_client.get(BASE_URL_ROSTER, params=params)
     r.raise_for_status()
     data = r.json()
 
@@ -32,6 +34,32 @@ def fetch_roster_course(roster: str, subject: str, number: str) -> dict | None:
     return matches[0]
 
 
+# ---------------------------------------------------------
+# Fetch a whole subject (or a roster's subject list) at once
+# ---------------------------------------------------------
+def fetch_subjects(roster: str) -> list[str]:
+    """Returns every subject code offered in roster (e.g. ["AAS", "AEM", ...])."""
+    r = http_client.get(BASE_URL_SUBJECTS, params={"roster": roster})
+    r.raise_for_status()
+    return [s["value"] for s in r.json().get("data", {}).get("subjects", [])]
+
+
+def fetch_subject_records(roster: str, subject: str) -> list[dict]:
+    """
+    One request for every class in a subject, flattened straight into Course
+    records so the (large) raw payload is dropped before the next subject.
+    """
+    r = http_client.get(BASE_URL_ROSTER, params={"roster": roster, "subject": subject})
+    r.raise_for_status()
+    classes = r.json().get("data", {}).get("classes", [])
+
+    return [
+        course_record(extract_row(c, roster, subject, c.get("catalogNbr")))
+        for c in classes
+        if c.get("subject") == subject and c.get("catalogNbr")
+    ]
+
+
 # ---------------------------------------------------------
 # Flatten and extract useful fields into one row dict
 # ---------------------------------------------------------
@@ -110,64 +138,102 @@ def extract_row(c: dict, roster: str, subject: str, number: str) -> dict:
 
 
 # ---------------------------------------------------------
-# Insert data directly into database
+# Map a roster row onto Course columns
 # ---------------------------------------------------------
-def insert_course_row(row: dict):
-    course = Course(
-        title=row["title"],
-        code=f"{row['subject']} {row['number']}",
-        professor=row["instructors"],
-        term=row["roster"],
-        credit=row["unitsMinimum"] or 0,
-        ai_review="",
-    )
-
-    db.session.add(course)
+def course_record(row: dict) -> dict:
+    return {
+        "title": row["title"],
+        "code": f"{row['subject']} {row['number']}",
+        "professor": row["instructors"],
+        "term": row["roster"],
+        "credit": row["unitsMinimum"] or 0,
+        "description": row.get("description") or "",
+    }
 
 
 # ---------------------------------------------------------
 # Main entry point
 # ---------------------------------------------------------
-def load_courses():
-    classes = [
-        ("SP26", "CS", "1110"),
-        ("SP26", "CS", "1998"),
-        ("SP26", "CS", "2110"),
-        ("SP26", "CS", "2800"),
-        ("SP26", "CS", "3110"),
-        ("SP26", "CS", "3410"),
-        ("SP26", "CS", "4410"),
-        ("SP26", "ECE", "2300"),
-    ]
+DEFAULT_CLASSES = [
+    ("SP26", "CS", "1110"),
+    ("SP26", "CS", "1998"),
+    ("SP26", "CS", "2110"),
+    ("SP26", "CS", "2800"),
+    ("SP26", "CS", "3110"),
+    ("SP26", "CS", "3410"),
+    ("SP26", "CS", "4410"),
+    ("SP26", "ECE", "2300"),
+]
+
+
+def load_courses(classes=None):
+    classes = classes or DEFAULT_CLASSES
+
+    # Network calls run concurrently; DB writes stay on this thread
+    results = http_client.fetch_all(lambda c: fetch_roster_course(*c), classes)
+
+    records = []
+    errors = 0
+    for (roster, subject, number), raw, err in results:
+        if err:
+            print(f"[ERROR] Roster fetch failed for {roster} {subject} {number}: {err}")
+            errors += 1
+            continue
+        if not raw:
+            continue
+
+        row = extract_row(raw, roster, subject, number)
+        records.append(course_record(row))
+        print(f"[OK] Fetched {subject} {number} ({roster})")
 
     with current_app.app_context():
-        for roster, subject, number in classes:
-            raw = fetch_roster_course(roster, subject, number)
-            if not raw:
-                continue
+        written = upsert_courses(records)
+        db.session.commit()
+
+    print(f"[SUCCESS] {len(records)} courses loaded ({written} new or changed).")
+    return {"courses": len(records), "written": written, "errors": errors}
+
+
+DEFAULT_ROSTERS = ["SP26"]
+
 
-            row = extract_row(raw, roster, subject, number)
-            insert_course_row(row)
-            print(f"[OK] Inserted {subject} {number} ({roster})")
+def load_roster_subjects(rosters=None, subjects=None):
+    """
+    Loads every class of the given subjects (all of each roster's subjects
+    if None) with one request per (roster, subject) instead of one per course.
+    """
+    rosters = rosters or DEFAULT_ROSTERS
 
+    targets = []
+    for roster in rosters:
+        roster_subjects = subjects or fetch_subjects(roster)
+        targets.extend((roster, subject) for subject in roster_subjects)
+    print(f"[INFO] Fetching {len(targets)} subjects across {len(rosters)} rosters")
+
+    results = http_client.fetch_all(lambda t: fetch_subject_records(*t), targets)
+
+    records = []
+    errors = 0
+    for (roster, subject), subject_records, err in results:
+        if err:
+            print(f"[ERROR] Roster fetch failed for {roster} {subject}: {err}")
+            errors += 1
+            continue
+        records.extend(subject_records)
+
+    with current_app.app_context():
+        written = upsert_courses(records)
         db.session.commit()
 
-    print("[SUCCESS] All courses inserted.")
+    print(f"[SUCCESS] {len(records)} courses loaded from {len(targets)} subjects ({written} new or changed).")
+    return {"subjects": len(targets), "courses": len(records), "written": written, "errors": errors}
 
 
 # ---------------------------------------------------------
 # Run script directly
 # ---------------------------------------------------------
 if __name__ == "__main__":
-    classes_to_fetch = [
-        ("SP26", "CS", "1110"),
-        ("SP26", "CS", "1998"),
-        ("SP26", "CS", "2110"),
-        ("SP26", "CS", "2800"),
-        ("SP26", "CS", "3110"),
-        ("SP26", "CS", "3410"),
-        ("SP26", "CS", "4410"),
-        ("SP26", "ECE", "2300"),
-    ]
+    from app import create_app
 
-    load_courses(classes_to_fetch)
+    with create_app().app_context():
+        load_courses(DEFAULT_CLASSES)
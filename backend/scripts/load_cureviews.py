@@ -1,8 +1,10 @@
+from datetime import datetime
+
 import requests
-import os
 
-from flask import current_app
-from db import db, Course, Review
+from scripts import http_client
+from scripts.review_sources import ReviewSource, get_source_by_name, register, run_all
+from scripts.upsert import latest_course_ids
 
 BASE_URL = "https://www.cureviews.org"
 
@@ -16,7 +18,7 @@ def get_course_info(subject: str, number: str) -> dict:
     url = f"{BASE_URL}/api/courses/get-by-info"
     payload = {"subject": subject, "number": number}
 
-    r = requests.post(url, json=payload, timeout=10)
+    r = http_client.post(url, json=payload)
     r.raise_for_status()
     return r.json()["result"]
 
@@ -26,60 +28,92 @@ def get_reviews(course_id: str) -> list[dict]:
     url = f"{BASE_URL}/api/courses/get-reviews"
     payload = {"courseId": course_id}
 
-    r = requests.post(url, json=payload, timeout=10)
+    r = http_client.post(url, json=payload)
     r.raise_for_status()
     return r.json()["result"]
 
 
-# ----------------------------------------------------------
-# Database insertion pipeline (NO pandas)
-# ----------------------------------------------------------
+def to_float(value) -> float | None:
+    """CUReviews metrics arrive as numbers, numeric strings or blanks."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
 
-def load_cureviews_to_db():
-    """Fetch courses from our DB, scrape CUReviews, store reviews locally."""
-    with current_app.app_context():
 
-        courses = Course.query.all()
-        print(f"[INFO] Starting CUReviews scraping for {len(courses)} courses.")
+def to_iso_date(value) -> str | None:
+    """"2025-05-19T23:20:08.223Z" -> "2025-05-19T23:20:08", the format of Review.date."""
+    try:
+        return datetime.strptime(value[:19], "%Y-%m-%dT%H:%M:%S").isoformat()
+    except (TypeError, ValueError):
+        return None
+
 
-        inserted_count = 0
+# ----------------------------------------------------------
+# Review source
+# ----------------------------------------------------------
 
-        for course in courses:
+def fetch_course_reviews(subject: str, number: str) -> list[dict]:
+    """Looks up a course on CUReviews and returns all of its reviews."""
+    info = get_course_info(subject, number)
+    return get_reviews(info["_id"])
+
+
+class CUReviewsSource(ReviewSource):
+    """
+    Every course code in our DB, looked up on CUReviews by subject and number.
+    CUReviews has no terms, so a code offered in several terms is fetched
+    once and its reviews go to the latest offering.
+    """
+    name = "CUReviews"
+    source_id = 1
+    stage = "cureviews"
+    rate = 20
+
+    def targets(self):
+        targets = []
+        for code, course_id in sorted(latest_course_ids().items()):
             # expected format: "CS 1110"
-            parts = course.code.strip().replace("  ", " ").split()
+            parts = code.strip().replace("  ", " ").split()
 
             if len(parts) != 2:
-                print(f" → [SKIP] Invalid course code format: '{course.code}'")
+                print(f" → [SKIP] Invalid course code format: '{code}'")
                 continue
 
-            subject, number = parts
+            targets.append((course_id, *parts))
+        return targets
+
+    def fetch(self, target):
+        return fetch_course_reviews(target[1], target[2])
 
-            try:
-                info = get_course_info(subject, number)
-                cu_id = info["_id"]
-                reviews = get_reviews(cu_id)
+    def normalize(self, target, reviews):
+        return [
+            {
+                "course_id": target[0],
+                "external_id": r.get("_id"),
+                "content": (r.get("text") or "").strip(),
+                "rating": to_float(r.get("rating")),
+                "difficulty": to_float(r.get("difficulty")),
+                "workload": to_float(r.get("workload")),
+                "grade": r.get("grade") or None,
+                "likes": int(to_float(r.get("likes")) or 0),
+                "date": to_iso_date(r.get("date"))
+            }
+            for r in reviews
+        ]
 
-                print(f" → {subject} {number}: {len(reviews)} reviews found")
+    def describe_error(self, target, err):
+        if isinstance(err, requests.exceptions.HTTPError):
+            return f"CUReviews did not return {target[1]} {target[2]}. HTTP {err.response.status_code}"
+        return f"Unexpected error for {target[1]} {target[2]}: {err}"
 
-                for r in reviews:
-                    review = Review(
-                        course_id=course.id,
-                        source="CUReviews",
-                        content=r.get("text", "").strip()
-                    )
-                    db.session.add(review)
-                    inserted_count += 1
 
-            except requests.exceptions.HTTPError as http_err:
-                print(f" → [ERROR] CUReviews did not return {subject} {number}. "
-                      f"HTTP {http_err.response.status_code}")
-            except Exception as err:
-                print(f" → [ERROR] Unexpected error for {subject} {number}: {err}")
+register(CUReviewsSource())
 
-        # Commit once at the end (more efficient)
-        db.session.commit()
 
-        print(f"\n[SUCCESS] {inserted_count} CUReviews reviews inserted into database.")
+def load_cureviews_to_db():
+    """Fetch courses from our DB, scrape CUReviews, store reviews locally."""
+    return get_source_by_name("CUReviews").run()
 
 
 # ----------------------------------------------------------
@@ -87,10 +121,12 @@ def load_cureviews_to_db():
 # ----------------------------------------------------------
 
 def load_all_reviews():
-    """Runs all external review loaders (CUReviews + optional RMP)."""
-    load_cureviews_to_db()
-    # load_rmp_reviews_from_db()  # Uncomment when implemented
+    """Runs every registered review source (see review_sources.py) concurrently."""
+    return run_all()
 
 
 if __name__ == "__main__":
-    load_all_reviews()
+    from app import create_app
+
+    with create_app().app_context():
+        load_all_reviews()
@@ -1,13 +1,22 @@
-# Note: this script fetches course information from the database, finds the professor's name,
-# queries the data into the Rate My Professor GraphQL endpoint, and filters the reviews by
-# the course that the user is searching for, and saves it into the database. 
+# Note: this script resolves every professor teaching a course to their Rate My Professor id,
+# fetches each professor's ratings once, filters the ratings by the courses they teach,
+# and saves them into the database.
 
-import requests
-from flask import current_app
-from db import db, Course, Review
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, select
+from db import db, Course, Professor, course_professor
+from scripts import http_client
+from scripts.review_sources import ReviewSource, get_source_by_name, register
+from scripts.upsert import term_sort_key
 
 RMP_URL = "https://www.ratemyprofessors.com/graphql"
 HEADERS = {"Content-Type": "application/json", "User-Agent": "Mozilla/5.0"}
+SCHOOL_NAME = "Cornell University"
+NEGATIVE_TTL = timedelta(days=30)  # how long a "not on RMP" result is trusted
+RATINGS_PAGE_SIZE = 100
+MAX_RATING_PAGES = 200  # safety stop for a cursor that never ends
 
 
 # ------------------------
@@ -28,42 +37,82 @@ def search_professor(name):
         }""",
         "variables": { "query": { "text": name } }
     }
-    res = requests.post(RMP_URL, json=query, headers=HEADERS).json()
+    res = http_client.post(RMP_URL, json=query, headers=HEADERS).json()
     edges = res["data"]["newSearch"]["teachers"]["edges"]
-    if not edges:
-        return None
-    return edges[0]["node"]["id"]
+    # The search spans every school; only a match at Cornell counts
+    for edge in edges:
+        if (edge["node"].get("school") or {}).get("name") == SCHOOL_NAME:
+            return edge["node"]["id"]
+    return None
 
 
-def get_professor_ratings(teacher_id):
-    query = {
-        "query": """
-        query GetRatings($id: ID!) {
-          node(id: $id) {
-            ... on Teacher {
-              ratings(first: 100) {
-                edges {
-                  node {
-                    class
-                    comment
-                    qualityRating
-                    difficultyRating
-                    date
-                    wouldTakeAgain
+def get_professor_ratings(teacher_id, since=None):
+    """
+    Walks the teacher's ratings page by page (RATINGS_PAGE_SIZE per request,
+    following pageInfo.endCursor). RMP lists ratings newest first, so the
+    walk stops at the first rating dated at or before since (ISO 8601).
+
+    Returns (rating edges newer than since, complete). complete is False if
+    a page came back without ratings (a GraphQL error or a throttled reply)
+    or the walk hit MAX_RATING_PAGES; the edges so far are still returned,
+    but older ratings may be missing.
+    """
+    edges = []
+    cursor = None
+
+    for _ in range(MAX_RATING_PAGES):
+        query = {
+            "query": """
+            query GetRatings($id: ID!, $first: Int!, $after: String) {
+              node(id: $id) {
+                ... on Teacher {
+                  ratings(first: $first, after: $after) {
+                    edges {
+                      node {
+                        id
+                        class
+                        comment
+                        qualityRating
+                        difficultyRating
+                        date
+                        wouldTakeAgain
+                      }
+                    }
+                    pageInfo { hasNextPage endCursor }
                   }
                 }
               }
-            }
-          }
-        }""",
-        "variables": { "id": teacher_id }
-    }
+            }""",
+            "variables": { "id": teacher_id, "first": RATINGS_PAGE_SIZE, "after": cursor }
+        }
 
-    res = requests.post(RMP_URL, json=query, headers=HEADERS).json()
+        res = http_client.post(RMP_URL, json=query, headers=HEADERS).json()
+        ratings = ((res.get("data") or {}).get("node") or {}).get("ratings")
+        if not ratings:
+            print(f"[WARN] RMP returned no ratings page for {teacher_id}: {res.get('errors')}")
+            return edges, False
+
+        for edge in ratings["edges"]:
+            edge["node"]["date"] = parse_rmp_date(edge["node"].get("date"))
+            if since and edge["node"]["date"] and edge["node"]["date"] <= since:
+                return edges, True
+            edges.append(edge)
+
+        page = ratings.get("pageInfo") or {}
+        if not page.get("hasNextPage"):
+            return edges, True
+        cursor = page.get("endCursor")
+
+    print(f"[WARN] RMP ratings for {teacher_id} stopped at {MAX_RATING_PAGES} pages")
+    return edges, False
+
+
+def parse_rmp_date(value):
+    """"2024-05-10 18:22:10 +0000 UTC" -> "2024-05-10T18:22:10"."""
     try:
-        return res["data"]["node"]["ratings"]["edges"]
-    except:
-        return []
+        return datetime.strptime(value[:19], "%Y-%m-%d %H:%M:%S").isoformat()
+    except (TypeError, ValueError):
+        return None
 
 
 # ------------------------
@@ -83,40 +132,159 @@ def filter_reviews_for_course(reviews, course_code):
 
 
 # ------------------------
-# Main Pipeline
+# Professor -> RMP id resolver
 # ------------------------
 
-def load_rmp_reviews_to_db():
-    with current_app.app_context():
-        courses = Course.query.all()
+_rmp_ids = {}  # netid -> RMP id (None = not on RMP), memoized for the process
+_rmp_ids_lock = threading.Lock()
+
 
-        for course in courses:
-            course_code = course.code
-            professor = course.professor
+def resolve_rmp_ids(professors, limiter=None) -> tuple[dict, list[dict]]:
+    """
+    professors: (netid, name, rmp_id, rmp_checked_at) rows of the professor table.
+    Returns (netid -> RMP id or None if not on RMP, new lookup results).
 
-            print(f"\n[INFO] Processing {course_code} (Instructor: {professor})")
+    Answers come from the in-process memo, then from the professor table
+    (found ids, and misses younger than NEGATIVE_TTL), and only the rest
+    are searched on RMP -- once per professor, not once per course. Pass
+    the new results, misses included, to save_rmp_ids().
+    """
+    resolved = {}
+    pending = []
+    now = datetime.utcnow()
 
-            teacher_id = search_professor(professor)
-            if not teacher_id:
-                print(" → Instructor not found on RMP.")
-                continue
+    with _rmp_ids_lock:
+        for netid, name, rmp_id, checked_at in professors:
+            if netid in _rmp_ids:
+                resolved[netid] = _rmp_ids[netid]
+            elif rmp_id or (checked_at and now - checked_at < NEGATIVE_TTL):
+                resolved[netid] = rmp_id
+            else:
+                pending.append((netid, name))
 
-            ratings = get_professor_ratings(teacher_id)
-            filtered = filter_reviews_for_course(ratings, course_code)
+    results = http_client.fetch_all(lambda p: search_professor(p[1]), pending, limiter=limiter)
+    updates = []
+    for (netid, _), rmp_id, err in results:
+        if err:
+            print(f"[ERROR] RMP search failed for {netid}: {err}")
+            continue
+        resolved[netid] = rmp_id
+        updates.append({"key": netid, "rmp_id": rmp_id, "rmp_checked_at": now})
 
-            print(f" → {len(filtered)} matching reviews found.")
+    with _rmp_ids_lock:
+        _rmp_ids.update(resolved)
+    print(f"[INFO] {len(resolved)} professors resolved ({len(updates)} looked up on RMP)")
+    return resolved, updates
 
-            for r in filtered:
-                review = Review(
-                    course_id=course.id,
-                    source="RMP",
-                    content=r["comment"]
-                )
-                db.session.add(review)
 
-        db.session.commit()
-        print("\n[SUCCESS] All RMP reviews inserted.")
+def save_rmp_ids(updates: list[dict]):
+    if updates:
+        db.session.execute(
+            Professor.__table__.update().where(Professor.netid == bindparam("key")),
+            updates,
+        )
+
+
+# ------------------------
+# Review source
+# ------------------------
+
+class RMPSource(ReviewSource):
+    """
+    One target per RMP teacher linked to a course. Each teacher's new
+    ratings are matched to the courses they teach.
+    """
+    name = "RMP"
+    source_id = 0
+    stage = "rmp"
+    rate = 8
+
+    def targets(self):
+        professors = db.session.execute(
+            select(Professor.netid, Professor.name, Professor.rmp_id, Professor.rmp_checked_at)
+            .where(Professor.id.in_(select(course_professor.c.professor_id)))
+        ).all()
+        rmp_ids, self.id_updates = resolve_rmp_ids(professors, self.limiter)
+
+        # Sync mark per RMP id: only ratings newer than it are fetched. If
+        # several rows share an RMP id, the oldest mark (or none) wins.
+        self.since = {}
+        for rmp_id, mark in db.session.execute(
+            select(Professor.rmp_id, Professor.rmp_synced_through).where(Professor.rmp_id.isnot(None))
+        ):
+            if rmp_id not in self.since:
+                self.since[rmp_id] = mark
+            elif self.since[rmp_id] and mark:
+                self.since[rmp_id] = min(self.since[rmp_id], mark)
+            else:
+                self.since[rmp_id] = None
+
+        # RMP id -> courses taught, as (course id, course code). Ratings have
+        # no term, so each code maps to the teacher's latest offering of it.
+        latest = {}  # (RMP id, code) -> (term, course id)
+        for course_id, course_code, term, netid in db.session.execute(
+            select(Course.id, Course.code, Course.term, Professor.netid)
+            .join(course_professor, course_professor.c.course_id == Course.id)
+            .join(Professor, Professor.id == course_professor.c.professor_id)
+        ):
+            key = (rmp_ids.get(netid), course_code)
+            if key[0] and (key not in latest or term_sort_key(term) > term_sort_key(latest[key][0])):
+                latest[key] = (term, course_id)
+        self.courses = {}
+        for (rmp_id, course_code), (_, course_id) in latest.items():
+            self.courses.setdefault(rmp_id, set()).add((course_id, course_code))
+
+        self.marks = []
+        return sorted(self.courses)
+
+    def fetch(self, teacher_id):
+        return get_professor_ratings(teacher_id, self.since.get(teacher_id))
+
+    def normalize(self, teacher_id, payload):
+        edges, complete = payload
+        # A partial walk may have skipped older ratings, so it leaves the
+        # mark where it was and the next run walks this teacher again
+        dates = [e["node"]["date"] for e in edges if e["node"]["date"]]
+        if complete and dates:
+            self.marks.append({"key": teacher_id, "rmp_synced_through": max(dates)})
+
+        return [
+            {
+                "course_id": course_id,
+                "external_id": r.get("id"),
+                "content": r["comment"] or "",
+                "rating": r.get("qualityRating"),
+                "difficulty": r.get("difficultyRating"),
+                "date": r.get("date")
+            }
+            for course_id, course_code in sorted(self.courses[teacher_id])
+            for r in filter_reviews_for_course(edges, course_code)
+        ]
+
+    def upsert(self, rows):
+        save_rmp_ids(self.id_updates)
+        written = super().upsert(rows)
+        if self.marks:
+            # Written in the same transaction as the reviews
+            db.session.execute(
+                Professor.__table__.update().where(Professor.rmp_id == bindparam("key")),
+                self.marks,
+            )
+        return written
+
+    def describe_error(self, teacher_id, err):
+        return f"ratings fetch failed for {teacher_id}: {err}"
+
+
+register(RMPSource())
+
+
+def load_rmp_reviews_to_db():
+    return get_source_by_name("RMP").run()
 
 
 if __name__ == "__main__":
-    load_rmp_reviews_from_db()
+    from app import create_app
+
+    with create_app().app_context():
+        load_rmp_reviews_to_db()
@@ -0,0 +1,159 @@
+"""
+load_snapshot.py
+Offline loader: rebuilds the Course and Review tables from the CSV
+snapshots in backend/data/ with no network access.
+
+The snapshots use the same columns as extract_row() (roster rows) and the
+CUReviews review objects (review rows). A file may hold either kind or
+both (roster_courses.csv does). Reviews of a course with no roster row
+get a review-only course: its title comes from the review rows, its term
+is REVIEW_ONLY_TERM and its instructors and credits are NULL. Files are stream-parsed with the csv module
+CHUNK_ROWS rows at a time and written with the same bulk upserts as the
+live loaders, all inside one transaction. During the load SQLite runs in
+WAL mode with synchronous=OFF.
+
+Run directly (from backend/):
+    python -m scripts.load_snapshot [data_dir]
+"""
+
+import csv
+import glob
+import os
+import time
+
+from flask import current_app
+from db import db
+from scripts.load_class_roster import course_record
+from scripts.load_cureviews import to_float, to_iso_date
+from scripts.upsert import latest_course_ids, upsert_courses, upsert_reviews
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+CHUNK_ROWS = 2000
+REVIEW_ONLY_TERM = ""  # Sorts before every roster term (see term_sort_key)
+
+
+# ---------------------------------------------------------
+# Parsing
+# ---------------------------------------------------------
+def read_chunks(path: str, chunk_rows: int = CHUNK_ROWS):
+    """Yields lists of up to chunk_rows row dicts without loading the whole file."""
+    with open(path, newline="", encoding="utf-8") as f:
+        chunk = []
+        for row in csv.DictReader(f):
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def normalize_courses(chunk: list[dict]) -> list[dict]:
+    records = []
+    for row in chunk:
+        if not row.get("roster") or not row.get("title"):
+            continue
+        row["unitsMinimum"] = int(to_float(row.get("unitsMinimum")) or 0)
+        row["instructors"] = row.get("instructors") or "Unknown"
+        records.append(course_record(row))
+    return records
+
+
+def review_only_courses(titles: dict, course_ids: dict) -> list[dict]:
+    """titles: course code -> title from review rows. Courses for the codes not in course_ids."""
+    return [
+        {"title": title, "code": code, "professor": None, "term": REVIEW_ONLY_TERM, "credit": None}
+        for code, title in sorted(titles.items())
+        if code not in course_ids
+    ]
+
+
+def normalize_reviews(chunk: list[dict], course_ids: dict) -> list[dict]:
+    records = []
+    for row in chunk:
+        course_id = course_ids.get(f"{row.get('subject')} {row.get('number')}")
+        if not row.get("review_id") or course_id is None:
+            continue
+        records.append({
+            "course_id": course_id,
+            "external_id": row["review_id"],
+            "content": (row.get("text") or "").strip(),
+            "rating": to_float(row.get("rating")),
+            "difficulty": to_float(row.get("difficulty")),
+            "workload": to_float(row.get("workload")),
+            "grade": row.get("grade") or None,
+            "likes": int(to_float(row.get("likes")) or 0),
+            "date": to_iso_date(row.get("date")),
+        })
+    return records
+
+
+# ---------------------------------------------------------
+# Bulk load
+# ---------------------------------------------------------
+def _set_bulk_pragmas(conn) -> int:
+    """Switches to WAL + synchronous=OFF; returns the old synchronous level."""
+    previous = conn.exec_driver_sql("PRAGMA synchronous").scalar()
+    conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+    conn.exec_driver_sql("PRAGMA synchronous=OFF")
+    return previous
+
+
+def load_from_snapshot(data_dir: str = DATA_DIR):
+    paths = sorted(glob.glob(os.path.join(data_dir, "*.csv")))
+    print(f"[INFO] Loading {len(paths)} snapshot files from {data_dir}")
+    start = time.perf_counter()
+
+    # The load's session runs on one connection, so the pragmas are set and
+    # restored on the connection that goes back to the pool
+    with current_app.app_context(), db.engine.connect() as conn:
+        previous_sync = _set_bulk_pragmas(conn)
+        db.session.registry.set(db.session.session_factory(bind=conn))
+        courses = written = reviews = skipped = 0
+
+        try:
+            # Courses first: review rows need their course ids
+            review_titles = {}
+            for path in paths:
+                for chunk in read_chunks(path):
+                    records = normalize_courses(chunk)
+                    courses += len(records)
+                    written += upsert_courses(records)
+                    for row in chunk:
+                        if row.get("review_id") and row.get("course_title"):
+                            review_titles.setdefault(f"{row.get('subject')} {row.get('number')}", row["course_title"])
+
+            records = review_only_courses(review_titles, latest_course_ids())
+            courses += len(records)
+            written += upsert_courses(records)
+
+            course_ids = latest_course_ids()
+            for path in paths:
+                for chunk in read_chunks(path):
+                    records = normalize_reviews(chunk, course_ids)
+                    reviews += len(records)
+                    skipped += sum(1 for row in chunk if row.get("review_id")) - len(records)
+                    written += upsert_reviews("CUReviews", records)
+
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            db.session.remove()
+            conn.exec_driver_sql(f"PRAGMA synchronous={previous_sync}")
+
+    elapsed = time.perf_counter() - start
+    if skipped:
+        print(f"[WARN] Skipped {skipped} review rows without a course")
+    print(f"[SUCCESS] Snapshot loaded in {elapsed:.2f}s: {courses} course rows, "
+          f"{reviews} review rows ({written} new or changed).")
+    return {"courses": courses, "reviews": reviews, "written": written, "errors": 0}
+
+
+if __name__ == "__main__":
+    import sys
+    from app import create_app
+
+    with create_app().app_context():
+        load_from_snapshot(*sys.argv[1:2])
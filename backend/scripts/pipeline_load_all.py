@@ -1,33 +1,102 @@
 """
 pipeline_load_all.py
-Runs ALL data ingestion steps in order:
-1. Load Cornell Class Roster → populate Course table
-2. Load CUReviews → populate Review table
-3. Load RMP reviews → populate Review table
+Runs ALL data ingestion steps:
+1. Load Cornell Class Roster (every subject of DEFAULT_ROSTERS) → populate Course table
+2. Run every registered review source (CUReviews, RMP, ... see review_sources.py)
+   concurrently → populate Review table
+3. Summarize the reviews of courses whose reviews changed → Course.ai_review
+   (see summaries.py)
+4. Update the course similarity index (see similarity.py)
+5. Rebuild this process's in-memory catalog snapshot (see catalog.py)
+
+or, with snapshot=True, rebuilds both tables offline from the CSV
+snapshots in backend/data/ (see load_snapshot.py).
 """
 
-from scripts.load_class_roster import load_courses
-from scripts.load_cureviews import load_cureviews_to_db
-from scripts.load_rmp import load_rmp_reviews_to_db
+from contextlib import nullcontext
+
+from flask import current_app
+
+import catalog
+import similarity
+from cache import bump_version
+from db import db
+from scripts import http_cache
+from scripts import review_sources
+from scripts import summaries
+from scripts.load_class_roster import load_roster_subjects
+from scripts.load_snapshot import load_from_snapshot
+
+# (stage name, label, loader) -- each loader returns a dict of counts
+STAGES = [
+    ("roster", "Loading Class Roster", load_roster_subjects),
+]
+
+SNAPSHOT_STAGES = [
+    ("snapshot", "Loading CSV snapshots", load_from_snapshot),
+]
 
 
-def run_pipeline():
+def run_pipeline(tracker=None, snapshot=False):
+    """
+    Runs every stage in order, then every review source, or the offline
+    SNAPSHOT_STAGES if snapshot. tracker (optional) is anything with a
+    stage(name) context manager yielding a dict -- see jobs.PipelineJob --
+    and receives each stage's counts.
+    """
     print("\n==============================")
     print("Starting Full Data Pipeline")
     print("==============================")
 
-    print("\nSTEP 1: Loading Class Roster...")
-    load_courses()
+    stages = SNAPSHOT_STAGES if snapshot else STAGES
+    for step, (name, label, loader) in enumerate(stages, start=1):
+        print(f"\nSTEP {step}: {label}...")
+        with (tracker.stage(name) if tracker else nullcontext({})) as stage:
+            stage["counts"] = loader()
 
-    print("\nSTEP 2: Loading CUReviews...")
-    load_cureviews_to_db()
+            # Invalidate cached catalog responses, but only if something changed
+            if stage["counts"].get("written"):
+                bump_version("catalog")
+                db.session.commit()
 
-    print("\nSTEP 3: Loading RateMyProfessors...")
-    load_rmp_reviews_to_db()
+    failed = []
+    if not snapshot:
+        # Each source commits (and bumps the catalog version) on its own
+        print(f"\nSTEP {len(stages) + 1}: Loading reviews from {len(review_sources.all_sources())} sources...")
+        results = review_sources.run_all(tracker)
+        print(f"\nHTTP cache: {http_cache.stats()}")
+        failed = [stage for stage, counts in results.items() if counts is None]
+
+    # Also after failed sources: the others' reviews are in the database
+    step = len(stages) + (1 if snapshot else 2)
+    print(f"\nSTEP {step}: Summarizing reviews...")
+    with (tracker.stage("summaries") if tracker else nullcontext({})) as stage:
+        stage["counts"] = summaries.refresh_summaries()
+        if stage["counts"]["written"]:
+            bump_version("catalog")
+        db.session.commit()
+
+    print(f"\nSTEP {step + 1}: Updating similarity index...")
+    with (tracker.stage("similarity") if tracker else nullcontext({})) as stage:
+        stage["counts"] = similarity.build_index()
+        if stage["counts"]["written"]:
+            bump_version("similarity")
+            db.session.commit()
+
+    if current_app.config.get("CATALOG_SNAPSHOT"):
+        print(f"\nSTEP {step + 2}: Rebuilding catalog snapshot...")
+        with (tracker.stage("catalog") if tracker else nullcontext({})) as stage:
+            stage["counts"] = catalog.refresh()
+
+    if failed:
+        raise RuntimeError(f"Review sources failed: {', '.join(failed)}")
 
     print("\nPipeline complete.")
 
 
 if __name__ == "__main__":
-    run_pipeline()
+    from app import create_app
+
+    with create_app().app_context():
+        run_pipeline()
     print("\n[SUCCESS] All ingestion pipelines completed!")
@@ -0,0 +1,109 @@
+"""
+professors.py
+Fills the professor and course_professor tables from the roster
+instructor lists stored in Course.professor.
+
+extract_row() formats each instructor as "First Last (netid)", a bare
+netid, or a bare name, joined with ", ". Instructors are keyed by netid;
+name-only entries have no stable key and are skipped.
+"""
+
+import re
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from db import db, Course, Professor, course_professor, CHUNK_SIZE
+
+_NAMED = re.compile(r"^(?P<name>.+?)\s*\((?P<netid>[A-Za-z0-9]+)\)$")
+_NETID = re.compile(r"^[a-z]+[0-9]+$")
+
+
+# ---------------------------------------------------------
+# Parsing
+# ---------------------------------------------------------
+def parse_instructors(blob: str | None) -> list[tuple[str, str]]:
+    """"Jane Doe (jd123), ab45" -> [("Jane Doe", "jd123"), ("ab45", "ab45")]."""
+    instructors = []
+    for part in (blob or "").split(","):
+        part = part.strip()
+        match = _NAMED.match(part)
+        if match:
+            instructors.append((match["name"], match["netid"].lower()))
+        elif _NETID.match(part):
+            instructors.append((part, part))
+    return instructors
+
+
+# ---------------------------------------------------------
+# Linking
+# ---------------------------------------------------------
+def _upsert_professors(instructors: dict) -> dict:
+    """instructors: netid -> name. Returns netid -> professor id."""
+    if not instructors:
+        return {}
+
+    stmt = sqlite_insert(Professor.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["netid"],
+        set_={"name": stmt.excluded.name},
+        where=Professor.__table__.c.name.is_distinct_from(stmt.excluded.name),
+    )
+    db.session.execute(stmt, [{"netid": netid, "name": name} for netid, name in instructors.items()])
+
+    netids = list(instructors)
+    ids = {}
+    for start in range(0, len(netids), CHUNK_SIZE):
+        rows = db.session.execute(
+            select(Professor.netid, Professor.id).where(Professor.netid.in_(netids[start:start + CHUNK_SIZE]))
+        )
+        ids.update(dict(rows.all()))
+    return ids
+
+
+def link_course_professors(keys) -> int:
+    """
+    Re-links the courses with the given (code, term) keys to the professors
+    in their instructor lists. Returns the number of links written.
+    """
+    keys = list(keys)
+    courses = []
+    for start in range(0, len(keys), CHUNK_SIZE):
+        courses.extend(db.session.execute(
+            select(Course.id, Course.professor)
+            .where(tuple_(Course.code, Course.term).in_(keys[start:start + CHUNK_SIZE]))
+        ).all())
+
+    parsed = {course_id: parse_instructors(blob) for course_id, blob in courses}
+    ids = _upsert_professors({netid: name for instrs in parsed.values() for name, netid in instrs})
+
+    course_ids = list(parsed)
+    existing = set()
+    for start in range(0, len(course_ids), CHUNK_SIZE):
+        chunk = course_ids[start:start + CHUNK_SIZE]
+        existing.update(tuple(row) for row in db.session.execute(
+            select(course_professor.c.course_id, course_professor.c.professor_id)
+            .where(course_professor.c.course_id.in_(chunk))
+        ))
+        db.session.execute(course_professor.delete().where(course_professor.c.course_id.in_(chunk)))
+
+    links = {
+        (course_id, ids[netid])
+        for course_id, instrs in parsed.items()
+        for _, netid in instrs
+    }
+    if links:
+        db.session.execute(
+            course_professor.insert(),
+            [{"course_id": course_id, "professor_id": professor_id} for course_id, professor_id in links],
+        )
+
+    # A professor with a new course needs a full RMP walk: ratings older
+    # than their sync mark may mention it
+    gained = sorted({professor_id for _, professor_id in links - existing})
+    for start in range(0, len(gained), CHUNK_SIZE):
+        db.session.execute(
+            Professor.__table__.update()
+            .where(Professor.id.in_(gained[start:start + CHUNK_SIZE]))
+            .values(rmp_synced_through=None)
+        )
+    return len(links)
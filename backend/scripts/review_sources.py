@@ -0,0 +1,152 @@
+"""
+review_sources.py
+Plugin interface for external review sources (CUReviews, RMP, ...).
+
+A source subclasses ReviewSource, implements its hooks and calls
+register() on an instance at import time. Its id, name and module are
+then declared in db.REVIEW_SOURCES, which is all the
+/api/reviews/<course_id>/<source_id> endpoint reads. The registry itself
+feeds the pipeline (run_all).
+
+run_all() runs every source at once, each on its own thread with its own
+app context, HTTP worker pool and rate limiter. Network work overlaps
+fully. Database writes take turns behind a lock (SQLite has a single
+writer), and one source failing does not stop the others. Adding a
+source therefore adds its write time to the pipeline, not its scrape time.
+"""
+
+import importlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from flask import current_app
+from cache import bump_version
+from db import db, REVIEW_SOURCES
+from scripts import http_client
+from scripts.upsert import upsert_reviews
+
+_registry = {}  # source_id -> ReviewSource
+_loaded = False
+_load_lock = threading.Lock()
+
+
+class ReviewSource:
+    """
+    One external review provider. Hooks, in the order run() calls them:
+
+        targets()                  -- main thread; read the DB, return work items
+        fetch(target)              -- HTTP worker threads; network only, no DB
+        normalize(target, payload) -- rows for upsert_reviews() (course_id,
+                                      external_id, content, metrics)
+        upsert(rows)               -- write the rows; returns rows written
+    """
+    name = None  # Review.source value, e.g. "CUReviews"
+    source_id = None  # Stable id used by /api/reviews/<course_id>/<source_id>
+    stage = None  # Pipeline stage name
+    max_workers = http_client.MAX_WORKERS
+    rate = None  # Requests/second across this source's workers; None = host limits only
+    limiter = None  # This run's RateLimiter (set by run())
+
+    def targets(self) -> list:
+        raise NotImplementedError
+
+    def fetch(self, target):
+        raise NotImplementedError
+
+    def normalize(self, target, payload) -> list[dict]:
+        raise NotImplementedError
+
+    def upsert(self, rows: list[dict]) -> int:
+        return upsert_reviews(self.name, rows)
+
+    def describe_error(self, target, err) -> str:
+        return f"{target}: {err}"
+
+    def run(self, write_lock=None) -> dict:
+        """Fetches, normalizes and writes this source's reviews. Returns counts."""
+        # Shared by every request of this run, targets() lookups included
+        self.limiter = http_client.RateLimiter(self.rate, burst=self.max_workers) if self.rate else None
+
+        with current_app.app_context():
+            targets = self.targets()
+            print(f"[INFO] {self.name}: fetching {len(targets)} targets")
+
+            results = http_client.fetch_all(self.fetch, targets, self.max_workers, self.limiter)
+
+            rows = []
+            errors = 0
+            for target, payload, err in results:
+                if err:
+                    print(f"[ERROR] {self.name}: {self.describe_error(target, err)}")
+                    errors += 1
+                    continue
+                rows.extend(self.normalize(target, payload))
+
+            with write_lock or nullcontext():
+                written = self.upsert(rows)
+                if written:
+                    bump_version("catalog")
+                db.session.commit()
+
+        print(f"[SUCCESS] {self.name}: {len(rows)} reviews loaded ({written} new or changed).")
+        return {"targets": len(targets), "reviews": len(rows), "written": written, "errors": errors}
+
+
+# ---------------------------------------------------------
+# Registry
+# ---------------------------------------------------------
+def register(source: ReviewSource) -> ReviewSource:
+    declared = REVIEW_SOURCES.get(source.source_id)
+    if declared is None or declared[0] != source.name:
+        raise ValueError(f"Review source {source.name} ({source.source_id}) is not declared in db.REVIEW_SOURCES")
+    _registry[source.source_id] = source
+    return source
+
+
+def _load_sources():
+    """Imports the modules in db.REVIEW_SOURCES, which register their sources."""
+    global _loaded
+    with _load_lock:
+        if not _loaded:
+            for _, module in REVIEW_SOURCES.values():
+                importlib.import_module(module)
+            _loaded = True
+
+
+def all_sources() -> list[ReviewSource]:
+    _load_sources()
+    return [_registry[i] for i in sorted(_registry)]
+
+
+def get_source_by_name(name: str) -> ReviewSource | None:
+    return next((s for s in all_sources() if s.name == name), None)
+
+
+# ---------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------
+def run_all(tracker=None) -> dict:
+    """
+    Runs every registered source concurrently. Returns stage name -> counts
+    (None for a source that failed). Failures are reported, not raised, so
+    the other sources' reviews are still written; the caller decides.
+    """
+    app = current_app._get_current_object()
+    write_lock = threading.Lock()
+    sources = all_sources()
+
+    def run(source):
+        start = time.perf_counter()
+        try:
+            with app.app_context():
+                with (tracker.stage(source.stage) if tracker else nullcontext({})) as stage:
+                    stage["counts"] = source.run(write_lock)
+                    return stage["counts"]
+        except Exception as err:
+            print(f"[ERROR] {source.name} failed after {time.perf_counter() - start:.1f}s: {err}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix="review-source") as pool:
+        return dict(zip((s.stage for s in sources), pool.map(run, sources)))
@@ -0,0 +1,219 @@
+"""
+summaries.py
+Fills Course.ai_review with a summary of each course's reviews.
+
+Each course's review set is hashed (review ids and content hashes, plus
+the summarizer's name and version) and the hash is stored next to the
+summary in Course.ai_review_hash. A refresh only summarizes courses whose
+hash changed, so its cost follows the number of changed courses, not the
+catalog size.
+
+Summarizers are pluggable: subclass Summarizer and either add it to
+SUMMARIZERS or point SUMMARIZER in the app config (COURSEREVIEW_SUMMARIZER)
+at "package.module:ClassName". The default, "extractive", picks
+representative review sentences locally and deterministically, so it
+runs offline. Summaries are generated on a bounded worker pool
+(http_client.fetch_all), and summarizers that call an HTTP API through
+http_client are held to their rate.
+"""
+
+import hashlib
+import importlib
+import math
+import re
+from collections import Counter
+
+from flask import current_app
+from sqlalchemy import bindparam, func, select, update
+
+from db import db, Course, Review, CHUNK_SIZE
+from scripts import http_client
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\s*\n+\s*")
+_WORD = re.compile(r"[a-z][a-z']+")
+_STOPWORDS = frozenset("""
+    a about after all also am an and any are as at be because been but by can class course
+    could did do does for from get got had has have he her his how i if in into is it its
+    just me more most my not of on one or our out she so some than that the their them then
+    there they this to too very was we were what when which who will with would you your
+""".split())
+
+
+# ---------------------------------------------------------
+# Summarizers
+# ---------------------------------------------------------
+class Summarizer:
+    """
+    Turns one course's reviews into a summary. summarize() runs on worker
+    threads and must not touch the database session.
+    """
+    name = None
+    version = 1  # Bump when the output changes, so stored summaries are regenerated
+    max_workers = 4
+    rate = None  # HTTP requests/second across workers; None = host limits only
+
+    def summarize(self, course: dict, reviews: list[dict]) -> str:
+        raise NotImplementedError
+
+
+class ExtractiveSummarizer(Summarizer):
+    """
+    A rating line plus the review sentences that best cover the words the
+    reviews use most, at most one sentence per review, in a fixed order.
+    """
+    name = "extractive"
+    max_sentences = 3
+    min_words = 6
+    max_words = 50
+
+    def summarize(self, course: dict, reviews: list[dict]) -> str:
+        candidates = []  # (review id, position, sentence, words)
+        frequency = Counter()
+        for review in reviews:
+            for pos, sentence in enumerate(_SENTENCE_END.split(review["content"] or "")):
+                words = [w for w in _WORD.findall(sentence.lower()) if w not in _STOPWORDS]
+                frequency.update(set(words))
+                if self.min_words <= len(sentence.split()) <= self.max_words:
+                    sentence = sentence.strip()
+                    candidates.append((review["id"], pos, sentence if sentence[-1] in ".!?" else sentence + ".", words))
+
+        def score(candidate):
+            words = set(candidate[3])
+            if not words:
+                return 0.0
+            return sum(frequency[w] for w in words) / math.sqrt(len(words))
+
+        picked = []
+        used_reviews = set()
+        for candidate in sorted(candidates, key=lambda c: (-score(c), c[0], c[1])):
+            if candidate[0] in used_reviews:
+                continue
+            picked.append(candidate[2])
+            used_reviews.add(candidate[0])
+            if len(picked) == self.max_sentences:
+                break
+
+        return " ".join([_rating_line(reviews)] + picked).strip()
+
+
+def _rating_line(reviews: list[dict]) -> str:
+    parts = []
+    for metric, label in (("rating", "Rated"), ("difficulty", "difficulty"), ("workload", "workload")):
+        values = [r[metric] for r in reviews if r[metric] is not None]
+        if values:
+            parts.append(f"{label} {sum(values) / len(values):.1f}/5")
+    count = f"{len(reviews)} review{'s' if len(reviews) != 1 else ''}"
+    return f"{', '.join(parts)} across {count}." if parts else f"Based on {count}."
+
+
+SUMMARIZERS = {
+    "extractive": ExtractiveSummarizer,
+}
+
+
+def get_summarizer(spec: str | None = None) -> Summarizer:
+    """A summarizer by SUMMARIZERS name or "module:ClassName" (default: the app's SUMMARIZER)."""
+    spec = spec or current_app.config.get("SUMMARIZER", "extractive")
+    if spec in SUMMARIZERS:
+        return SUMMARIZERS[spec]()
+    module, _, attr = spec.partition(":")
+    if not attr:
+        raise ValueError(f"Unknown summarizer {spec!r}")
+    return getattr(importlib.import_module(module), attr)()
+
+
+# ---------------------------------------------------------
+# Review-set hashes
+# ---------------------------------------------------------
+def review_set_hashes(summarizer: Summarizer, course_ids=None) -> dict[int, str]:
+    """course id -> hash of its reviews as summarizer sees them, for every course (or course_ids)."""
+    reviews = (
+        select(Review.course_id, Review.id, func.coalesce(Review.content_hash, Review.updated_version))
+        .order_by(Review.course_id, Review.id)
+    )
+    courses = select(Course.id)
+    if course_ids is not None:
+        reviews = reviews.where(Review.course_id.in_(course_ids))
+        courses = courses.where(Course.id.in_(course_ids))
+
+    seed = f"{summarizer.name}:{summarizer.version}"
+    hashes = {course_id: hashlib.sha1(seed.encode("utf-8")) for course_id in db.session.execute(courses).scalars()}
+    for course_id, review_id, review_hash in db.session.execute(reviews):
+        h = hashes.get(course_id)
+        if h is not None:
+            h.update(f"\x1f{review_id}:{review_hash}".encode("utf-8"))
+    return {course_id: h.hexdigest() for course_id, h in hashes.items()}
+
+
+def stale_courses(hashes: dict[int, str]) -> list[int]:
+    stored = dict(db.session.execute(select(Course.id, Course.ai_review_hash)).all())
+    return sorted(course_id for course_id, h in hashes.items() if stored.get(course_id) != h)
+
+
+# ---------------------------------------------------------
+# Refresh
+# ---------------------------------------------------------
+def _load_chunk(course_ids: list[int]) -> list[tuple[dict, list[dict]]]:
+    courses = {
+        row.id: {"id": row.id, "code": row.code, "title": row.title}
+        for row in db.session.execute(select(Course.id, Course.code, Course.title).where(Course.id.in_(course_ids)))
+    }
+    reviews = {course_id: [] for course_id in courses}
+    rows = db.session.execute(
+        select(Review.course_id, Review.id, Review.content, Review.rating, Review.difficulty, Review.workload)
+        .where(Review.course_id.in_(course_ids))
+        .order_by(Review.course_id, Review.id)
+    )
+    for row in rows:
+        reviews[row.course_id].append(dict(row._mapping))
+    return [(courses[course_id], reviews[course_id]) for course_id in sorted(courses)]
+
+
+def refresh_summaries(summarizer: Summarizer | None = None, course_ids=None, force: bool = False) -> dict:
+    """
+    Summarizes the courses whose review set changed (every course with force)
+    in the current session. Courses without reviews get an empty summary.
+    Returns counts; the caller commits.
+    """
+    summarizer = summarizer or get_summarizer()
+    hashes = review_set_hashes(summarizer, course_ids)
+    stale = sorted(hashes) if force else stale_courses(hashes)
+    print(f"[INFO] Summaries ({summarizer.name}): {len(stale)} of {len(hashes)} courses changed")
+
+    limiter = http_client.RateLimiter(summarizer.rate, burst=summarizer.max_workers) if summarizer.rate else None
+    stmt = (
+        update(Course.__table__)
+        .where(Course.__table__.c.id == bindparam("course_id"))
+        .values(ai_review=bindparam("summary"), ai_review_hash=bindparam("hash"))
+    )
+
+    def summarize(item):
+        course, reviews = item
+        return summarizer.summarize(course, reviews) if reviews else ""
+
+    written = errors = 0
+    for start in range(0, len(stale), CHUNK_SIZE):
+        chunk = _load_chunk(stale[start:start + CHUNK_SIZE])
+        rows = []
+        for (course, _), summary, err in http_client.fetch_all(summarize, chunk, summarizer.max_workers, limiter):
+            if err:
+                print(f"[ERROR] Summary for {course['code']} ({course['id']}): {err}")
+                errors += 1
+                continue
+            rows.append({"course_id": course["id"], "summary": summary, "hash": hashes[course["id"]]})
+        if rows:
+            db.session.execute(stmt, rows)
+        written += len(rows)
+
+    return {"courses": len(hashes), "stale": len(stale), "written": written, "errors": errors}
+
+
+if __name__ == "__main__":
+    import sys
+    from app import create_app
+
+    with create_app().app_context():
+        counts = refresh_summaries(force="--force" in sys.argv)
+        db.session.commit()
+    print(f"[SUCCESS] {counts['written']} summaries written ({counts['errors']} errors).")
@@ -0,0 +1,193 @@
+"""
+upsert.py
+Idempotent bulk writes for the ingestion scripts.
+
+Courses are keyed by (code, term), reviews by (source, external_id). Rows
+are written with one INSERT ... ON CONFLICT DO UPDATE executemany. The
+update only fires when the row's content_hash changed, so re-running the
+pipeline leaves unchanged rows untouched.
+
+Derived tables are kept in step with what actually changed: course_professor
+for new or changed courses, course_stats for courses whose reviews changed.
+"""
+
+import hashlib
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from db import db, Course, Review, CHUNK_SIZE
+from scripts.course_stats import refresh_course_stats
+from scripts.professors import link_course_professors
+
+
+TERM_SEASONS = {"WI": 0, "SP": 1, "SU": 2, "FA": 3}
+
+
+def content_hash(*values) -> str:
+    """Stable hash of the scraped fields of a row."""
+    joined = "\x1f".join("" if v is None else str(v) for v in values)
+    return hashlib.sha1(joined.encode("utf-8")).hexdigest()
+
+
+def _upsert(table, rows: list[dict], key: list[str], update: list[str]) -> int:
+    """Returns the number of rows inserted or changed."""
+    if not rows:
+        return 0
+
+    stmt = sqlite_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=key,
+        set_={col: stmt.excluded[col] for col in update},
+        where=table.c.content_hash.is_distinct_from(stmt.excluded.content_hash),
+    )
+    result = db.session.execute(stmt, rows)
+    return max(result.rowcount, 0)
+
+
+# ---------------------------------------------------------
+# Courses
+# ---------------------------------------------------------
+def term_sort_key(term: str) -> tuple:
+    """"SP26" -> (26, 1), so later terms sort last."""
+    try:
+        return int(term[2:]), TERM_SEASONS.get(term[:2], -1)
+    except ValueError:
+        return -1, -1
+
+
+def latest_course_ids() -> dict:
+    """
+    Maps course code -> id of its most recent offering. External reviews
+    aren't tied to a term, and each review can only belong to one course row.
+    """
+    latest = {}
+    for course_id, code, term in db.session.query(Course.id, Course.code, Course.term):
+        if code not in latest or term_sort_key(term) > term_sort_key(latest[code][1]):
+            latest[code] = (course_id, term)
+    return {code: course_id for code, (course_id, _) in latest.items()}
+
+
+def _changed_course_keys(records: list[dict]) -> set[tuple]:
+    """(code, term) keys of records that are new or whose content_hash changed."""
+    existing = {}
+    keys = [(r["code"], r["term"]) for r in records]
+    for start in range(0, len(keys), CHUNK_SIZE):
+        rows = db.session.execute(
+            select(Course.code, Course.term, Course.content_hash)
+            .where(tuple_(Course.code, Course.term).in_(keys[start:start + CHUNK_SIZE]))
+        )
+        existing.update({(code, term): h for code, term, h in rows})
+
+    return {
+        (r["code"], r["term"]) for r in records
+        if existing.get((r["code"], r["term"])) != r["content_hash"]
+    }
+
+
+def upsert_courses(rows: list[dict]) -> int:
+    """
+    rows: dicts with title, code, professor, term, credit and optionally description.
+    ai_review is only set on insert so generated summaries survive a refresh.
+    New or changed courses are re-linked to their professors.
+    """
+    records = [
+        {
+            **row,
+            "ai_review": row.get("ai_review", ""),
+            "description": row.get("description", ""),
+            "content_hash": content_hash(row["title"], row["professor"], row["credit"], row.get("description", "")),
+        }
+        for row in rows
+    ]
+    if not records:
+        return 0
+
+    changed = _changed_course_keys(records)
+    written = _upsert(
+        Course.__table__,
+        records,
+        key=["code", "term"],
+        update=["title", "professor", "credit", "description", "content_hash"],
+    )
+
+    link_course_professors(changed)
+    return written
+
+
+# ---------------------------------------------------------
+# Reviews
+# ---------------------------------------------------------
+REVIEW_FIELDS = ["course_id", "content", "rating", "difficulty", "workload", "grade", "likes", "date"]
+
+
+def _changed_course_ids(source: str, records: list[dict]) -> set[int]:
+    """Courses that gain, lose or change a review when records are upserted."""
+    existing = {}
+    ids = [r["external_id"] for r in records]
+    for start in range(0, len(ids), CHUNK_SIZE):
+        rows = db.session.query(Review.external_id, Review.course_id, Review.content_hash).filter(
+            Review.source == source,
+            Review.external_id.in_(ids[start:start + CHUNK_SIZE]),
+        )
+        existing.update({ext: (course_id, h) for ext, course_id, h in rows})
+
+    changed = set()
+    for r in records:
+        old = existing.get(r["external_id"])
+        if old is None or old[1] != r["content_hash"]:
+            changed.add(r["course_id"])
+            if old is not None:
+                changed.add(old[0])  # review may have moved between courses
+    return changed
+
+
+def upsert_reviews(source: str, rows: list[dict]) -> int:
+    """
+    rows: dicts with external_id and the REVIEW_FIELDS (metrics may be None).
+    Returns the number of rows inserted, changed or deleted.
+
+    A review listed more than once (e.g. under two offerings of a course)
+    is written for its first course only, so a re-run doesn't move it.
+
+    Reviews stored before external ids existed can't be matched to their
+    upstream row, so this source's unkeyed reviews for the courses in rows
+    are deleted and replaced by the keyed copies written here.
+
+    course_stats is refreshed for every course whose reviews changed.
+    """
+    unique = {}
+    for row in rows:
+        if row.get("external_id"):
+            unique.setdefault(row["external_id"], row)
+    records = [
+        {
+            **{field: row.get(field) for field in REVIEW_FIELDS},
+            "external_id": external_id,
+            "source": source,
+            "content_hash": content_hash(*(row.get(field) for field in REVIEW_FIELDS)),
+        }
+        for external_id, row in unique.items()
+    ]
+    if not records:
+        return 0
+
+    changed = _changed_course_ids(source, records)
+
+    course_ids = {r["course_id"] for r in records}
+    legacy = Review.query.filter(
+        Review.source == source,
+        Review.external_id.is_(None),
+        Review.course_id.in_(course_ids),
+    )
+    changed.update(course_id for (course_id,) in legacy.with_entities(Review.course_id).distinct())
+    replaced = legacy.delete(synchronize_session=False)
+
+    written = replaced + _upsert(
+        Review.__table__,
+        records,
+        key=["source", "external_id"],
+        update=REVIEW_FIELDS + ["content_hash"],
+    )
+
+    refresh_course_stats(changed)
+    return written
@@ -0,0 +1,208 @@
+"""
+search.py
+Full-text search over courses and reviews using SQLite FTS5.
+
+Two external-content FTS5 tables mirror the course and review tables:
+    course_fts(title, code, professor)  -> course.id
+    review_fts(content)                 -> review.id
+
+Triggers keep both indexes in sync with every INSERT/UPDATE/DELETE, so the
+ingestion scripts don't need to know the index exists.
+"""
+
+import re
+from sqlalchemy import text
+
+HIGHLIGHT_START = "**"
+HIGHLIGHT_END = "**"
+SNIPPET_TOKENS = 16
+
+# bm25 column weights for course_fts (title, code, professor)
+COURSE_WEIGHTS = (5.0, 10.0, 2.0)
+
+SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS course_fts USING fts5(
+        title, code, professor,
+        content='course', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS review_fts USING fts5(
+        content,
+        content='review', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS course_fts_ai AFTER INSERT ON course BEGIN
+        INSERT INTO course_fts(rowid, title, code, professor)
+        VALUES (new.id, new.title, new.code, new.professor);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS course_fts_ad AFTER DELETE ON course BEGIN
+        INSERT INTO course_fts(course_fts, rowid, title, code, professor)
+        VALUES ('delete', old.id, old.title, old.code, old.professor);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS course_fts_au AFTER UPDATE OF title, code, professor ON course BEGIN
+        INSERT INTO course_fts(course_fts, rowid, title, code, professor)
+        VALUES ('delete', old.id, old.title, old.code, old.professor);
+        INSERT INTO course_fts(rowid, title, code, professor)
+        VALUES (new.id, new.title, new.code, new.professor);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS review_fts_ai AFTER INSERT ON review BEGIN
+        INSERT INTO review_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS review_fts_ad AFTER DELETE ON review BEGIN
+        INSERT INTO review_fts(review_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS review_fts_au AFTER UPDATE OF content ON review BEGIN
+        INSERT INTO review_fts(review_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO review_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+]
+
+COURSE_QUERY = f"""
+    SELECT c.id, c.title, c.code, c.professor, c.term,
+           highlight(course_fts, 0, :hl_start, :hl_end) AS title_hl,
+           highlight(course_fts, 2, :hl_start, :hl_end) AS professor_hl,
+           bm25(course_fts, {", ".join(str(w) for w in COURSE_WEIGHTS)}) AS rank
+    FROM course_fts
+    JOIN course c ON c.id = course_fts.rowid
+    WHERE course_fts MATCH :query
+    ORDER BY rank
+    LIMIT :limit
+"""
+
+REVIEW_QUERY = f"""
+    SELECT r.id, r.course_id, r.source,
+           snippet(review_fts, 0, :hl_start, :hl_end, '…', {SNIPPET_TOKENS}) AS snippet,
+           bm25(review_fts) AS rank
+    FROM review_fts
+    JOIN review r ON r.id = review_fts.rowid
+    WHERE review_fts MATCH :query
+    ORDER BY rank
+    LIMIT :limit
+"""
+
+_available = None
+
+
+# ---------------------------------------------------------
+# Index management
+# ---------------------------------------------------------
+def ensure_search_index(engine):
+    """
+    Creates the FTS5 tables and sync triggers if missing. A freshly created
+    index is rebuilt from the existing rows. Returns False if this SQLite
+    build has no FTS5 support.
+    """
+    global _available
+
+    with engine.begin() as conn:
+        existing = conn.execute(
+            text("SELECT name FROM sqlite_master WHERE name IN ('course_fts', 'review_fts')")
+        ).fetchall()
+
+        try:
+            for stmt in SCHEMA:
+                conn.execute(text(stmt))
+        except Exception as err:
+            print(f"[WARN] Full-text search disabled: {err}")
+            _available = False
+            return False
+
+        if len(existing) < 2:
+            conn.execute(text("INSERT INTO course_fts(course_fts) VALUES ('rebuild')"))
+            conn.execute(text("INSERT INTO review_fts(review_fts) VALUES ('rebuild')"))
+
+    _available = True
+    return True
+
+
+def check_search_index(engine) -> bool:
+    """Marks search available if the FTS5 tables exist, without creating anything."""
+    global _available
+
+    with engine.connect() as conn:
+        found = conn.execute(
+            text("SELECT COUNT(*) FROM sqlite_master WHERE name IN ('course_fts', 'review_fts')")
+        ).scalar()
+    _available = found == 2
+    return _available
+
+
+def is_available():
+    return bool(_available)
+
+
+# ---------------------------------------------------------
+# Querying
+# ---------------------------------------------------------
+def build_match_query(q: str) -> str | None:
+    """
+    Turns free user text into a safe FTS5 MATCH expression: every word is
+    quoted (so FTS operators in the input are treated as text) and the last
+    word is a prefix match so results show up while the user is typing.
+    """
+    tokens = re.findall(r"\w+", q)
+    if not tokens:
+        return None
+
+    terms = [f'"{t}"' for t in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search(session, q: str, limit: int) -> dict | None:
+    """Returns bm25-ranked course and review matches for q, or None if q has no words."""
+    match = build_match_query(q)
+    if match is None:
+        return None
+
+    params = {
+        "query": match,
+        "limit": limit,
+        "hl_start": HIGHLIGHT_START,
+        "hl_end": HIGHLIGHT_END,
+    }
+
+    courses = session.execute(text(COURSE_QUERY), params).mappings().all()
+    reviews = session.execute(text(REVIEW_QUERY), params).mappings().all()
+
+    return {
+        "courses": [
+            {
+                "id": c["id"],
+                "title": c["title"],
+                "code": c["code"],
+                "professor": c["professor"],
+                "term": c["term"],
+                "title_highlight": c["title_hl"],
+                "professor_highlight": c["professor_hl"],
+                "rank": c["rank"],
+            }
+            for c in courses
+        ],
+        "reviews": [
+            {
+                "id": r["id"],
+                "course": r["course_id"],
+                "source": r["source"],
+                "snippet": r["snippet"],
+                "rank": r["rank"],
+            }
+            for r in reviews
+        ],
+    }
@@ -0,0 +1,311 @@
+"""
+similarity.py
+Course similarity and recommendations from hashed TF-IDF vectors.
+
+Each course is a bag of words from its title, subject, roster description,
+instructors and review text. Words are hashed (crc32, with a hash-derived
+sign) into DIMENSIONS buckets, so there is no vocabulary to store. Rows are
+weighted by TF-IDF and L2-normalized, which makes cosine similarity a
+single matrix-vector product over the whole catalog.
+
+The index is a set of .npy files under SIMILARITY_DIR (instance/similarity
+by default), one directory per build, with the live build named in
+CURRENT. Readers memory-map it, so every worker process shares the same
+pages and picks up a new build on its next query. build_index() runs after
+each ingestion and only re-reads courses whose course row or reviews
+changed (per updated_version and review count, see sync.py). Everything
+else is copied from the previous build's term frequencies, and IDF is
+recomputed over the catalog.
+"""
+
+import math
+import os
+import re
+import shutil
+import threading
+import time
+import zlib
+from collections import Counter
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import func, select
+
+from db import db, Course, Review, CHUNK_SIZE, COURSE_MINIMAL_COLUMNS, fetch_rows
+from scripts.professors import parse_instructors
+
+DIMENSIONS = 1024
+DEFAULT_K = 10
+MAX_K = 50
+
+# Term weights per field: the title, subject and description describe the
+# course itself, reviews are many and noisy
+TITLE_WEIGHT = 3
+SUBJECT_WEIGHT = 3
+DESCRIPTION_WEIGHT = 2
+PROFESSOR_WEIGHT = 2
+REVIEW_WEIGHT = 1
+
+TOKEN_RE = re.compile(r"[a-z][a-z0-9]+")
+STOPWORDS = frozenset("""
+    about after again all also and any are because been before being but can class classes
+    course courses could did does doing don during each even for from get got had has have
+    how into its just lot more most much not now off one only other our out over really
+    same should since some such than that the their them then there these they this those
+    through too very was way were what when where which while who will with would you your
+""".split())
+
+_buckets = {}  # token -> (bucket, sign)
+_indexes = {}  # index directory -> SimilarityIndex
+_load_lock = threading.Lock()
+
+
+# ---------------------------------------------------------
+# Features
+# ---------------------------------------------------------
+def _bucket(token: str) -> tuple[int, float]:
+    cached = _buckets.get(token)
+    if cached is None:
+        h = zlib.crc32(token.encode("utf-8"))
+        cached = _buckets[token] = (h % DIMENSIONS, 1.0 if h & 0x80000000 else -1.0)
+    return cached
+
+
+def _words(text: str | None) -> list[str]:
+    return [w for w in TOKEN_RE.findall((text or "").lower()) if w not in STOPWORDS]
+
+
+def course_terms(course: dict) -> Counter:
+    """Weighted term counts for a course row (code, title, description, professor)."""
+    terms = Counter()
+    for word in _words(course["title"]):
+        terms[word] += TITLE_WEIGHT
+    for word in _words(course["description"]):
+        terms[word] += DESCRIPTION_WEIGHT
+    subject = (course["code"] or "").split(" ")[0].lower()
+    if subject:
+        terms[f"subject:{subject}"] += SUBJECT_WEIGHT
+    for _, netid in parse_instructors(course["professor"]):
+        terms[f"professor:{netid}"] += PROFESSOR_WEIGHT
+    return terms
+
+
+def term_vector(terms: Counter) -> np.ndarray:
+    """Sublinear (1 + log tf) hashed term frequencies."""
+    row = np.zeros(DIMENSIONS, dtype=np.float32)
+    for term, count in terms.items():
+        bucket, sign = _bucket(term)
+        row[bucket] += sign * (1.0 + math.log(count))
+    return row
+
+
+# ---------------------------------------------------------
+# Index
+# ---------------------------------------------------------
+class SimilarityIndex:
+    """One build: sorted course ids and their unit-length TF-IDF rows (memory-mapped)."""
+
+    __slots__ = ("ids", "vectors", "generation", "stamp")
+
+    def __init__(self, path: str, generation: str, stamp: tuple):
+        self.ids = np.load(os.path.join(path, "ids.npy"))
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        self.generation = generation
+        self.stamp = stamp
+
+    def positions(self, course_ids) -> np.ndarray:
+        """Row numbers of the indexed course_ids (unknown ids are dropped)."""
+        course_ids = np.asarray(list(course_ids), dtype=np.int64)
+        pos = np.searchsorted(self.ids, course_ids)
+        pos = pos[pos < len(self.ids)]
+        return pos[np.isin(self.ids[pos], course_ids)]
+
+    def top_k(self, query: np.ndarray, k: int, exclude: np.ndarray) -> list[tuple[int, float]]:
+        """The k courses most similar to query, best first, skipping exclude rows."""
+        scores = self.vectors @ query
+        scores[exclude] = -np.inf
+        k = min(k, len(scores) - len(exclude))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(self.ids[i]), float(scores[i])) for i in top if scores[i] > 0]
+
+    def similar(self, course_id: int, k: int) -> list[tuple[int, float]] | None:
+        """Courses most similar to course_id, or None if it isn't indexed."""
+        pos = self.positions([course_id])
+        if not len(pos):
+            return None
+        return self.top_k(np.asarray(self.vectors[pos[0]]), k, pos)
+
+    def recommend(self, course_ids, k: int) -> list[tuple[int, float]]:
+        """Courses closest to the centroid of course_ids, excluding them."""
+        pos = self.positions(course_ids)
+        if not len(pos):
+            return []
+        query = np.asarray(self.vectors[pos]).sum(axis=0)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        return self.top_k(query / norm, k, pos)
+
+
+def index_dir() -> str:
+    return current_app.config["SIMILARITY_DIR"]
+
+
+def get_index(directory: str | None = None) -> SimilarityIndex | None:
+    """
+    The current build, or None if none has been built. A stat() of CURRENT
+    per call tells whether another process swapped in a new build.
+    """
+    directory = directory or index_dir()
+    pointer = os.path.join(directory, "CURRENT")
+    try:
+        st = os.stat(pointer)
+    except FileNotFoundError:
+        return None
+
+    stamp = (st.st_ino, st.st_mtime_ns)
+    index = _indexes.get(directory)
+    if index is not None and index.stamp == stamp:
+        return index
+
+    with _load_lock:
+        index = _indexes.get(directory)
+        if index is None or index.stamp != stamp:
+            with open(pointer) as f:
+                generation = f.read().strip()
+            index = _indexes[directory] = SimilarityIndex(os.path.join(directory, generation), generation, stamp)
+    return index
+
+
+def course_rows(results: list[tuple[int, float]]) -> list[dict]:
+    """Minimal course rows for (course id, score) results, in result order, with score."""
+    if not results:
+        return []
+    scores = dict(results)
+    rows = fetch_rows(select(*COURSE_MINIMAL_COLUMNS).where(Course.id.in_(scores)))
+    for row in rows:
+        row["score"] = round(scores[row["id"]], 4)
+    return sorted(rows, key=lambda r: -r["score"])
+
+
+# ---------------------------------------------------------
+# Building
+# ---------------------------------------------------------
+def _signatures() -> tuple[np.ndarray, np.ndarray]:
+    """Every course id, sorted, and its (newest change version, review count)."""
+    stmt = (
+        select(
+            Course.id,
+            func.max(func.coalesce(Course.updated_version, 0), func.coalesce(func.max(Review.updated_version), 0)),
+            func.count(Review.id),
+        )
+        .outerjoin(Review, Review.course_id == Course.id)
+        .group_by(Course.id)
+        .order_by(Course.id)
+    )
+    rows = db.session.execute(stmt).all()
+    ids = np.array([r[0] for r in rows], dtype=np.int64)
+    signatures = np.array([(r[1], r[2]) for r in rows], dtype=np.int64).reshape(-1, 2)
+    return ids, signatures
+
+
+def _term_rows(course_ids: list[int]) -> dict[int, np.ndarray]:
+    """Term frequency rows for course_ids, read from the database."""
+    rows = {}
+    for start in range(0, len(course_ids), CHUNK_SIZE):
+        chunk = course_ids[start:start + CHUNK_SIZE]
+        terms = {
+            c["id"]: course_terms(c)
+            for c in fetch_rows(
+                select(Course.id, Course.code, Course.title, Course.description, Course.professor)
+                .where(Course.id.in_(chunk))
+            )
+        }
+        reviews = db.session.execute(select(Review.course_id, Review.content).where(Review.course_id.in_(chunk)))
+        for course_id, content in reviews:
+            for word in _words(content):
+                terms[course_id][word] += REVIEW_WEIGHT
+        rows.update((course_id, term_vector(t)) for course_id, t in terms.items())
+    return rows
+
+
+def _load_previous(directory: str):
+    """(ids, signatures, tf) of the current build, or None."""
+    index = get_index(directory)
+    if index is None:
+        return None
+    path = os.path.join(directory, index.generation)
+    tf = np.load(os.path.join(path, "tf.npy"), mmap_mode="r")
+    if tf.shape[1] != DIMENSIONS:
+        return None
+    return index.ids, np.load(os.path.join(path, "signatures.npy")), tf
+
+
+def _write_build(directory: str, arrays: dict) -> str:
+    """Writes a new build directory and points CURRENT at it. Returns its name."""
+    generation = str(time.time_ns())
+    path = os.path.join(directory, generation)
+    os.makedirs(path)
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), array)
+
+    tmp = os.path.join(directory, f"CURRENT.{generation}")
+    with open(tmp, "w") as f:
+        f.write(generation)
+    os.replace(tmp, os.path.join(directory, "CURRENT"))
+
+    # Keep the previous build for readers still mapping it
+    builds = sorted(d for d in os.listdir(directory) if d.isdigit())
+    for old in builds[:-2]:
+        shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+    return generation
+
+
+def build_index(directory: str | None = None, full: bool = False) -> dict:
+    """
+    Rebuilds the index, re-reading only courses that changed since the last
+    build (all of them with full). Returns counts; "written" is 1 if a new
+    build was swapped in, 0 if nothing changed.
+    """
+    directory = directory or index_dir()
+    os.makedirs(directory, exist_ok=True)
+
+    ids, signatures = _signatures()
+    tf = np.zeros((len(ids), DIMENSIONS), dtype=np.float32)
+    stale = np.ones(len(ids), dtype=bool)
+
+    previous = None if full else _load_previous(directory)
+    if previous is not None:
+        old_ids, old_signatures, old_tf = previous
+        pos = np.searchsorted(old_ids, ids).clip(max=max(len(old_ids) - 1, 0))
+        if len(old_ids):
+            same = (old_ids[pos] == ids) & (old_signatures[pos] == signatures).all(axis=1)
+            tf[same] = old_tf[pos[same]]
+            stale = ~same
+        if not stale.any() and len(old_ids) == len(ids):
+            return {"courses": len(ids), "rebuilt": 0, "written": 0}
+
+    for course_id, row in _term_rows(ids[stale].tolist()).items():
+        tf[np.searchsorted(ids, course_id)] = row
+
+    # Smoothed IDF over buckets, then unit-length rows
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log((1 + len(ids)) / (1 + df)).astype(np.float32) + 1
+    vectors = tf * idf
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+
+    generation = _write_build(directory, {"ids": ids, "signatures": signatures, "tf": tf, "vectors": vectors})
+    print(f"[OK] Similarity index {generation}: {len(ids)} courses, {int(stale.sum())} re-read")
+    return {"courses": len(ids), "rebuilt": int(stale.sum()), "written": 1}
+
+
+if __name__ == "__main__":
+    import sys
+    from app import create_app
+
+    with create_app().app_context():
+        build_index(full="--full" in sys.argv)
@@ -0,0 +1,54 @@
+"""
+streaming.py
+Streams large query results as JSON without materializing them.
+
+Rows come straight from a column-projection SELECT (no ORM objects) and
+are pulled from SQLite in batches of yield_per, encoded and written out
+batch by batch. Peak memory is one batch, not the whole table.
+
+Two wire formats, picked from the Accept header:
+    application/json     -- {"<key>": [row, row, ...]} (the default)
+    application/x-ndjson -- one JSON object per line
+"""
+
+from flask import Response, request, stream_with_context
+
+from db import db
+from json_provider import dumps
+
+NDJSON = "application/x-ndjson"
+YIELD_PER = 1000
+
+
+def wants_ndjson() -> bool:
+    best = request.accept_mimetypes.best_match(["application/json", NDJSON], default="application/json")
+    return best == NDJSON
+
+
+def stream_query(key: str, stmt, yield_per: int = YIELD_PER) -> Response:
+    """
+    Streams the rows of stmt. Each row becomes a JSON object of its
+    selected columns, so label columns with their response names.
+    """
+    ndjson = wants_ndjson()
+
+    def generate():
+        result = db.session.execute(stmt.execution_options(yield_per=yield_per))
+
+        if not ndjson:
+            yield f'{{"{key}": ['
+
+        first = True
+        for batch in result.partitions(yield_per):
+            encoded = [dumps(dict(row._mapping)) for row in batch]
+            if ndjson:
+                yield "\n".join(encoded) + "\n"
+            else:
+                yield ("" if first else ",") + ",".join(encoded)
+                first = False
+
+        if not ndjson:
+            yield "]}"
+
+    # stream_with_context keeps the app context (and DB session) alive while the body is sent
+    return Response(stream_with_context(generate()), mimetype=NDJSON if ndjson else "application/json")
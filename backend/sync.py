@@ -0,0 +1,142 @@
+"""
+sync.py
+Delta sync for clients that keep a local copy of the catalog
+(GET /api/sync?since=<version>).
+
+Every change to a course, review or saved course takes the next value of
+a global change counter (the "sync" row of data_version) and stamps it on
+the row as updated_version. Deletions leave a tombstone with their
+version. Triggers do both, so every write path is covered: the pipeline
+upserts, the snapshot loader and the user endpoints. A client stores the
+version of its last sync and asks only for what changed after it.
+"""
+
+from sqlalchemy import select, text
+
+from db import db, Course, DataVersion, Review, Tombstone, association_table, COURSE_COLUMNS, REVIEW_COLUMNS, fetch_rows
+
+SYNC_COUNTER = "sync"
+
+# table -> (tombstone kind, row match, tombstone row_id, tombstone user_id, synced columns)
+TRACKED = {
+    "course": ("course", "id = new.id", "old.id", "NULL",
+               "title, code, professor, term, credit, ai_review"),
+    "review": ("review", "id = new.id", "old.id", "NULL",
+               "source, content, course_id, rating, difficulty, workload, grade, likes, date"),
+    "association_table": ("saved", "user_id = new.user_id AND course_id = new.course_id",
+                          "old.course_id", "old.user_id", None),
+}
+
+_NEXT_VERSION = f"UPDATE data_version SET version = version + 1 WHERE name = '{SYNC_COUNTER}';"
+_CURRENT_VERSION = f"(SELECT version FROM data_version WHERE name = '{SYNC_COUNTER}')"
+
+
+def _triggers(table: str) -> list[str]:
+    kind, match, row_id, user_id, columns = TRACKED[table]
+    stamp = f"UPDATE {table} SET updated_version = {_CURRENT_VERSION} WHERE {match};"
+    # A re-inserted row (e.g. a course saved again) supersedes its tombstone
+    untomb = (f"DELETE FROM tombstone WHERE kind = '{kind}' AND row_id = {row_id.replace('old.', 'new.')}"
+              f" AND user_id IS {user_id.replace('old.', 'new.')};")
+
+    ddl = [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_sync_ai AFTER INSERT ON {table} BEGIN
+            {_NEXT_VERSION}
+            {stamp}
+            {untomb}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_sync_ad AFTER DELETE ON {table} BEGIN
+            {_NEXT_VERSION}
+            INSERT INTO tombstone (version, kind, row_id, user_id)
+            VALUES ({_CURRENT_VERSION}, '{kind}', {row_id}, {user_id});
+        END
+        """,
+    ]
+    if columns:
+        ddl.append(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_sync_au AFTER UPDATE OF {columns} ON {table} BEGIN
+            {_NEXT_VERSION}
+            {stamp}
+        END
+        """)
+    return ddl
+
+
+def ensure_sync_triggers(engine):
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT OR IGNORE INTO data_version (name, version, updated_at) "
+            "VALUES (:name, 0, CURRENT_TIMESTAMP)"
+        ), {"name": SYNC_COUNTER})
+        for table in TRACKED:
+            for ddl in _triggers(table):
+                conn.exec_driver_sql(ddl)
+
+
+# ---------------------------------------------------------
+# Querying
+# ---------------------------------------------------------
+def current_version() -> int:
+    return db.session.execute(
+        select(DataVersion.version).where(DataVersion.name == SYNC_COUNTER)
+    ).scalar() or 0
+
+
+def changes_since(since: int, user_id: int | None = None) -> dict:
+    """
+    Everything that changed after version since: new or updated courses and
+    reviews, the user's newly saved courses, and deleted ids. The returned
+    version is what the client passes as since next time. A since the
+    server has never issued (e.g. after a database reset) gets a full sync
+    with reset set, so the client can drop its copy first.
+    """
+    version = current_version()
+    reset = since > version
+    if reset:
+        since = 0
+
+    courses = fetch_rows(
+        select(*COURSE_COLUMNS)
+        .where(Course.updated_version > since, Course.updated_version <= version)
+        .order_by(Course.id)
+    )
+    reviews = fetch_rows(
+        select(*REVIEW_COLUMNS)
+        .where(Review.updated_version > since, Review.updated_version <= version)
+        .order_by(Review.id)
+    )
+
+    saved = []
+    if user_id is not None:
+        saved = list(db.session.execute(
+            select(association_table.c.course_id).where(
+                association_table.c.user_id == user_id,
+                association_table.c.updated_version > since,
+                association_table.c.updated_version <= version,
+            )
+        ).scalars())
+
+    deleted = {"courses": [], "reviews": [], "saved": []}
+    if not reset:
+        rows = db.session.execute(
+            select(Tombstone.kind, Tombstone.row_id, Tombstone.user_id)
+            .where(Tombstone.version > since, Tombstone.version <= version)
+            .order_by(Tombstone.version)
+        )
+        for kind, row_id, tomb_user_id in rows:
+            if kind == "saved":
+                if tomb_user_id == user_id:
+                    deleted["saved"].append(row_id)
+            else:
+                deleted[f"{kind}s"].append(row_id)
+
+    return {
+        "version": version,
+        "reset": reset,
+        "courses": courses,
+        "reviews": reviews,
+        "saved": saved,
+        "deleted": deleted,
+    }
@@ -0,0 +1,32 @@
+"""
+Shared fixtures. Every test gets its own SQLite file under tmp_path, so
+tests never touch instance/coursereview.db. Run from backend/:
+
+    python -m pytest -q
+"""
+
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("HTTP_CACHE_DISABLED", "1")
+
+from db import db  # noqa: E402
+from helpers import make_app  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = make_app(tmp_path)
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
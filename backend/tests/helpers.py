@@ -0,0 +1,76 @@
+"""Helpers shared by the tests (conftest.py puts backend/ on sys.path)."""
+
+import sqlite3
+
+import cache
+from app import create_app
+from db import db
+
+
+def make_app(tmp_path, **config):
+    """An app on tmp_path/test.db (created or migrated on first use)."""
+    cache._backend.clear()  # cache keys don't include the database
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + str(tmp_path / "test.db"),
+        "SIMILARITY_DIR": str(tmp_path / "similarity"),
+        "JOBS_DIR": str(tmp_path / "jobs"),
+        "TESTING": True,
+        **config,
+    })
+
+
+def add_courses(rows):
+    """Upserts (code, term, title) course rows and returns their ids by (code, term)."""
+    from db import Course
+    from scripts.upsert import upsert_courses
+
+    upsert_courses([
+        {"title": title, "code": code, "professor": "Jane Doe (jd1)", "term": term, "credit": 3}
+        for code, term, title in rows
+    ])
+    db.session.commit()
+    return {(c.code, c.term): c.id for c in Course.query.all()}
+
+
+def review_row(course_id, external_id, content="Solid course.", rating=4.0):
+    return {"course_id": course_id, "external_id": external_id, "content": content,
+            "rating": rating, "difficulty": 3.0, "workload": 2.0}
+
+
+# The schema db.create_all() produced before any migration existed
+OLD_SCHEMA = """
+CREATE TABLE course (
+    id INTEGER NOT NULL, title VARCHAR NOT NULL, code VARCHAR NOT NULL, professor VARCHAR NOT NULL,
+    term VARCHAR NOT NULL, credit INTEGER NOT NULL, ai_review VARCHAR, PRIMARY KEY (id)
+);
+CREATE TABLE user (id INTEGER NOT NULL, name VARCHAR NOT NULL, netid VARCHAR NOT NULL, PRIMARY KEY (id));
+CREATE TABLE association_table (
+    course_id INTEGER NOT NULL, user_id INTEGER NOT NULL, PRIMARY KEY (course_id, user_id),
+    FOREIGN KEY(course_id) REFERENCES course (id), FOREIGN KEY(user_id) REFERENCES user (id)
+);
+CREATE TABLE review (
+    id INTEGER NOT NULL, source VARCHAR NOT NULL, content VARCHAR NOT NULL, course_id INTEGER NOT NULL,
+    PRIMARY KEY (id), FOREIGN KEY(course_id) REFERENCES course (id)
+);
+"""
+
+
+def make_old_database(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(OLD_SCHEMA)
+    # The old pipeline appended the catalog on every run: course 3 repeats course 1
+    conn.executemany("INSERT INTO course VALUES (?, ?, ?, ?, ?, ?, ?)", [
+        (1, "Intro to Computing", "CS 1110", "Jane Doe (jd1)", "SP26", 4, None),
+        (2, "Data Structures", "CS 2110", "John Roe (jr2)", "SP26", 4, None),
+        (3, "Intro to Computing", "CS 1110", "Jane Doe (jd1)", "SP26", 4, None),
+    ])
+    conn.executemany("INSERT INTO review VALUES (?, ?, ?, ?)", [
+        (1, "CUReviews", "Great intro.", 1),
+        (2, "CUReviews", "Hard but fair.", 2),
+        (3, "CUReviews", "Great intro.", 3),  # copy of review 1 on the duplicate course
+    ])
+    # Two accounts for the same netid, each with a saved course
+    conn.executemany("INSERT INTO user VALUES (?, ?, ?)", [(1, "Ann", "ab1"), (2, "Ann", "ab1")])
+    conn.executemany("INSERT INTO association_table VALUES (?, ?)", [(2, 1), (3, 2)])
+    conn.commit()
+    conn.close()
@@ -0,0 +1,32 @@
+"""Per-course review aggregates (course_stats)."""
+
+from db import db, CourseStats
+from helpers import add_courses, make_app, make_old_database, review_row
+from scripts.upsert import upsert_reviews
+
+
+def test_changed_review_refreshes_course_stats(app):
+    course_id = add_courses([("CS 1110", "SP26", "Intro")])[("CS 1110", "SP26")]
+    upsert_reviews("CUReviews", [review_row(course_id, "r1", rating=4.0), review_row(course_id, "r2", rating=2.0)])
+    db.session.commit()
+    stats = db.session.get(CourseStats, (course_id, "all"))
+    assert (stats.review_count, stats.rating_mean) == (2, 3.0)
+
+    assert upsert_reviews("CUReviews", [review_row(course_id, "r1", rating=5.0)]) == 1
+    db.session.commit()
+    db.session.expire_all()
+    assert db.session.get(CourseStats, (course_id, "all")).rating_mean == 3.5
+
+
+def test_existing_reviews_are_backfilled(tmp_path):
+    make_old_database(tmp_path / "test.db")
+    app = make_app(tmp_path)
+    client = app.test_client()
+
+    # Migration 9 fills course_stats, so sorted lists and stats work right away
+    sorted_page = client.get("/api/courses?sort=-reviews").get_json()
+    assert [(c["id"], c["review_count"]) for c in sorted_page["courses"]] == [(2, 1), (1, 1)]
+    assert client.get("/api/course/1/stats").get_json()["sources"]["all"]["review_count"] == 1
+
+    with app.app_context():
+        db.engine.dispose()
@@ -0,0 +1,55 @@
+"""GET /metrics reports every worker process, not just the one that answers."""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from db import db
+from helpers import make_app
+from instrumentation import request_latency
+
+COURSES = ("GET", "/api/courses", "200")
+COUNT = f'coursereview_request_duration_seconds_count{{method="{COURSES[0]}",route="{COURSES[1]}",status="{COURSES[2]}"}}'
+
+
+@pytest.fixture
+def metrics_app(tmp_path):
+    app = make_app(tmp_path, INSTRUMENTATION=True, METRICS_DIR=str(tmp_path / "metrics"))
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+def other_process_file(directory, pid, count):
+    """What a worker that served count /api/courses requests would have written."""
+    series = [0] * len(request_latency.buckets) + [count, 0.5 * count]
+    with open(os.path.join(directory, f"{pid}.json"), "w") as f:
+        json.dump({request_latency.name: [[list(COURSES), series]]}, f)
+
+
+def scraped_count(client):
+    body = client.get("/metrics").get_data(as_text=True)
+    line = next(line for line in body.splitlines() if line.startswith(COUNT))
+    return int(line.split()[-1])
+
+
+def test_metrics_merge_live_processes(metrics_app):
+    client = metrics_app.test_client()
+    client.get("/api/courses")
+    own = scraped_count(client)
+    directory = metrics_app.config["METRICS_DIR"]
+    assert os.path.exists(os.path.join(directory, f"{os.getpid()}.json"))
+
+    # A live sibling worker's counts are added in
+    other_process_file(directory, os.getppid(), 3)
+    assert scraped_count(client) == own + 3
+
+    # An exited worker's file is dropped
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    other_process_file(directory, exited.pid, 5)
+    assert scraped_count(client) == own + 3
+    assert not os.path.exists(os.path.join(directory, f"{exited.pid}.json"))
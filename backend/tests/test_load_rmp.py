@@ -0,0 +1,91 @@
+"""RMP ratings walk: pagination and the per-teacher sync mark."""
+
+import pytest
+
+from scripts import load_rmp
+from scripts.load_rmp import RMPSource, get_professor_ratings
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+def ratings_page(ratings, next_cursor=None):
+    """One GraphQL reply: ratings are (id, date) pairs, newest first."""
+    edges = [
+        {"node": {"id": rid, "class": "CS1110", "comment": f"Rating {rid}", "qualityRating": 4,
+                  "difficultyRating": 3, "date": f"{date} 12:00:00 +0000 UTC", "wouldTakeAgain": None}}
+        for rid, date in ratings
+    ]
+    page_info = {"hasNextPage": next_cursor is not None, "endCursor": next_cursor}
+    return {"data": {"node": {"ratings": {"edges": edges, "pageInfo": page_info}}}}
+
+
+@pytest.fixture
+def replies(monkeypatch):
+    """Queue of replies served by http_client.post, in order."""
+    queue = []
+    monkeypatch.setattr(load_rmp.http_client, "post", lambda *args, **kwargs: FakeResponse(queue.pop(0)))
+    return queue
+
+
+def source_for(course_id=1):
+    source = RMPSource()
+    source.courses = {"T1": {(course_id, "CS 1110")}}
+    source.marks = []
+    return source
+
+
+def test_complete_walk_sets_the_mark(replies):
+    replies += [
+        ratings_page([("r3", "2025-03-01"), ("r2", "2025-02-01")], next_cursor="c1"),
+        ratings_page([("r1", "2025-01-01")]),
+    ]
+    payload = get_professor_ratings("T1")
+    assert payload[1] is True
+    assert [e["node"]["id"] for e in payload[0]] == ["r3", "r2", "r1"]
+
+    source = source_for()
+    assert len(source.normalize("T1", payload)) == 3
+    assert source.marks == [{"key": "T1", "rmp_synced_through": "2025-03-01T12:00:00"}]
+
+
+def test_walk_stops_at_the_mark(replies):
+    replies += [ratings_page([("r3", "2025-03-01"), ("r2", "2025-02-01")], next_cursor="c1")]
+    edges, complete = get_professor_ratings("T1", since="2025-02-01T12:00:00")
+    assert complete
+    assert [e["node"]["id"] for e in edges] == ["r3"]
+    assert replies == []
+
+
+def test_error_page_keeps_the_old_mark(replies):
+    replies += [
+        ratings_page([("r3", "2025-03-01")], next_cursor="c1"),
+        {"errors": [{"message": "Too many requests"}], "data": None},
+    ]
+    payload = get_professor_ratings("T1")
+    assert payload[1] is False
+
+    # The ratings that did arrive are stored, but older ones were never seen
+    source = source_for()
+    assert [r["external_id"] for r in source.normalize("T1", payload)] == ["r3"]
+    assert source.marks == []
+
+
+def test_page_cap_keeps_the_old_mark(replies, monkeypatch):
+    monkeypatch.setattr(load_rmp, "MAX_RATING_PAGES", 2)
+    replies += [
+        ratings_page([("r3", "2025-03-01")], next_cursor="c1"),
+        ratings_page([("r2", "2025-02-01")], next_cursor="c2"),
+    ]
+    payload = get_professor_ratings("T1")
+    assert payload[1] is False
+    assert len(payload[0]) == 2
+
+    source = source_for()
+    source.normalize("T1", payload)
+    assert source.marks == []
@@ -0,0 +1,49 @@
+"""Offline load of the bundled CSV snapshots (backend/data)."""
+
+import csv
+import glob
+import os
+
+from db import Course, Review
+from scripts.load_cureviews import CUReviewsSource
+from scripts.load_snapshot import DATA_DIR, REVIEW_ONLY_TERM, load_from_snapshot
+
+
+def bundled_reviews():
+    """review id -> (course code, raw date) for every review row in the snapshots."""
+    reviews = {}
+    for path in glob.glob(os.path.join(DATA_DIR, "*.csv")):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                if row.get("review_id"):
+                    reviews.setdefault(row["review_id"], (f"{row['subject']} {row['number']}", row["date"]))
+    return reviews
+
+
+def test_every_bundled_review_is_loaded(app):
+    load_from_snapshot()
+    expected = bundled_reviews()
+
+    stored = {r.external_id: (r.course.code, r.date) for r in Review.query.all()}
+    assert sorted(stored) == sorted(expected)
+    for review_id, (code, raw_date) in expected.items():
+        assert stored[review_id] == (code, raw_date[:19])
+
+    # Codes without roster rows become review-only courses
+    review_only = Course.query.filter_by(term=REVIEW_ONLY_TERM).all()
+    assert {c.code for c in review_only} == {code for code, _ in expected.values()} - \
+        {c.code for c in Course.query.filter(Course.term != REVIEW_ONLY_TERM)}
+    assert all(c.title and c.professor is None and c.credit is None for c in review_only)
+
+
+def test_reloading_the_snapshot_writes_nothing(app):
+    load_from_snapshot()
+    assert load_from_snapshot()["written"] == 0
+
+
+def test_cureviews_reviews_keep_their_date():
+    rows = CUReviewsSource().normalize((1, "CS", "1110"), [
+        {"_id": "r1", "text": "Fine.", "date": "2025-05-19T23:20:08.223Z"},
+        {"_id": "r2", "text": "Fine.", "date": None},
+    ])
+    assert [r["date"] for r in rows] == ["2025-05-19T23:20:08", None]
@@ -0,0 +1,43 @@
+"""Migrating a database created by the original schema (user_version 0)."""
+
+import sqlite3
+
+import migrations
+from db import db
+from helpers import make_app, make_old_database
+
+
+def test_old_database_is_migrated_without_losing_data(tmp_path):
+    make_old_database(tmp_path / "test.db")
+    app = make_app(tmp_path)
+
+    conn = sqlite3.connect(tmp_path / "test.db")
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == migrations.LATEST_VERSION
+    # Duplicate course folded into the lowest id, with its reviews and saves
+    assert conn.execute("SELECT id, code FROM course ORDER BY id").fetchall() == [(1, "CS 1110"), (2, "CS 2110")]
+    assert conn.execute("SELECT id, course_id FROM review ORDER BY id").fetchall() == [(1, 1), (2, 2)]
+    assert conn.execute("SELECT id FROM user").fetchall() == [(1,)]
+    assert sorted(conn.execute("SELECT course_id, user_id FROM association_table")) == [(1, 1), (2, 1)]
+    # Migration 10 rebuilt course with nullable roster fields, keeping its indexes and triggers
+    notnull = {row[1]: row[3] for row in conn.execute("PRAGMA table_info('course')")}
+    assert (notnull["professor"], notnull["credit"], notnull["term"]) == (0, 0, 1)
+    names = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE tbl_name = 'course'")}
+    assert {"uq_course_code_term", "course_sync_au", "course_fts_ai"} <= names
+    conn.close()
+
+    client = app.test_client()
+    # Search index and sync versions cover the old rows
+    assert [c["id"] for c in client.get("/api/search?q=intro").get_json()["courses"]] == [1]
+    full = client.get("/api/sync?since=0&user_id=1").get_json()
+    assert [c["id"] for c in full["courses"]] == [1, 2]
+    assert sorted(full["saved"]) == [1, 2]
+
+    with app.app_context():
+        db.engine.dispose()
+
+
+def test_up_to_date_database_skips_schema_work(tmp_path):
+    app = make_app(tmp_path)
+    with app.app_context():
+        assert migrations.ensure_schema(db.engine) is False
+        db.engine.dispose()
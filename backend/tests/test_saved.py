@@ -0,0 +1,80 @@
+"""Saved-course mutations: single (POST/DELETE) and bulk (PATCH/PUT)."""
+
+import json
+
+import pytest
+
+from app import MAX_SAVED_BATCH
+from helpers import add_courses
+
+
+@pytest.fixture
+def user(client):
+    return client.post("/api/user", data='{"name": "Ann", "netid": "ab1"}').get_json()["id"]
+
+
+@pytest.fixture
+def course_ids(app):
+    return sorted(add_courses([(f"CS {1000 + i}", "SP26", f"Topic {i}") for i in range(4)]).values())
+
+
+def send(client, method, user, body=None):
+    data = json.dumps(body) if body is not None else None
+    return client.open(f"/api/{user}/saved", method=method, data=data)
+
+
+def saved(client, user):
+    return sorted(c["id"] for c in client.get(f"/api/saved/{user}").get_json()["saved_courses"])
+
+
+def test_patch_adds_and_removes_as_sets(client, user, course_ids):
+    a, b, c, _ = course_ids
+    response = send(client, "PATCH", user, {"add": [a, b, b]})
+    assert response.status_code == 200
+    assert response.get_json()["changed"] == 2
+    assert saved(client, user) == [a, b]
+
+    # Adding a saved course or removing an unsaved one is a no-op
+    response = send(client, "PATCH", user, {"add": [a, c], "remove": [b, course_ids[3]]})
+    assert response.get_json()["changed"] == 2
+    assert saved(client, user) == [a, c]
+
+
+def test_put_replaces_the_list(client, user, course_ids):
+    a, b, c, d = course_ids
+    send(client, "PATCH", user, {"add": [a, b, c]})
+
+    response = send(client, "PUT", user, {"course_ids": [c, d]})
+    assert response.status_code == 200
+    assert sorted(c["id"] for c in response.get_json()["saved_courses"]) == [c, d]
+    assert response.get_json()["changed"] == 3  # a and b removed, d added
+
+    assert send(client, "PUT", user, {"course_ids": []}).status_code == 200
+    assert saved(client, user) == []
+
+
+@pytest.mark.parametrize("body", [None, {}, {"add": [1]}, {"course_ids": 1}, {"course_ids": ["1"]}, [1, 2]])
+def test_put_without_a_course_id_list_is_rejected(client, user, course_ids, body):
+    send(client, "PATCH", user, {"add": course_ids[:2]})
+
+    assert send(client, "PUT", user, body).status_code == 400
+    assert saved(client, user) == course_ids[:2]
+
+
+def test_batch_size_limit(client, user, course_ids):
+    too_many = list(range(1, MAX_SAVED_BATCH + 2))
+    assert send(client, "PATCH", user, {"add": too_many}).status_code == 400
+    assert send(client, "PATCH", user, {"remove": too_many}).status_code == 400
+    assert send(client, "PUT", user, {"course_ids": too_many}).status_code == 400
+
+    # At the limit, ids are checked against the catalog instead
+    at_limit = list(range(1, MAX_SAVED_BATCH + 1))
+    assert send(client, "PATCH", user, {"add": at_limit}).status_code == 404
+    assert saved(client, user) == []
+
+
+def test_unknown_user_and_course(client, user, course_ids):
+    assert send(client, "PATCH", user + 1, {"add": course_ids[:1]}).status_code == 404
+    assert send(client, "PUT", user, {"course_ids": [course_ids[-1] + 1]}).status_code == 404
+    assert send(client, "POST", user, {"course_id": "1"}).status_code == 400
+    assert send(client, "DELETE", user).status_code == 400
@@ -0,0 +1,89 @@
+"""Delta sync (GET /api/sync): change versions and tombstones."""
+
+from sqlalchemy import delete
+
+from db import db, Review
+from helpers import add_courses, review_row
+from scripts.upsert import upsert_reviews
+
+
+def sync(client, since, user_id=None):
+    url = f"/api/sync?since={since}" + (f"&user_id={user_id}" if user_id else "")
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def make_user(client, netid="ab1"):
+    return client.post("/api/user", data='{"name": "Ann", "netid": "%s"}' % netid).get_json()["id"]
+
+
+def test_full_then_delta(client):
+    ids = add_courses([("CS 1110", "SP26", "Intro"), ("CS 2110", "SP26", "Data Structures")])
+    intro = ids[("CS 1110", "SP26")]
+
+    full = sync(client, 0)
+    assert not full["reset"]
+    assert [c["code"] for c in full["courses"]] == ["CS 1110", "CS 2110"]
+    assert sync(client, full["version"])["courses"] == []
+
+    upsert_reviews("CUReviews", [review_row(intro, "r1")])
+    db.session.commit()
+    delta = sync(client, full["version"])
+    assert delta["courses"] == []
+    assert [(r["course"], r["content"]) for r in delta["reviews"]] == [(intro, "Solid course.")]
+    assert delta["version"] > full["version"]
+
+    # An unchanged re-ingest is not a change
+    upsert_reviews("CUReviews", [review_row(intro, "r1")])
+    db.session.commit()
+    assert sync(client, delta["version"])["reviews"] == []
+
+
+def test_deleted_reviews_leave_tombstones(client):
+    intro = add_courses([("CS 1110", "SP26", "Intro")])[("CS 1110", "SP26")]
+    upsert_reviews("CUReviews", [review_row(intro, "r1"), review_row(intro, "r2")])
+    db.session.commit()
+    before = sync(client, 0)["version"]
+    gone = Review.query.filter_by(external_id="r2").one().id
+
+    db.session.execute(delete(Review).where(Review.id == gone))
+    db.session.commit()
+    delta = sync(client, before)
+    assert delta["deleted"]["reviews"] == [gone]
+    assert delta["reviews"] == []
+
+
+def test_saved_changes_are_per_user(client):
+    ids = add_courses([("CS 1110", "SP26", "Intro"), ("CS 2110", "SP26", "Data Structures")])
+    intro, data = ids[("CS 1110", "SP26")], ids[("CS 2110", "SP26")]
+    ann, bob = make_user(client, "ab1"), make_user(client, "bc2")
+    start = sync(client, 0, ann)["version"]
+
+    client.patch(f"/api/{ann}/saved", data='{"add": [%d, %d]}' % (intro, data))
+    client.post(f"/api/{bob}/saved", data='{"course_id": %d}' % intro)
+    added = sync(client, start, ann)
+    assert sorted(added["saved"]) == [intro, data]
+    assert sync(client, start, bob)["saved"] == [intro]
+
+    client.delete(f"/api/{ann}/saved", data='{"course_id": %d}' % data)
+    removed = sync(client, added["version"], ann)
+    assert removed["saved"] == []
+    assert removed["deleted"]["saved"] == [data]
+    assert sync(client, added["version"], bob)["deleted"]["saved"] == []
+
+    # Saving again supersedes the tombstone
+    client.post(f"/api/{ann}/saved", data='{"course_id": %d}' % data)
+    again = sync(client, added["version"], ann)
+    assert again["saved"] == [data]
+    assert again["deleted"]["saved"] == []
+
+
+def test_unknown_version_resets(client):
+    add_courses([("CS 1110", "SP26", "Intro")])
+    current = sync(client, 0)["version"]
+
+    reset = sync(client, current + 100)
+    assert reset["reset"]
+    assert [c["code"] for c in reset["courses"]] == ["CS 1110"]
+    assert client.get("/api/sync?since=-1").status_code == 400
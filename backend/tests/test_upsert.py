@@ -0,0 +1,55 @@
+"""Re-running ingestion with the same upstream data must not change anything."""
+
+from db import db, Course, Review
+from helpers import add_courses, review_row
+from scripts.load_cureviews import CUReviewsSource
+from scripts.upsert import upsert_courses, upsert_reviews
+import sync
+
+CUREVIEWS_PAYLOAD = [
+    {"_id": "r1", "text": "Great intro.", "rating": 5, "difficulty": 2, "workload": 2, "likes": 3},
+    {"_id": "r2", "text": "Too much work.", "rating": "2", "difficulty": "4", "workload": "", "likes": None},
+]
+
+
+def test_course_upsert_is_idempotent(app):
+    rows = [{"title": "Intro", "code": "CS 1110", "professor": "Jane Doe (jd1)", "term": "SP26", "credit": 4}]
+    assert upsert_courses(rows) == 1
+    db.session.commit()
+    version = sync.current_version()
+
+    assert upsert_courses(rows) == 0
+    db.session.commit()
+    assert sync.current_version() == version
+
+
+def test_code_in_two_terms_is_written_once(app):
+    ids = add_courses([("CS 9999", "SP26", "Topics"), ("CS 9999", "FA26", "Topics")])
+    source = CUReviewsSource()
+    target = next(t for t in source.targets() if t[1:] == ("CS", "9999"))
+    assert target[0] == ids[("CS 9999", "FA26")]  # the latest offering
+
+    written, versions = [], []
+    for _ in range(3):
+        # Also list the reviews under the older offering, as a source that
+        # doesn't know about terms would
+        rows = source.normalize(target, CUREVIEWS_PAYLOAD) + \
+            source.normalize((ids[("CS 9999", "SP26")], "CS", "9999"), CUREVIEWS_PAYLOAD)
+        written.append(upsert_reviews(source.name, rows))
+        db.session.commit()
+        versions.append(sync.current_version())
+
+    assert written == [2, 0, 0]
+    assert versions[0] == versions[1] == versions[2]
+    assert {r.course_id for r in Review.query.all()} == {ids[("CS 9999", "FA26")]}
+
+
+def test_legacy_reviews_are_replaced_by_keyed_copies(app):
+    course_id = add_courses([("CS 1110", "SP26", "Intro")])[("CS 1110", "SP26")]
+    db.session.add(Review(source="CUReviews", content="Old scrape", course_id=course_id))
+    db.session.commit()
+
+    upsert_reviews("CUReviews", [review_row(course_id, "r1")])
+    db.session.commit()
+    assert [(r.external_id, r.content) for r in Review.query.all()] == [("r1", "Solid course.")]
+    assert Course.query.count() == 1